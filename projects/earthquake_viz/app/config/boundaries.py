@@ -2,3 +2,9 @@
 # IMPORTANT: Ensure this path is correct
 SHAPEFILE_PATH = "data/shapefiles/ne_110m_admin_0_countries/ne_110m_admin_0_countries.shp"
 
+
+# --- Compiled Boundary Artifacts ---
+# Written once by `python -m app.core.boundary_index` (or on first start if missing)
+BOUNDARY_DIR = "data/boundaries"
+COUNTRY_INDEX_PATH = f"{BOUNDARY_DIR}/country_index.feather"
+COUNTRIES_GEOPARQUET_PATH = f"{BOUNDARY_DIR}/countries.parquet"
@@ -1,2 +1,79 @@
 USGS_API_BASE_URL = "https://earthquake.usgs.gov/fdsnws/event/1/"
-DEFAULT_LIMIT = 1000 # Default max events to fetch
\ No newline at end of file
+DEFAULT_LIMIT = 1000 # Default max events to fetch
+
+# --- Windowed Fetch Configuration ---
+USGS_MAX_EVENTS_PER_QUERY = 20000 # Hard cap enforced by the USGS query endpoint
+WINDOW_FILL_RATIO = 0.8 # Size sub-windows to stay comfortably under the cap
+MIN_WINDOW_SECONDS = 3600 # Never split a time window below one hour
+FETCH_MAX_WORKERS = 4 # Concurrent sub-window requests
+
+# --- Local Event Catalog ---
+CATALOG_ENABLED = True # Serve repeat/overlapping queries from the on-disk catalog
+CATALOG_PATH = "data/catalog/quakes.sqlite"
+CATALOG_REFRESH_SECONDS = 300 # Minimum age of a window before asking USGS for updates
+CATALOG_SYNC_MAX_EVENTS = 20000 # Limited queries matching more events than this fetch only their newest events instead of syncing the window
+
+# --- HTTP Client ---
+HTTP_TIMEOUT_SECONDS = 30
+HTTP_POOL_SIZE = 8 # Keep-alive connections kept per host
+HTTP_MAX_RETRIES = 4 # Retries on 429/5xx and connection errors
+HTTP_BACKOFF_BASE_SECONDS = 0.5
+HTTP_BACKOFF_MAX_SECONDS = 8.0
+HTTP_STATS_HISTORY = 500 # Per-request stats kept in memory
+HTTP_RATE_LIMIT_PER_SECOND = None # Requests per second across all threads (None: unlimited)
+
+# --- Query Planner ---
+MAX_QUERY_BOXES = 8 # Upper bound on bounding boxes fetched per query
+BOX_MERGE_SLACK = 0.5 # Merge two boxes if the union adds at most this fraction of their area...
+BOX_MERGE_MIN_WASTE_DEG2 = 25.0 # ...or at most this many square degrees
+
+# --- Query Result Cache ---
+RESULT_CACHE_TTL_SECONDS = 900 # Fetched event sets are reused for this long
+RESULT_CACHE_MAX_BYTES = 256 * 2**20 # Total Arrow buffer size kept in memory; least recently used results go first
+
+# --- Map Rendering ---
+MAP_MARKER_MODE = "auto" # "auto": "pyramid" above MAP_POINT_BUDGET events, else "fast"; "markers": one Folium marker per event
+MAP_COORD_DECIMALS = 4 # Coordinate precision shipped to the browser (~11 m)
+MAP_POINT_BUDGET = 2000 # Most individual events drawn at once; larger sets are aggregated (below the sidebar's 5,000-event limit)
+MAP_RAW_POINT_ZOOM = 8 # Zoom level at which aggregated cells give way to individual events
+MAP_AGGREGATE_MIN_ZOOM = 0 # Coarsest aggregation level (whole world in one tile)
+MAP_AGGREGATE_MAX_ZOOM = 7 # Finest aggregation level, just below MAP_RAW_POINT_ZOOM
+MAP_CELL_BUDGET = 5000 # Stop refining the pyramid at the first level with more cells than this
+
+# --- Map HTML Cache ---
+MAP_HTML_CACHE_MAX_BYTES = 64 * 2**20 # In-memory LRU of rendered map HTML
+MAP_HTML_CACHE_DISK = True # Also keep rendered maps on disk across restarts
+MAP_HTML_CACHE_DIR = "data/map_cache"
+MAP_HTML_CACHE_DISK_MAX_BYTES = 256 * 2**20
+
+# --- Chart Rendering ---
+CHART_RENDER_WORKERS = None # Process pool size for chart animations (None: one per CPU, 0: render in-process)
+CHART_RENDER_START_METHOD = "spawn" # Fresh interpreters: safe to start from Streamlit's threaded server
+CHART_CACHE_DIR = "data/chart_cache" # Rendered charts, named by a hash of their input data and parameters
+CHART_CACHE_MAX_BYTES = 512 * 2**20 # Least recently used charts are evicted beyond this
+CHART_PRERENDER_BUDGET = 1 # Concurrent background renders of unopened chart tabs (0: render tabs only when opened; also off when CHART_RENDER_WORKERS is 0)
+
+# --- Chart Encoding ---
+CHART_ENCODER = "gif_optimized" # gif, gif_optimized, webp, apng or mp4 (unavailable formats fall back, ending at gif)
+CHART_WEBP_QUALITY = 80 # Lossy animated WebP quality (0-100)
+CHART_MP4_CRF = 28 # H.264 constant rate factor: lower is better quality and bigger files
+FFMPEG_BINARY = None # Path to ffmpeg for mp4 output (None: look it up on PATH)
+CHART_BACKEND = "server" # "server": render animations to files; "plotly": ship the advanced charts to the browser (needs plotly)
+
+# --- Batch Pre-render ---
+PRERENDER_COUNTRIES = None # Countries pre-rendered by `python -m app.prerender` (None: every country)
+PRERENDER_WINDOWS_DAYS = (7, 30, 365) # Windows ending today, in days
+PRERENDER_WORKERS = 4 # Countries processed at once
+PRERENDER_RATE_LIMIT_PER_SECOND = 2.0 # USGS requests per second across all workers
+PRERENDER_MIN_MAGNITUDE = 3.0 # Sidebar default, so pre-rendered results match what the app asks for
+PRERENDER_OFFSHORE_BUFFER_KM = 100 # Sidebar default
+
+# --- Instrumentation ---
+SPANS_ENABLED = True # Time each pipeline stage (wall/CPU time, peak RSS rise, output bytes)
+SPAN_JSON_LOGS = True # Also log every span as one JSON line on the "earthquake_viz.spans" logger
+DEBUG_PANEL = False # Show the collapsible stage timing panel under the results (internal timings and memory: development only)
+
+# --- Data Table ---
+TABLE_PAGE_SIZES = (50, 100, 250, 500) # Rows per page offered under the table (the first is the default)
+TABLE_DEFAULT_SORT = ("Time", True) # (column, descending) the table opens with: newest first
+TABLE_EXPORT_CHUNK_ROWS = 10_000 # Rows converted at a time when building a CSV/Parquet download
@@ -0,0 +1,129 @@
+import logging
+import os
+import sys
+import threading
+import uuid
+import pyarrow as pa
+import pyarrow.feather as feather
+import shapely
+from app.config.boundaries import COUNTRIES_GEOPARQUET_PATH, COUNTRY_INDEX_PATH, SHAPEFILE_PATH
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+NAME_COLUMN = 'ADMIN'
+
+class CountryIndex:
+    """
+    Precomputed country lookup table loaded from a memory-mapped Feather file.
+
+    Names, bounds, part counts and areas are available immediately; each
+    country's geometry is stored as WKB and only decoded (and prepared) the
+    first time it is requested.
+    """
+
+    def __init__(self, table: pa.Table):
+        self._table = table
+        names = table.column('name').to_pylist()
+        self._rows = {name: i for i, name in enumerate(names)}
+        self._folded = {name.casefold(): name for name in names}
+        self.names = sorted(names)
+        self._geometries = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = COUNTRY_INDEX_PATH) -> "CountryIndex":
+        """Loads a compiled index (memory-mapped, so untouched columns are never read)."""
+        return cls(feather.read_table(path, memory_map=True))
+
+    def resolve(self, country_name: str) -> str | None:
+        """Maps a name to its canonical entry: exact match first, then case-insensitive exact match."""
+        if country_name in self._rows:
+            return country_name
+        return self._folded.get(str(country_name).strip().casefold())
+
+    def _value(self, name: str, column: str):
+        return self._table.column(column)[self._rows[name]].as_py()
+
+    def bounds(self, country_name: str) -> list | None:
+        """Bounding box [min_lon, min_lat, max_lon, max_lat] of a country, or None if unknown."""
+        name = self.resolve(country_name)
+        if name is None:
+            return None
+        return [self._value(name, column) for column in ('min_lon', 'min_lat', 'max_lon', 'max_lat')]
+
+    def info(self, country_name: str) -> dict | None:
+        """Precomputed attributes (bounds, part count, area in square degrees) of a country."""
+        name = self.resolve(country_name)
+        if name is None:
+            return None
+        return {"name": name, "bounds": self.bounds(name),
+                "parts": self._value(name, 'n_parts'), "area": self._value(name, 'area')}
+
+    def geometry(self, country_name: str):
+        """Prepared country (multi)polygon, decoded from WKB on first access."""
+        name = self.resolve(country_name)
+        if name is None:
+            return None
+        with self._lock:
+            geometry = self._geometries.get(name)
+            if geometry is None:
+                geometry = shapely.from_wkb(self._value(name, 'wkb'))
+                shapely.prepare(geometry)
+                self._geometries[name] = geometry
+        return geometry
+
+def _write_atomic(path: str, write) -> None:
+    """Calls `write(temp_path)` next to `path`, then renames it into place (readers see the old file or the new one)."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def compile_world_index(shapefile_path: str = SHAPEFILE_PATH, index_path: str = COUNTRY_INDEX_PATH,
+                        geoparquet_path: str = COUNTRIES_GEOPARQUET_PATH) -> str:
+    """
+    One-time compile step: converts the Natural Earth shapefile into binary artifacts.
+
+    Writes the boundaries as GeoParquet and a Feather index with one row per
+    country (exact name, bounds, part count, area and geometry WKB).
+
+    Args:
+        shapefile_path (str): Natural Earth admin-0 shapefile.
+        index_path (str): Output path of the Feather country index.
+        geoparquet_path (str): Output path of the GeoParquet boundaries.
+
+    Returns:
+        str: Path of the written index.
+    """
+    import geopandas as gpd
+
+    world_gdf = gpd.read_file(shapefile_path)
+    name_column = NAME_COLUMN if NAME_COLUMN in world_gdf.columns else next(
+        col for col in world_gdf.columns if 'NAME' in col.upper() or 'ADMIN' in col.upper())
+    world_gdf = world_gdf.rename(columns={name_column: 'COUNTRY_NAME'}) if name_column != 'COUNTRY_NAME' else world_gdf
+    world_gdf = world_gdf.dropna(subset=['COUNTRY_NAME']).drop_duplicates(subset=['COUNTRY_NAME'])
+
+    # Written to temp files and renamed, so a crash or a concurrent reader never sees a truncated file
+    _write_atomic(geoparquet_path, world_gdf.to_parquet)
+
+    geometries = world_gdf.geometry.values
+    bounds = shapely.bounds(geometries)
+    table = pa.table({
+        'name': world_gdf['COUNTRY_NAME'].astype(str).tolist(),
+        'min_lon': bounds[:, 0], 'min_lat': bounds[:, 1], 'max_lon': bounds[:, 2], 'max_lat': bounds[:, 3],
+        'n_parts': shapely.get_num_geometries(geometries).astype('int32'),
+        'area': shapely.area(geometries),
+        'wkb': pa.array(shapely.to_wkb(geometries).tolist(), type=pa.binary()),
+    })
+    # Uncompressed so the index can be memory-mapped
+    _write_atomic(index_path, lambda temp_path: feather.write_feather(table, temp_path, compression='uncompressed'))
+    logging.info(f"Compiled country index with {table.num_rows} countries to {index_path} and {geoparquet_path}.")
+    return index_path
+
+if __name__ == "__main__":
+    compile_world_index(*sys.argv[1:2])
@@ -0,0 +1,123 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Callable
+from app.core import geo_utils
+from app.core import usgs_api
+from app.core.quake_columns import QuakeColumns
+from app.core.result_cache import get_result_cache, query_key
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+@dataclass
+class CountryQuery:
+    """A planned USGS query for one country: API parameters plus what is needed to clip and map the result."""
+    country_name: str
+    api_params: dict
+    bounds: list
+    geometry: object = None
+    clip_buffer_km: float | None = None # None: keep every event the boxes return
+    boxes: list = field(default_factory=list)
+
+    @property
+    def map_bounds(self) -> list:
+        """Bounds to center and fit the map on: the planned boxes (wrapped across ±180° if shorter), else `bounds`."""
+        return geo_utils.view_bounds(self.boxes) or self.bounds
+
+def plan_country_query(
+    country_name: str,
+    country_index,
+    starttime: str,
+    endtime: str,
+    min_magnitude: float,
+    limit: int | None,
+    clip_to_border: bool = True,
+    offshore_buffer_km: float = 0,
+    ) -> CountryQuery | None:
+    """
+    Plans the USGS query for a country and time range.
+
+    Used by both the app and the batch pre-renderer, so the same selections
+    always produce the same parameters (and so the same cache keys).
+
+    Args:
+        country_name (str): Country name as listed in the country index.
+        country_index (CountryIndex | gpd.GeoDataFrame): Loaded country boundaries.
+        starttime (str): Start date (YYYY-MM-DD).
+        endtime (str): End date (YYYY-MM-DD).
+        min_magnitude (float): Minimum magnitude.
+        limit (int | None): Maximum number of events (newest kept), or None for every matching event.
+        clip_to_border (bool, optional): Drop events outside the (buffered) border. Defaults to True.
+        offshore_buffer_km (float, optional): Border buffer when clipping. Defaults to 0.
+
+    Returns:
+        CountryQuery | None: The planned query, or None if the country's bounds could not be found.
+    """
+    bounds = geo_utils.get_country_bounds(country_name, country_index)
+    if not bounds:
+        return None
+    geometry = geo_utils.get_country_geometry(country_name, country_index)
+
+    api_params = {
+        "starttime": starttime,
+        "endtime": endtime,
+        "min_magnitude": min_magnitude,
+        "limit": limit,
+    }
+    # Tight per-part boxes (split at ±180°) instead of one box over the whole country
+    buffer_km = offshore_buffer_km if clip_to_border else 0
+    boxes = geo_utils.plan_query_boxes([geometry], buffer_km=buffer_km) if geometry is not None else []
+    if boxes:
+        api_params["bounding_boxes"] = boxes
+    else:
+        api_params["bounding_box"] = bounds
+    logging.info(f"Using bounds for {country_name}: {boxes or bounds}")
+
+    clip = clip_to_border and geometry is not None
+    if clip:
+        # Clipped results differ per border and buffer, so both are part of the cache key
+        api_params["border"] = {"country": country_name, "buffer_km": offshore_buffer_km}
+    return CountryQuery(country_name, api_params, bounds, geometry, offshore_buffer_km if clip else None, boxes)
+
+def fetch_events(clip: Callable[[QuakeColumns], QuakeColumns] | None = None, **params) -> QuakeColumns | None:
+    """
+    Runs a USGS query (one or several bounding boxes) through the catalog-backed fetchers.
+
+    Args:
+        clip (Callable | None, optional): Spatial filter applied before the event limit. Defaults to None.
+        **params: Query parameters from `plan_country_query`.
+
+    Returns:
+        QuakeColumns | None: The events, or None if the fetch failed.
+    """
+    logging.info(f"CACHE MISS: Calling USGS API with params: {params}")
+    params.pop("border", None) # Only part of the cache key; `clip` does the filtering
+    if 'bounding_box' in params and isinstance(params['bounding_box'], list):
+        params['bounding_box'] = tuple(params['bounding_box'])
+    if 'bounding_boxes' in params:
+        return usgs_api.fetch_earthquake_data_boxes(columnar=True, clip=clip, **params)
+    return usgs_api.fetch_earthquake_data_synced(columnar=True, clip=clip, **params)
+
+def cached_api_call(clip: Callable[[QuakeColumns], QuakeColumns] | None = None, **params) -> QuakeColumns | None:
+    """`fetch_events` through the process-wide query result cache."""
+    # Shared across sessions as Arrow buffers: hits map the columns without copying or unpickling
+    # Narrower repeats of a cached query (later start, higher magnitude floor, lower limit) are filtered in memory
+    return get_result_cache().get_or_fetch(query_key(**params), lambda: fetch_events(clip=clip, **params), params=params)
+
+def fetch_country_events(query: CountryQuery) -> QuakeColumns | None:
+    """
+    Fetches a planned query, keeping only events inside the (buffered) country border.
+
+    The border filter runs before the event limit, so the result holds the
+    newest `limit` in-country events, and `available` counts in-country events.
+
+    Args:
+        query (CountryQuery): Query from `plan_country_query`.
+
+    Returns:
+        QuakeColumns | None: Events inside the (buffered) border, or None if the fetch failed.
+    """
+    clip = None
+    if query.clip_buffer_km is not None:
+        # The bounding boxes over-fetch: keep only events inside the (buffered) border
+        clip = lambda quakes: geo_utils.filter_events_to_geometry(quakes, query.geometry, buffer_km=query.clip_buffer_km)
+    return cached_api_call(clip=clip, **query.api_params)
@@ -1,85 +1,84 @@
+import numpy as np
 import pandas as pd
 import logging
-from datetime import datetime
+from app.core.quake_columns import MISSING_TIME, QuakeColumns, as_columns
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def geojson_to_dataframe(geojson_data: dict) -> pd.DataFrame | None:
+# Column order and dtypes of the event table shared by the table, charts and caches
+DATAFRAME_COLUMNS = [
+    'Magnitude', 'Place', 'Time', 'Depth (km)',
+    'Latitude', 'Longitude', 'Details URL', 'USGS ID'
+]
+
+def _empty_dataframe() -> pd.DataFrame:
+    """Empty event table with the same columns and dtypes as a populated one."""
+    return pd.DataFrame({
+        'Magnitude': pd.Series(dtype='float32'),
+        'Place': pd.Series(dtype='category'),
+        'Time': pd.Series(dtype='datetime64[ns, UTC]'),
+        'Depth (km)': pd.Series(dtype='float32'),
+        'Latitude': pd.Series(dtype='float32'),
+        'Longitude': pd.Series(dtype='float32'),
+        'Details URL': pd.Series(dtype=object),
+        'USGS ID': pd.Series(dtype=object),
+    })
+
+def geojson_to_dataframe(geojson_data: dict | QuakeColumns) -> pd.DataFrame | None:
     """
     Converts earthquake GeoJSON data into a Pandas DataFrame.
 
+    Columns are extracted in bulk: `Time` is kept as `datetime64[ns, UTC]`,
+    magnitude, depth and coordinates as float32 and `Place` as categorical.
+    Events with unusable coordinates are dropped via a vectorized mask.
+
     Args:
-        geojson_data (dict): Parsed GeoJSON dictionary from the USGS API.
+        geojson_data (dict | QuakeColumns): Parsed GeoJSON dictionary from the USGS API,
+                                            or the columns already parsed from it.
 
     Returns:
         pd.DataFrame | None: A Pandas DataFrame containing key earthquake
                              information, or None if input is invalid.
     """
-    if not geojson_data or 'features' not in geojson_data:
+    columns = as_columns(geojson_data)
+    if columns is None:
         logging.warning("Cannot create DataFrame from invalid or empty GeoJSON data.")
         return None
 
-    features = geojson_data['features']
-    if not features:
+    if len(columns) == 0:
         logging.info("GeoJSON data has no features, returning empty DataFrame.")
         # Return an empty DataFrame with expected columns if features list is empty
-        return pd.DataFrame(columns=[
-            'Magnitude', 'Place', 'Time', 'Depth (km)',
-            'Latitude', 'Longitude', 'Details URL', 'USGS ID'
-        ])
-
-    records = []
-    for feature in features:
-        try:
-            properties = feature.get('properties', {})
-            geometry = feature.get('geometry', {})
-            coords = geometry.get('coordinates', [])
-
-            # Basic validation
-            if geometry.get('type') != 'Point' or len(coords) < 2:
-                logging.warning(f"Skipping feature due to invalid geometry: {feature.get('id')}")
-                continue
-
-            # Extract data, providing defaults for missing values
-            mag = properties.get('mag')
-            place = properties.get('place', 'N/A')
-            time_epoch_ms = properties.get('time')
-            depth = coords[2] if len(coords) > 2 else 0.0 # Depth is 3rd element
-            lat = coords[1] # Latitude is 2nd element
-            lon = coords[0] # Longitude is 1st element
-            details_url = properties.get('url', '#')
-            usgs_id = feature.get('id', 'N/A')
-
-            # Convert epoch milliseconds to datetime string
-            time_str = "N/A"
-            if time_epoch_ms:
-                try:
-                    time_dt = datetime.utcfromtimestamp(time_epoch_ms / 1000)
-                    time_str = time_dt.strftime('%Y-%m-%d %H:%M:%S UTC')
-                except Exception as e:
-                    logging.warning(f"Could not format time for event {usgs_id}: {e}")
+        return _empty_dataframe()
 
-            # Append record to list
-            records.append({
-                'Magnitude': mag,
-                'Place': place,
-                'Time': time_str,
-                'Depth (km)': depth,
-                'Latitude': lat,
-                'Longitude': lon,
-                'Details URL': details_url,
-                'USGS ID': usgs_id
-            })
+    # Flag bad events in one pass instead of per-row exceptions
+    valid = (
+        np.isfinite(columns.latitude) & np.isfinite(columns.longitude)
+        & (np.abs(columns.latitude) <= 90) & (np.abs(columns.longitude) <= 180)
+    )
+    invalid_count = int((~valid).sum())
+    if invalid_count:
+        logging.warning(f"Dropping {invalid_count} events with invalid coordinates.")
+        columns = columns.take(valid)
 
-        except Exception as e:
-            logging.error(f"Error processing feature {feature.get('id', 'Unknown ID')}: {e}", exc_info=True)
-            continue # Skip to next feature if error occurs
+    # Epoch milliseconds -> datetime64; the missing-time sentinel is exactly NaT
+    time_ms = columns.time_ms.view('datetime64[ms]')
+    times = pd.DatetimeIndex(time_ms.astype('datetime64[ns]')).tz_localize('UTC')
 
-    # Create DataFrame
-    df = pd.DataFrame(records)
+    df = pd.DataFrame({
+        'Magnitude': columns.mag.astype(np.float32),
+        'Place': pd.Categorical(columns.place),
+        'Time': times,
+        'Depth (km)': columns.depth.astype(np.float32),
+        'Latitude': columns.latitude.astype(np.float32),
+        'Longitude': columns.longitude.astype(np.float32),
+        'Details URL': columns.url,
+        'USGS ID': columns.ids,
+    }, columns=DATAFRAME_COLUMNS)
+    if (columns.time_ms == MISSING_TIME).any():
+        logging.warning("Some events have no origin time (NaT).")
     logging.info(f"Created DataFrame with {len(df)} records.")
 
     # Optional: Sort by time descending by default?
     # df = df.sort_values(by='Time', ascending=False)
 
-    return df
\ No newline at end of file
+    return df
@@ -0,0 +1,177 @@
+import io
+import logging
+import threading
+from typing import Iterator
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.config import settings
+from app.core.instrumentation import span
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class EventTable:
+    """
+    Server-side view of the event table: sorting, filtering, paging and export.
+
+    The frame stays here; the UI only ever receives one page of it. Sorting
+    uses a row order computed once per (column, direction) and cached, so
+    re-sorting, filtering and paging never sort the frame again: filters are
+    vectorized masks applied to a cached order (which keeps it sorted), and a
+    page is a `take` of `page_size` rows.
+
+    A view is a NumPy array of row positions, as returned by `rows`.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.reset_index(drop=True)
+        self._orders = {}
+        self._lock = threading.Lock() # Downloads build their exports on another thread
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.df.columns)
+
+    def sort_order(self, column: str, descending: bool = False) -> np.ndarray:
+        """
+        Row positions in sorted order (stable, missing values last), computed once per column and direction.
+
+        Args:
+            column (str): Column to sort by.
+            descending (bool, optional): Largest first. Defaults to False.
+
+        Returns:
+            np.ndarray: Row positions of the whole table.
+        """
+        key = (column, descending)
+        with self._lock:
+            order = self._orders.get(key)
+        if order is None:
+            order = self.df[column].sort_values(ascending=not descending, kind="stable", na_position="last").index.to_numpy()
+            with self._lock:
+                self._orders[key] = order
+        return order
+
+    def filter_mask(self, magnitude_range: tuple[float, float] | None = None, place: str | None = None) -> np.ndarray | None:
+        """
+        Boolean row mask for the table filters.
+
+        Args:
+            magnitude_range (tuple[float, float] | None, optional): Inclusive magnitude bounds. Defaults to None (no bound).
+            place (str | None, optional): Case-insensitive substring of `Place`. Defaults to None.
+
+        Returns:
+            np.ndarray | None: The mask, or None if no filter is set.
+        """
+        mask = None
+        if magnitude_range is not None:
+            magnitude = self.df["Magnitude"].to_numpy()
+            # Bounds in the column's dtype, so a float32 3.1 still passes a 3.1 bound
+            low, high = np.asarray(magnitude_range, dtype=magnitude.dtype)
+            mask = (magnitude >= low) & (magnitude <= high)
+        if place:
+            places = self.df["Place"]
+            if isinstance(places.dtype, pd.CategoricalDtype):
+                # Match each distinct place once, then look the rows up by category code
+                matches = places.cat.categories.str.contains(place, case=False, regex=False)
+                codes = places.cat.codes.to_numpy()
+                matched = np.append(np.asarray(matches, dtype=bool), False)[codes] # Code -1 (missing) -> False
+            else:
+                matched = places.str.contains(place, case=False, regex=False, na=False).to_numpy(dtype=bool)
+            mask = matched if mask is None else mask & matched
+        return mask
+
+    def rows(self, sort_by: str | None = None, descending: bool = False, mask: np.ndarray | None = None) -> np.ndarray:
+        """
+        Row positions of a view: the rows passing `mask`, in `sort_by` order.
+
+        Args:
+            sort_by (str | None, optional): Column to sort by. Defaults to None (fetch order).
+            descending (bool, optional): Largest first. Defaults to False.
+            mask (np.ndarray | None, optional): Row mask from `filter_mask`. Defaults to None.
+
+        Returns:
+            np.ndarray: Row positions, in display order.
+        """
+        order = self.sort_order(sort_by, descending) if sort_by else np.arange(len(self.df))
+        return order[mask[order]] if mask is not None else order
+
+    def page(self, rows: np.ndarray, page: int, page_size: int) -> pd.DataFrame:
+        """
+        One page of a view.
+
+        Args:
+            rows (np.ndarray): View from `rows`.
+            page (int): Page number, starting at 1.
+            page_size (int): Rows per page.
+
+        Returns:
+            pd.DataFrame: The page's rows, indexed by their position in the view (starting at 1).
+        """
+        start = (page - 1) * page_size
+        selected = rows[start:start + page_size]
+        return self.df.take(selected).set_axis(pd.RangeIndex(start + 1, start + 1 + len(selected)))
+
+    def iter_csv_chunks(self, rows: np.ndarray, chunk_rows: int = None) -> Iterator[bytes]:
+        """
+        A view as UTF-8 CSV, `chunk_rows` rows at a time (the header comes with the first chunk).
+
+        Args:
+            rows (np.ndarray): View from `rows`.
+            chunk_rows (int, optional): Rows per chunk. Defaults to settings.TABLE_EXPORT_CHUNK_ROWS.
+
+        Yields:
+            bytes: Consecutive pieces of the CSV file.
+        """
+        chunk_rows = chunk_rows or settings.TABLE_EXPORT_CHUNK_ROWS
+        yield self.df.head(0).to_csv(index=False).encode("utf-8")
+        for start in range(0, len(rows), chunk_rows):
+            yield self.df.take(rows[start:start + chunk_rows]).to_csv(index=False, header=False).encode("utf-8")
+
+    def write_parquet(self, rows: np.ndarray, sink, chunk_rows: int = None) -> None:
+        """
+        Writes a view as Parquet, one row group per `chunk_rows` rows.
+
+        Args:
+            rows (np.ndarray): View from `rows`.
+            sink (str | file-like): Output path or binary file object.
+            chunk_rows (int, optional): Rows per row group. Defaults to settings.TABLE_EXPORT_CHUNK_ROWS.
+        """
+        chunk_rows = chunk_rows or settings.TABLE_EXPORT_CHUNK_ROWS
+        schema = pa.Schema.from_pandas(self.df.head(0), preserve_index=False)
+        with pq.ParquetWriter(sink, schema) as writer:
+            for start in range(0, len(rows), chunk_rows):
+                chunk = self.df.take(rows[start:start + chunk_rows])
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+    def export(self, rows: np.ndarray, file_format: str = "csv") -> bytes | None:
+        """
+        Builds a download of a view (CSV or Parquet), chunk by chunk.
+
+        Meant to run only when the download is requested, e.g. as the
+        `data` callable of `st.download_button`.
+
+        Args:
+            rows (np.ndarray): View from `rows`.
+            file_format (str, optional): "csv" or "parquet". Defaults to "csv".
+
+        Returns:
+            bytes | None: The file contents, or None if the export failed.
+        """
+        with span("table.export", format=file_format, rows=len(rows)) as export_span:
+            buffer = io.BytesIO()
+            try:
+                if file_format == "parquet":
+                    self.write_parquet(rows, buffer)
+                else:
+                    for chunk in self.iter_csv_chunks(rows):
+                        buffer.write(chunk)
+            except (pa.ArrowException, ValueError, TypeError) as e:
+                logging.error(f"Failed to export {len(rows)} table rows as {file_format}: {e}")
+                return None
+            export_span.output_bytes = buffer.tell()
+            return buffer.getvalue()
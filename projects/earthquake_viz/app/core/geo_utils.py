@@ -1,7 +1,13 @@
 import geopandas as gpd
 import logging
 import os
-import streamlit as st 
+import numpy as np
+import shapely
+import streamlit as st
+from app.config import settings
+from app.config.boundaries import COUNTRIES_GEOPARQUET_PATH, COUNTRY_INDEX_PATH
+from app.core.boundary_index import CountryIndex, compile_world_index
+from app.core.quake_columns import QuakeColumns
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -22,11 +28,15 @@ def load_world_shapefile(shapefile_path: str):
         st.error(f"Error: World boundaries shapefile not found at {shapefile_path}. Please download and place it correctly.")
         return None, None  # Return None for both gdf and list
     try:
-        logging.info(f"Loading shapefile from: {shapefile_path}")
-        world_gdf = gpd.read_file(shapefile_path)
+        if _is_fresh(COUNTRIES_GEOPARQUET_PATH, shapefile_path):
+            logging.info(f"Loading compiled boundaries from: {COUNTRIES_GEOPARQUET_PATH}")
+            world_gdf = gpd.read_parquet(COUNTRIES_GEOPARQUET_PATH)
+        else:
+            logging.info(f"Loading shapefile from: {shapefile_path}")
+            world_gdf = gpd.read_file(shapefile_path)
 
         # --- Identify country name column ---
-        original_name_column = 'ADMIN'  # Example: Adjust this!
+        original_name_column = 'ADMIN' if 'ADMIN' in world_gdf.columns else 'COUNTRY_NAME'
         if original_name_column not in world_gdf.columns:
             logging.error(f"Expected country name column '{original_name_column}' not found in shapefile.")
             possible_cols = [col for col in world_gdf.columns if 'NAME' in col.upper() or 'ADMIN' in col.upper()]
@@ -56,14 +66,89 @@ def load_world_shapefile(shapefile_path: str):
         st.error(f"Error loading shapefile: {e}")
         return None, None  # Return None for both
 
+def _is_fresh(artifact_path: str, source_path: str) -> bool:
+    """True if a compiled artifact exists and is newer than its source file."""
+    if not os.path.exists(artifact_path):
+        return False
+    return not os.path.exists(source_path) or os.path.getmtime(artifact_path) >= os.path.getmtime(source_path)
+
+# --- Country Index Loading (Cached) ---
+@st.cache_resource(show_spinner=False)
+def load_country_index(shapefile_path: str) -> CountryIndex | None:
+    """
+    Loads the precompiled country index, compiling it from the shapefile first if needed.
+
+    The index (exact name -> bounds, parts, area, geometry WKB) loads in
+    milliseconds and decodes geometries lazily, so startup never parses the
+    shapefile once the artifacts exist.
+
+    Returns:
+        CountryIndex | None: The loaded index, or None on error.
+    """
+    try:
+        if not _is_fresh(COUNTRY_INDEX_PATH, shapefile_path):
+            if not os.path.exists(shapefile_path):
+                logging.error(f"Shapefile not found at path: {shapefile_path}")
+                st.error(f"Error: World boundaries shapefile not found at {shapefile_path}. Please download and place it correctly.")
+                return None
+            logging.info(f"Compiling country index from: {shapefile_path}")
+            compile_world_index(shapefile_path)
+        country_index = CountryIndex.load(COUNTRY_INDEX_PATH)
+        logging.info(f"Loaded country index with {len(country_index.names)} countries.")
+        return country_index
+    except Exception as e:
+        logging.error(f"Failed to load country index: {e}", exc_info=True)
+        st.error(f"Error loading country boundaries: {e}")
+        return None
+
+# --- Country Lookup ---
+def _match_country(country_name: str, world_gdf: gpd.GeoDataFrame):
+    """Returns the geometry of the country named `country_name`, or None."""
+    names = world_gdf['COUNTRY_NAME']
+    # Exact (then case-insensitive exact) match first, so "Niger" never resolves to "Nigeria"
+    country_match = world_gdf[names == country_name]
+    if country_match.empty:
+        country_match = world_gdf[names.str.casefold() == str(country_name).strip().casefold()]
+    if country_match.empty:
+        country_match = world_gdf[names.str.contains(country_name, case=False, na=False, regex=False)]
+
+    if country_match.empty:
+        logging.warning(f"Country '{country_name}' not found in shapefile.")
+        return None
+    elif len(country_match) > 1:
+        logging.warning(f"Multiple matches found for '{country_name}'. Using the first one: {country_match['COUNTRY_NAME'].iloc[0]}")
+    return country_match.iloc[0].geometry
+
+def get_country_geometry(country_name: str, world_gdf: gpd.GeoDataFrame | CountryIndex):
+    """
+    Finds the boundary polygon for a given country name in the loaded GeoDataFrame.
+
+    Args:
+        country_name (str): The name of the country to find.
+        world_gdf (gpd.GeoDataFrame | CountryIndex): The pre-loaded world GeoDataFrame or country index.
+
+    Returns:
+        shapely.geometry.base.BaseGeometry | None: The country (multi)polygon, or None if not found.
+    """
+    if world_gdf is None:
+        logging.error("World GeoDataFrame is not loaded.")
+        return None
+    try:
+        if isinstance(world_gdf, CountryIndex):
+            return world_gdf.geometry(country_name)
+        return _match_country(country_name, world_gdf)
+    except Exception as e:
+        logging.error(f"Error finding geometry for country '{country_name}': {e}", exc_info=True)
+        return None
+
 # --- Get Bounds Function ---
-def get_country_bounds(country_name: str, world_gdf: gpd.GeoDataFrame) -> list | None:
+def get_country_bounds(country_name: str, world_gdf: gpd.GeoDataFrame | CountryIndex) -> list | None:
     """
     Finds the bounding box for a given country name in the loaded GeoDataFrame.
 
     Args:
         country_name (str): The name of the country to find.
-        world_gdf (gpd.GeoDataFrame): The pre-loaded world GeoDataFrame.
+        world_gdf (gpd.GeoDataFrame | CountryIndex): The pre-loaded world GeoDataFrame or country index.
 
     Returns:
         list | None: Bounding box [min_lon, min_lat, max_lon, max_lat] or None if not found.
@@ -73,20 +158,19 @@ def get_country_bounds(country_name: str, world_gdf: gpd.GeoDataFrame) -> list |
         return None
 
     try:
-        # Attempt to find the country - case-insensitive matching is safer
-        country_match = world_gdf[world_gdf['COUNTRY_NAME'].str.contains(country_name, case=False, na=False)]
-
-        if country_match.empty:
-            logging.warning(f"Country '{country_name}' not found in shapefile.")
-            return None
-        elif len(country_match) > 1:
-            logging.warning(f"Multiple matches found for '{country_name}'. Using the first one: {country_match['COUNTRY_NAME'].iloc[0]}")
-            country_geom = country_match.iloc[0].geometry
+        if isinstance(world_gdf, CountryIndex):
+            # Precomputed: no geometry decode needed
+            bounds = world_gdf.bounds(country_name)
+            if bounds is None:
+                logging.warning(f"Country '{country_name}' not found in country index.")
+                return None
         else:
-            country_geom = country_match.iloc[0].geometry
+            country_geom = _match_country(country_name, world_gdf)
+            if country_geom is None:
+                return None
 
-        # Get the bounding box tuple (minx, miny, maxx, maxy)
-        bounds = country_geom.bounds
+            # Get the bounding box tuple (minx, miny, maxx, maxy)
+            bounds = country_geom.bounds
 
         # Access tuple elements by integer index, not string key
         bounds_list = [bounds[0], bounds[1], bounds[2], bounds[3]]
@@ -95,4 +179,206 @@ def get_country_bounds(country_name: str, world_gdf: gpd.GeoDataFrame) -> list |
 
     except Exception as e:
         logging.error(f"Error finding bounds for country '{country_name}': {e}", exc_info=True)
-        return None
\ No newline at end of file
+        return None
+
+# --- Point-in-Polygon Filtering ---
+KM_PER_DEGREE = 111.32 # Length of one degree of latitude (and of longitude at the equator)
+
+def points_in_geometry_mask(longitude: np.ndarray, latitude: np.ndarray, geometry, buffer_km: float = 0.0) -> np.ndarray:
+    """
+    Vectorized test of which points fall inside a (multi)polygon.
+
+    The polygon parts are prepared and indexed in an STRtree; the tree prunes
+    point/part pairs by bounding box and the survivors are tested exactly
+    with `shapely.intersects_xy`, so boundary points count as inside.
+
+    Args:
+        longitude (np.ndarray): Point longitudes.
+        latitude (np.ndarray): Point latitudes.
+        geometry (BaseGeometry): Country (multi)polygon in lon/lat degrees.
+        buffer_km (float, optional): Grow the polygon by roughly this many km to keep offshore
+                                     events (see `_buffered_part`). Defaults to 0.0.
+
+    Returns:
+        np.ndarray: Boolean mask, True for points inside the (buffered) geometry.
+    """
+    longitude = np.asarray(longitude, dtype=np.float64)
+    latitude = np.asarray(latitude, dtype=np.float64)
+    mask = np.zeros(len(longitude), dtype=bool)
+    if geometry is None or len(longitude) == 0:
+        return mask
+
+    parts = shapely.get_parts(geometry)
+    if buffer_km > 0:
+        parts = np.concatenate([_buffered_part(part, buffer_km) for part in parts])
+    shapely.prepare(parts)
+    tree = shapely.STRtree(parts)
+
+    finite = np.isfinite(longitude) & np.isfinite(latitude)
+    candidates = np.flatnonzero(finite)
+    point_idx, part_idx = tree.query(shapely.points(longitude[candidates], latitude[candidates]))
+    hits = shapely.intersects_xy(parts[part_idx], longitude[candidates][point_idx], latitude[candidates][point_idx])
+    mask[candidates[point_idx[hits]]] = True
+    return mask
+
+def _buffer_degrees(bounds: tuple, buffer_km: float) -> tuple[float, float]:
+    """
+    (longitude, latitude) degrees spanning `buffer_km` around a part with these bounds.
+
+    Longitude degrees shrink with cos(latitude); the part's mid latitude (capped
+    at 80°) stands in for all of it. Shared by the border clip and the query
+    planner, so the boxes fetched always cover the buffered border.
+    """
+    min_lat, max_lat = bounds[1], bounds[3]
+    mid_lat = np.radians(min((abs(min_lat) + abs(max_lat)) / 2, 80.0))
+    return buffer_km / (KM_PER_DEGREE * np.cos(mid_lat)), buffer_km / KM_PER_DEGREE
+
+def _buffered_part(part, buffer_km: float) -> np.ndarray:
+    """
+    Grows one polygon part by `buffer_km`, returning it plus any copy needed across ±180°.
+
+    The part is buffered with longitudes scaled by cos(mid latitude), so the
+    allowance is about `buffer_km` east-west as well as north-south. Whatever
+    grows past ±180° is also added shifted by 360°, where the events are.
+    """
+    pad_lon, pad_lat = _buffer_degrees(part.bounds, buffer_km)
+    scale = np.array([pad_lat / pad_lon, 1.0])
+    buffered = shapely.transform(shapely.transform(part, lambda xy: xy * scale).buffer(pad_lat), lambda xy: xy / scale)
+    copies = [buffered]
+    min_lon, _, max_lon, _ = buffered.bounds
+    if min_lon < -180.0:
+        copies.append(shapely.transform(buffered, lambda xy: xy + [360.0, 0.0]))
+    if max_lon > 180.0:
+        copies.append(shapely.transform(buffered, lambda xy: xy - [360.0, 0.0]))
+    return np.array(copies, dtype=object)
+
+def filter_events_to_geometry(quakes: QuakeColumns, geometry, buffer_km: float = 0.0) -> QuakeColumns:
+    """
+    Keeps only the events that lie inside a country polygon (plus optional buffer).
+
+    Args:
+        quakes (QuakeColumns): Events fetched for the country's bounding box.
+        geometry (BaseGeometry): Country (multi)polygon.
+        buffer_km (float, optional): Offshore allowance in km. Defaults to 0.0.
+
+    Returns:
+        QuakeColumns: The in-country events, with `bbox_count` recorded in the metadata.
+    """
+    mask = points_in_geometry_mask(quakes.longitude, quakes.latitude, geometry, buffer_km)
+    filtered = quakes.take(mask)
+    filtered.metadata["bbox_count"] = len(quakes)
+    filtered.metadata["count"] = len(filtered)
+    logging.info(f"Border filter kept {len(filtered)} of {len(quakes)} events (buffer {buffer_km} km).")
+    return filtered
+
+# --- Query Planner ---
+MIN_BOX_PAD_DEG = 0.01 # Keeps single-point/sliver parts from producing zero-width boxes
+
+def _box_area(box: tuple) -> float:
+    return max(box[2] - box[0], 0.0) * max(box[3] - box[1], 0.0)
+
+def _box_union(a: tuple, b: tuple) -> tuple:
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def _buffered_boxes(bounds: tuple, buffer_km: float) -> list[tuple]:
+    """Pads a part's bounds by `buffer_km`, wrapping any overflow past ±180° into a second box."""
+    min_lon, min_lat, max_lon, max_lat = bounds
+    pad_lon, pad_lat = (pad + MIN_BOX_PAD_DEG for pad in _buffer_degrees(bounds, buffer_km))
+    min_lon, max_lon = min_lon - pad_lon, max_lon + pad_lon
+    min_lat, max_lat = max(min_lat - pad_lat, -90.0), min(max_lat + pad_lat, 90.0)
+
+    if max_lon - min_lon >= 360.0:
+        return [(-180.0, min_lat, 180.0, max_lat)]
+    boxes = [(max(min_lon, -180.0), min_lat, min(max_lon, 180.0), max_lat)]
+    if min_lon < -180.0:
+        boxes.append((min_lon + 360.0, min_lat, 180.0, max_lat))
+    if max_lon > 180.0:
+        boxes.append((-180.0, min_lat, max_lon - 360.0, max_lat))
+    return boxes
+
+def plan_query_boxes(
+    geometries: list,
+    buffer_km: float = 0.0,
+    max_boxes: int = settings.MAX_QUERY_BOXES,
+    merge_slack: float = settings.BOX_MERGE_SLACK,
+    min_waste_deg2: float = settings.BOX_MERGE_MIN_WASTE_DEG2
+    ) -> list[tuple]:
+    """
+    Covers one or more country geometries with a small set of tight bounding boxes.
+
+    Each polygon part gets its own (optionally buffered) box, split at ±180° so
+    no box crosses the antimeridian. Boxes are then merged greedily, cheapest
+    pair first, while the merge adds little empty area or while there are more
+    than `max_boxes`. Several countries can be planned together to share boxes.
+
+    Args:
+        geometries (list): Country (multi)polygons in lon/lat degrees.
+        buffer_km (float, optional): Offshore allowance added around each part. Defaults to 0.0.
+        max_boxes (int, optional): Maximum number of boxes returned. Defaults to settings.MAX_QUERY_BOXES.
+        merge_slack (float, optional): Merge when the union adds at most this fraction of the pair's area.
+        min_waste_deg2 (float, optional): Merge when the union adds at most this many square degrees.
+
+    Returns:
+        list[tuple]: Boxes as (min_lon, min_lat, max_lon, max_lat), largest first.
+    """
+    boxes = []
+    for geometry in geometries:
+        if geometry is None:
+            continue
+        for part in shapely.get_parts(geometry):
+            boxes.extend(_buffered_boxes(part.bounds, buffer_km))
+
+    while len(boxes) > 1:
+        best = None
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                union = _box_union(boxes[i], boxes[j])
+                waste = _box_area(union) - _box_area(boxes[i]) - _box_area(boxes[j])
+                if best is None or waste < best[0]:
+                    best = (waste, i, j, union)
+
+        waste, i, j, union = best
+        allowance = max(merge_slack * (_box_area(boxes[i]) + _box_area(boxes[j])), min_waste_deg2)
+        if waste > allowance and len(boxes) <= max_boxes:
+            break
+        boxes = [box for k, box in enumerate(boxes) if k not in (i, j)] + [union]
+
+    boxes = sorted((tuple(float(v) for v in box) for box in boxes), key=_box_area, reverse=True)
+    logging.info(f"Planned {len(boxes)} query boxes: {[tuple(round(v, 2) for v in box) for box in boxes]}")
+    return boxes
+
+def view_bounds(boxes: list[tuple]) -> list | None:
+    """
+    Smallest bounds covering a set of query boxes, going across ±180° when that is shorter.
+
+    Boxes from `plan_query_boxes` never cross the antimeridian, so a country
+    like Fiji comes back as two boxes at the edges of the map; a plain union of
+    them spans the whole world. Here the longitude range is the complement of
+    the widest gap between boxes, so it may extend past 180° (e.g. 176° to 184°).
+
+    Args:
+        boxes (list[tuple]): Boxes as (min_lon, min_lat, max_lon, max_lat), within ±180°.
+
+    Returns:
+        list | None: [min_lon, min_lat, max_lon, max_lat] with -180 <= min_lon < max_lon <= min_lon + 360,
+                     or None if there are no boxes.
+    """
+    if not boxes:
+        return None
+    spans = sorted((box[0], box[2]) for box in boxes)
+    merged = [list(spans[0])]
+    for west, east in spans[1:]:
+        if west <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], east)
+        else:
+            merged.append([west, east])
+
+    # The gap across ±180° (from the last span back round to the first) keeps the plain union
+    widest, start = merged[0][0] + 360.0 - merged[-1][1], 0
+    for i in range(1, len(merged)):
+        gap = merged[i][0] - merged[i - 1][1]
+        if gap > widest:
+            widest, start = gap, i
+    min_lon = merged[start][0]
+    max_lon = merged[start - 1][1] + (360.0 if start else 0.0)
+    return [float(min_lon), float(min(box[1] for box in boxes)), float(max_lon), float(max(box[3] for box in boxes))]
@@ -0,0 +1,210 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Iterator
+from app.config import settings
+
+# Optional: peak RSS comes from getrusage, which Windows doesn't have
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+HOST = socket.gethostname()
+
+# Span records go out as bare JSON lines on their own logger, so they can be
+# collected and aggregated across replicas without parsing the human log format
+span_logger = logging.getLogger("earthquake_viz.spans")
+if not span_logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    span_logger.addHandler(_handler)
+    span_logger.setLevel(logging.INFO)
+    span_logger.propagate = False
+
+@dataclass
+class Span:
+    """Resources used by one named stage."""
+    name: str
+    parent: str | None = None
+    wall_s: float = 0.0
+    cpu_s: float = 0.0 # CPU time of the calling thread only (work in pools and worker processes is in their own spans)
+    peak_rss_delta_bytes: int | None = None # Rise of the process's peak RSS during the span (None if unsupported)
+    output_bytes: int | None = None
+    attrs: dict = field(default_factory=dict)
+    started_at: float = 0.0 # Epoch seconds
+    pid: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+class SpanRecorder:
+    """Collects the spans finished while it is active (e.g. during one page run)."""
+
+    def __init__(self, parent: "SpanRecorder" = None):
+        self.parent = parent
+        self.run_id = parent.run_id if parent is not None else uuid.uuid4().hex[:12]
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+_recorder = contextvars.ContextVar("span_recorder", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+def start_recording() -> SpanRecorder:
+    """
+    Starts collecting spans in the current thread/context, replacing any previous recorder.
+
+    Returns:
+        SpanRecorder: The new recorder; its `spans` fill up as spans finish.
+    """
+    recorder = SpanRecorder()
+    _recorder.set(recorder)
+    return recorder
+
+def stop_recording() -> None:
+    """Stops collecting spans in the current thread/context (they are still logged)."""
+    _recorder.set(None)
+
+@contextmanager
+def recording() -> Iterator[SpanRecorder]:
+    """
+    Collects the spans finished inside the block.
+
+    Recordings nest: spans of an inner recording are also handed to the
+    enclosing one when the block ends, and share its run id.
+
+    Yields:
+        SpanRecorder: The block's recorder; `parent` is the enclosing recorder, if any.
+    """
+    recorder = SpanRecorder(parent=_recorder.get())
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+        if recorder.parent is not None:
+            for finished in recorder.spans:
+                recorder.parent.add(finished)
+
+def current_recorder() -> SpanRecorder | None:
+    return _recorder.get()
+
+def _peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024 # macOS reports bytes, Linux kilobytes
+
+def _log(span: Span, recorder: SpanRecorder | None) -> None:
+    if settings.SPAN_JSON_LOGS:
+        record = {"type": "span", "host": HOST, "run_id": recorder.run_id if recorder else None, **span.to_dict()}
+        span_logger.info(json.dumps(record, default=str))
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Span]:
+    """
+    Measures a block: wall time, CPU time, peak RSS rise and (if set) output bytes.
+
+    The finished span is added to the active recorder and logged as a JSON
+    line. Set `output_bytes` (or more `attrs`) on the yielded span from inside
+    the block. Exceptions propagate, with their type recorded under `error`.
+
+    Args:
+        name (str): Stage name, e.g. "fetch" or "map.repr_html".
+        **attrs: Extra fields recorded with the span (event counts, chart keys, ...).
+
+    Yields:
+        Span: The span being measured.
+    """
+    current = Span(name, attrs=attrs, started_at=time.time(), pid=os.getpid())
+    if not settings.SPANS_ENABLED:
+        yield current
+        return
+    parent = _current_span.get()
+    current.parent = parent.name if parent is not None else None
+    token = _current_span.set(current)
+    rss_before = _peak_rss_bytes()
+    cpu_started = time.thread_time()
+    wall_started = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        current.wall_s = round(time.perf_counter() - wall_started, 6)
+        current.cpu_s = round(time.thread_time() - cpu_started, 6)
+        rss_after = _peak_rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            current.peak_rss_delta_bytes = rss_after - rss_before
+        _current_span.reset(token)
+        recorder = _recorder.get()
+        if recorder is not None:
+            recorder.add(current)
+        _log(current, recorder)
+
+def file_size(path) -> int | None:
+    """Size of the file at `path` (for `traced(output_bytes=...)` on functions returning a path)."""
+    return os.path.getsize(path) if isinstance(path, str) and os.path.isfile(path) else None
+
+def payload_size(value) -> int | None:
+    """Encoded size of a returned str/bytes payload."""
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return None
+
+def traced(name: str = None, output_bytes: Callable = None):
+    """
+    Decorator running a function inside `span`.
+
+    Args:
+        name (str, optional): Span name. Defaults to "<module>.<function>".
+        output_bytes (Callable, optional): Maps the return value to its size in bytes
+                                           (e.g. `file_size`, `payload_size`). Defaults to None.
+    """
+    def decorate(function):
+        span_name = name or f"{function.__module__.rsplit('.', 1)[-1]}.{function.__name__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name) as current:
+                result = function(*args, **kwargs)
+                if output_bytes is not None and result is not None:
+                    current.output_bytes = output_bytes(result)
+                return result
+        return wrapper
+    return decorate
+
+def ingest(records: list[dict]) -> None:
+    """
+    Adds spans measured in another process (e.g. a chart worker) to the active recorder.
+
+    They were already logged where they ran; root spans are attached to the
+    span currently open here.
+    """
+    recorder = _recorder.get()
+    if recorder is None or not records:
+        return
+    parent = _current_span.get()
+    for record in records:
+        received = Span(**record)
+        if received.parent is None and parent is not None:
+            received.parent = parent.name
+        recorder.add(received)
@@ -0,0 +1,249 @@
+import json
+import logging
+import numpy as np
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from app.config import settings
+from app.core.quake_columns import QuakeColumns
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Magnitude floor stored for windows synced without a minimum magnitude
+NO_MAGNITUDE_FLOOR = -10.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    time INTEGER NOT NULL,
+    updated INTEGER NOT NULL DEFAULT 0,
+    longitude REAL,
+    latitude REAL,
+    depth REAL,
+    mag REAL,
+    place TEXT,
+    url TEXT,
+    feature TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_time ON events (time);
+CREATE TABLE IF NOT EXISTS sync_windows (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    min_lon REAL NOT NULL,
+    min_lat REAL NOT NULL,
+    max_lon REAL NOT NULL,
+    max_lat REAL NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    min_mag REAL NOT NULL,
+    synced_at_ms INTEGER NOT NULL
+);
+"""
+
+_UPSERT = """
+INSERT INTO events (id, time, updated, longitude, latitude, depth, mag, place, url, feature)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    time = excluded.time,
+    updated = excluded.updated,
+    longitude = excluded.longitude,
+    latitude = excluded.latitude,
+    depth = excluded.depth,
+    mag = excluded.mag,
+    place = excluded.place,
+    url = excluded.url,
+    feature = excluded.feature
+WHERE excluded.updated >= events.updated
+"""
+
+def _feature_row(feature: dict) -> tuple | None:
+    """Flattens a GeoJSON feature into an `events` row, or None if it is unusable."""
+    event_id = feature.get('id')
+    properties = feature.get('properties') or {}
+    coords = (feature.get('geometry') or {}).get('coordinates') or []
+    if not event_id or properties.get('time') is None or len(coords) < 2:
+        return None
+    depth = coords[2] if len(coords) > 2 else 0.0
+    return (
+        event_id,
+        int(properties['time']),
+        int(properties.get('updated') or 0),
+        coords[0],
+        coords[1],
+        depth,
+        properties.get('mag'),
+        properties.get('place') or 'N/A',
+        properties.get('url') or '#',
+        json.dumps(feature, separators=(',', ':')),
+    )
+
+class QuakeCatalog:
+    """
+    On-disk SQLite store of USGS events keyed by event ID and indexed by time.
+
+    Alongside the events, the catalog remembers which query windows (bounding
+    box, time range, magnitude floor) have been synced completely and when, so
+    any query contained in a synced window can be answered locally.
+    """
+
+    def __init__(self, path: str = settings.CATALOG_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps the catalog safe to share across threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn: # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def upsert_features(self, features: list[dict]) -> int:
+        """
+        Inserts new events and replaces older revisions of known ones.
+
+        Events flagged with `status: deleted` are removed instead.
+
+        Args:
+            features (list[dict]): GeoJSON features from the USGS API.
+
+        Returns:
+            int: Number of features written or deleted.
+        """
+        rows = []
+        deleted = []
+        for feature in features:
+            if (feature.get('properties') or {}).get('status') == 'deleted':
+                if feature.get('id'):
+                    deleted.append((feature['id'],))
+                continue
+            row = _feature_row(feature)
+            if row is not None:
+                rows.append(row)
+
+        with self._connect() as conn:
+            conn.executemany(_UPSERT, rows)
+            conn.executemany("DELETE FROM events WHERE id = ?", deleted)
+        logging.info(f"Catalog upserted {len(rows)} events and removed {len(deleted)} deleted events.")
+        return len(rows) + len(deleted)
+
+    def find_covering_window(self, bounding_box: tuple, start_ms: int, end_ms: int, min_magnitude: float) -> tuple | None:
+        """
+        Finds a synced window that fully contains the requested query.
+
+        Returns:
+            tuple | None: (id, min_lon, min_lat, max_lon, max_lat, start_ms, end_ms, min_mag, synced_at_ms)
+                          of the most recently synced covering window, or None.
+        """
+        min_lon, min_lat, max_lon, max_lat = bounding_box
+        with self._connect() as conn:
+            return conn.execute(
+                """
+                SELECT id, min_lon, min_lat, max_lon, max_lat, start_ms, end_ms, min_mag, synced_at_ms
+                FROM sync_windows
+                WHERE min_lon <= ? AND min_lat <= ? AND max_lon >= ? AND max_lat >= ?
+                  AND start_ms <= ? AND end_ms >= ? AND min_mag <= ?
+                ORDER BY synced_at_ms DESC
+                LIMIT 1
+                """,
+                (min_lon, min_lat, max_lon, max_lat, start_ms, end_ms, min_magnitude),
+            ).fetchone()
+
+    def record_window(self, bounding_box: tuple, start_ms: int, end_ms: int, min_magnitude: float, synced_at_ms: int) -> None:
+        """Records that every event in the given window has been synced as of `synced_at_ms`."""
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO sync_windows (min_lon, min_lat, max_lon, max_lat, start_ms, end_ms, min_mag, synced_at_ms)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (*bounding_box, start_ms, end_ms, min_magnitude, synced_at_ms),
+            )
+
+    def mark_synced(self, window_id: int, synced_at_ms: int) -> None:
+        """Advances the last-sync timestamp of an existing window."""
+        with self._connect() as conn:
+            conn.execute("UPDATE sync_windows SET synced_at_ms = ? WHERE id = ?", (synced_at_ms, window_id))
+
+    def query(self, bounding_box: tuple, start_ms: int, end_ms: int, min_magnitude: float, limit: int = None) -> dict:
+        """
+        Answers a query from the local store, newest events first.
+
+        Args:
+            bounding_box (tuple): (min_lon, min_lat, max_lon, max_lat).
+            start_ms (int): Lower time boundary in epoch milliseconds (inclusive).
+            end_ms (int): Upper time boundary in epoch milliseconds (inclusive).
+            min_magnitude (float): Magnitude floor.
+            limit (int, optional): Maximum number of events to return. Defaults to None.
+
+        Returns:
+            dict: GeoJSON FeatureCollection with `count` and `available` metadata.
+        """
+        where, params = _query_filter(bounding_box, start_ms, end_ms, min_magnitude)
+        with self._connect() as conn:
+            available = conn.execute(f"SELECT COUNT(*) FROM events {where}", params).fetchone()[0]
+            sql = f"SELECT feature FROM events {where} ORDER BY time DESC"
+            if limit:
+                sql += f" LIMIT {int(limit)}"
+            features = [json.loads(row[0]) for row in conn.execute(sql, params)]
+
+        return {
+            "type": "FeatureCollection",
+            "metadata": {"count": len(features), "available": available, "source": "catalog"},
+            "features": features,
+        }
+
+    def query_columns(self, bounding_box: tuple, start_ms: int, end_ms: int, min_magnitude: float, limit: int = None) -> QuakeColumns:
+        """
+        Same as `query`, but reads the indexed columns straight into `QuakeColumns`
+        without decoding any stored GeoJSON.
+
+        Returns:
+            QuakeColumns: Matching events, newest first, with `count`/`available` metadata.
+        """
+        where, params = _query_filter(bounding_box, start_ms, end_ms, min_magnitude)
+        with self._connect() as conn:
+            available = conn.execute(f"SELECT COUNT(*) FROM events {where}", params).fetchone()[0]
+            sql = f"SELECT id, time, mag, longitude, latitude, depth, place, url, updated FROM events {where} ORDER BY time DESC"
+            if limit:
+                sql += f" LIMIT {int(limit)}"
+            rows = conn.execute(sql, params).fetchall()
+
+        metadata = {"count": len(rows), "available": available, "source": "catalog"}
+        if not rows:
+            return QuakeColumns.empty(metadata)
+        ids, times, mags, lons, lats, depths, places, urls, updates = zip(*rows)
+        return QuakeColumns(
+            ids=np.array(ids, dtype=object),
+            time_ms=np.array(times, dtype=np.int64),
+            mag=np.array(mags, dtype=np.float64), # NULL -> nan
+            longitude=np.array(lons, dtype=np.float64),
+            latitude=np.array(lats, dtype=np.float64),
+            depth=np.array(depths, dtype=np.float64),
+            place=np.array(places, dtype=object),
+            url=np.array(urls, dtype=object),
+            updated_ms=np.array(updates, dtype=np.int64),
+            metadata=metadata,
+        )
+
+def _query_filter(bounding_box: tuple, start_ms: int, end_ms: int, min_magnitude: float) -> tuple[str, tuple]:
+    """Builds the WHERE clause and parameters shared by the catalog queries."""
+    min_lon, min_lat, max_lon, max_lat = bounding_box
+    where = """
+        WHERE time >= ? AND time <= ?
+          AND longitude >= ? AND longitude <= ? AND latitude >= ? AND latitude <= ?
+          AND (mag >= ? OR (mag IS NULL AND ? <= ?))
+    """
+    params = (start_ms, end_ms, min_lon, max_lon, min_lat, max_lat, min_magnitude, min_magnitude, NO_MAGNITUDE_FLOOR)
+    return where, params
+
+def now_ms() -> int:
+    """Current wall-clock time in epoch milliseconds."""
+    return int(time.time() * 1000)
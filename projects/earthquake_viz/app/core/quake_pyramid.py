@@ -0,0 +1,115 @@
+import logging
+from dataclasses import dataclass
+import numpy as np
+from app.config import settings
+from app.core.quake_columns import QuakeColumns
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Web Mercator latitude limit; tile rows are undefined beyond it
+MAX_MERCATOR_LAT = 85.05112878
+
+def tile_indices(longitude: np.ndarray, latitude: np.ndarray, zoom: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Web Mercator (quadkey) tile column/row of each point at `zoom`.
+
+    Args:
+        longitude (np.ndarray): Longitudes in degrees (any multiple of 360° away is the same column).
+        latitude (np.ndarray): Latitudes in degrees.
+        zoom (int): Tile zoom level (2**zoom tiles per axis).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: int64 tile x and y indices.
+    """
+    n = 1 << zoom
+    lat = np.radians(np.clip(latitude, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = np.floor((np.asarray(longitude) + 180.0) / 360.0 * n)
+    y = np.floor((1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0 * n)
+    # Columns wrap, so longitudes past 180° (maps across the antimeridian) land in the right tile
+    return np.mod(x, n).astype(np.int64), np.clip(y, 0, n - 1).astype(np.int64)
+
+@dataclass(frozen=True)
+class PyramidLevel:
+    """Aggregated grid cells at one zoom level (one entry per non-empty tile)."""
+    zoom: int
+    count: np.ndarray       # int64 events per cell
+    max_mag: np.ndarray     # float64, NaN if no event in the cell has a magnitude
+    mean_depth: np.ndarray  # float64 km
+    latitude: np.ndarray    # float64 event centroid
+    longitude: np.ndarray   # float64 event centroid
+
+    def __len__(self) -> int:
+        return len(self.count)
+
+@dataclass(frozen=True)
+class QuakePyramid:
+    """
+    Multi-zoom aggregation of an event set on the Web Mercator tile grid.
+
+    Built once per dataset: points are binned at the finest zoom and each
+    coarser level is derived by shifting tile indices, so a map can draw a
+    bounded number of cells per zoom instead of every event.
+    """
+    levels: tuple[PyramidLevel, ...]
+    total: int
+
+    @property
+    def max_zoom(self) -> int:
+        return self.levels[-1].zoom if self.levels else -1
+
+    def level_for(self, zoom: int) -> PyramidLevel | None:
+        """The finest level at or below `zoom`."""
+        candidates = [level for level in self.levels if level.zoom <= zoom]
+        return candidates[-1] if candidates else None
+
+    @classmethod
+    def build(
+        cls,
+        quakes: QuakeColumns,
+        min_zoom: int = settings.MAP_AGGREGATE_MIN_ZOOM,
+        max_zoom: int = settings.MAP_AGGREGATE_MAX_ZOOM,
+        cell_budget: int = settings.MAP_CELL_BUDGET,
+        ) -> "QuakePyramid":
+        """
+        Aggregates events into per-zoom grid cells with count, max magnitude and mean depth.
+
+        Levels are built coarse to fine and refinement stops at the first level
+        with more than `cell_budget` cells, so the pyramid size is bounded by the
+        grid rather than by the number of events.
+
+        Args:
+            quakes (QuakeColumns): Events to aggregate.
+            min_zoom (int, optional): Coarsest zoom level.
+            max_zoom (int, optional): Finest zoom level.
+            cell_budget (int, optional): Maximum cells in a level.
+
+        Returns:
+            QuakePyramid: The aggregation pyramid.
+        """
+        x, y = tile_indices(quakes.longitude, quakes.latitude, max_zoom)
+        mag = np.where(np.isnan(quakes.mag), -np.inf, quakes.mag)
+        depth = np.nan_to_num(quakes.depth, nan=0.0)
+
+        levels = []
+        for zoom in range(min_zoom, max_zoom + 1):
+            shift = max_zoom - zoom
+            keys = ((x >> shift) << zoom) | (y >> shift)
+            _, inverse, count = np.unique(keys, return_inverse=True, return_counts=True)
+            if len(count) > cell_budget and levels:
+                logging.info(f"Aggregation stops at zoom {zoom - 1}: zoom {zoom} has {len(count)} cells.")
+                break
+            max_mag = np.full(len(count), -np.inf)
+            np.maximum.at(max_mag, inverse, mag)
+            max_mag[np.isinf(max_mag)] = np.nan
+            levels.append(PyramidLevel(
+                zoom=zoom,
+                count=count,
+                max_mag=max_mag,
+                mean_depth=np.bincount(inverse, weights=depth) / count,
+                latitude=np.bincount(inverse, weights=quakes.latitude) / count,
+                longitude=np.bincount(inverse, weights=quakes.longitude) / count,
+            ))
+        pyramid = cls(levels=tuple(levels), total=len(quakes))
+        logging.info(f"Built aggregation pyramid for {pyramid.total} events: "
+                     + ", ".join(f"z{level.zoom}={len(level)}" for level in pyramid.levels))
+        return pyramid
@@ -0,0 +1,293 @@
+import hashlib
+import json
+import logging
+import threading
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+import numpy as np
+import pyarrow as pa
+from app.config import settings
+from app.core.quake_columns import MISSING_TIME, QuakeColumns
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def query_key(**params) -> str:
+    """
+    Cache key of a USGS query: a hash of its parameters.
+
+    Args:
+        **params: Query parameters (dates, magnitude, limit, bounding boxes, ...).
+                  Values must be JSON-serialisable (tuples are treated as lists).
+
+    Returns:
+        str: Hex digest.
+    """
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+# --- Subsumption ---
+# Parameters a cached result can be narrowed on; every other parameter (the
+# bounding boxes in particular) has to match exactly
+NARROWING_PARAMS = ("starttime", "endtime", "min_magnitude", "limit")
+
+@dataclass
+class _Entry:
+    buffer: pa.Buffer
+    expires: float # time.monotonic() deadline
+    params: dict | None # Query that produced the result (None: exact-key hits only)
+    rows: int
+    oldest_ms: int | None # Time of the oldest event, None if the result is empty
+    available: int | None # Events matching the query, as reported by the fetch
+    complete: bool = True # False if USGS capped part of the fetch (`truncated_windows`): exact-key hits only
+
+def _time_ms(value) -> float | None:
+    """USGS time parameter (YYYY-MM-DD or ISO datetime, UTC) as epoch milliseconds."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(str(value))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp() * 1000
+
+def _fixed_params(params: dict) -> str:
+    return json.dumps({k: v for k, v in params.items() if k not in NARROWING_PARAMS}, sort_keys=True, default=str)
+
+def covering_filter(entry: _Entry, params: dict) -> dict | None:
+    """
+    Decides whether a cached result contains the answer to another query.
+
+    A complete result (fewer events than its limit) answers any query over the
+    same area with a narrower time window, a higher magnitude floor or a lower
+    limit. A truncated result holds only the newest `limit` events of its
+    window, so it answers the same query with a lower limit, or a later start
+    after its oldest event (everything newer than that is present). A result
+    whose fetch hit the USGS cap in some time window (`truncated_windows`) may
+    be missing events anywhere in its range, so it answers nothing else.
+
+    Args:
+        entry (_Entry): Cached result and the query that produced it.
+        params (dict): The new query's parameters.
+
+    Returns:
+        dict | None: Filter to apply (start_ms, end_ms, min_magnitude, limit, available),
+                     or None if the cached result can't answer the query.
+    """
+    cached = entry.params
+    if cached is None or not entry.complete or _fixed_params(cached) != _fixed_params(params):
+        return None
+    start, end = _time_ms(params.get("starttime")), _time_ms(params.get("endtime"))
+    cached_start, cached_end = _time_ms(cached.get("starttime")), _time_ms(cached.get("endtime"))
+    if None in (start, end, cached_start, cached_end): # Open windows depend on when they were asked
+        return None
+    floor = params.get("min_magnitude")
+    cached_floor = cached.get("min_magnitude")
+    floor_value = -math.inf if floor is None else floor
+    cached_floor_value = -math.inf if cached_floor is None else cached_floor
+    if start < cached_start or end > cached_end or floor_value < cached_floor_value:
+        return None
+
+    limit, cached_limit = params.get("limit"), cached.get("limit")
+    available = None # Count the filtered events
+    if cached_limit and entry.rows >= cached_limit:
+        # Truncated: only prefixes of the newest-first order can be answered
+        if end != cached_end or floor_value != cached_floor_value or not limit or limit > cached_limit:
+            return None
+        if start == cached_start:
+            available = entry.available
+        elif entry.oldest_ms is None or start <= entry.oldest_ms:
+            return None
+    return {"start_ms": start, "end_ms": end, "min_magnitude": floor, "limit": limit, "available": available}
+
+def apply_filter(quakes: QuakeColumns, spec: dict) -> QuakeColumns:
+    """Narrows an event set with a `covering_filter` result, keeping the newest `limit` events."""
+    times = quakes.time_ms
+    mask = (times >= spec["start_ms"]) & (times <= spec["end_ms"]) & (times != MISSING_TIME)
+    if spec["min_magnitude"] is not None:
+        mask &= quakes.mag >= spec["min_magnitude"]
+    rows = np.flatnonzero(mask)
+    matched = len(rows)
+    if spec["limit"] and matched > spec["limit"]:
+        rows = np.sort(rows[np.argsort(-times[rows], kind="stable")[:spec["limit"]]])
+    narrowed = quakes.take(rows)
+    available = spec["available"] if spec["available"] is not None else matched
+    narrowed.metadata.update(count=len(narrowed), available=max(available, len(narrowed)))
+    narrowed.metadata.pop("bbox_count", None) # Counted for the cached query, not this one
+    if spec["available"] is None:
+        narrowed.metadata.pop("available_estimated", None) # Counted here, exactly
+    return narrowed
+
+class QueryResultCache:
+    """
+    Size-bounded LRU of fetched event sets, held as Arrow IPC buffers.
+
+    Results are stored once in their compact columnar form and every hit maps
+    the buffer back with `QuakeColumns.from_ipc` instead of unpickling a copy,
+    so a hit costs the same for any result size and all sessions share one
+    buffer per query. A query whose answer is contained in a cached result
+    (see `covering_filter`) is answered by filtering that result in memory.
+    Entries expire after `ttl_seconds`; least recently used ones are evicted
+    once the buffers exceed `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = settings.RESULT_CACHE_MAX_BYTES,
+                 ttl_seconds: float = settings.RESULT_CACHE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict() # key -> _Entry
+        self._size = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.narrowed = 0
+
+    def get(self, key: str) -> QuakeColumns | None:
+        """Returns the cached event set for `key`, or None if absent or expired."""
+        quakes = self._read(key)
+        self._count(quakes is not None)
+        return quakes
+
+    def _read(self, key: str) -> QuakeColumns | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                self._pop(key)
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        return QuakeColumns.from_ipc(entry.buffer)
+
+    def narrow(self, params: dict) -> QuakeColumns | None:
+        """
+        Answers a query by filtering the smallest cached result that contains it.
+
+        Args:
+            params (dict): Query parameters, as passed to `query_key`.
+
+        Returns:
+            QuakeColumns | None: The narrowed event set, or None if no cached result covers the query.
+        """
+        best = None
+        with self._lock:
+            now = time.monotonic()
+            for key, entry in self._entries.items():
+                if entry.expires <= now:
+                    continue
+                spec = covering_filter(entry, params)
+                if spec is not None and (best is None or entry.rows < best[1].rows):
+                    best = (key, entry, spec)
+            if best is None:
+                return None
+            self._entries.move_to_end(best[0])
+            self.narrowed += 1
+        logging.info(f"Result cache: answering from cached superset {best[0]} ({best[1].rows} events).")
+        return apply_filter(QuakeColumns.from_ipc(best[1].buffer), best[2])
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, key: str, quakes: QuakeColumns, params: dict = None) -> None:
+        """
+        Stores an event set under `key` (skipped if it alone exceeds the cap).
+
+        Args:
+            key (str): Key from `query_key`.
+            quakes (QuakeColumns): The query's result.
+            params (dict, optional): The query's parameters, so narrower queries can be
+                                     answered from this result. Defaults to None.
+        """
+        buffer = quakes.to_ipc()
+        if buffer.size > self.max_bytes:
+            logging.info(f"Result for {key} ({buffer.size} bytes) exceeds the cache cap; not cached.")
+            return
+        times = quakes.time_ms[quakes.time_ms != MISSING_TIME]
+        entry = _Entry(buffer, time.monotonic() + self.ttl_seconds, dict(params) if params is not None else None, len(quakes),
+                       int(times.min()) if len(times) else None, quakes.metadata.get("available"),
+                       not quakes.metadata.get("truncated_windows"))
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = entry
+            self._size += buffer.size
+            while self._size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], QuakeColumns | None], params: dict = None) -> QuakeColumns | None:
+        """
+        Returns the cached event set for `key`, calling `fetch` on a miss.
+
+        With `params`, a miss is first answered by narrowing a cached result
+        that contains the query, and the fetched result is kept for narrowing
+        later queries. Concurrent misses for the same key wait for a single
+        fetch. Failed fetches (None) are not cached.
+
+        Args:
+            key (str): Key from `query_key`.
+            fetch (Callable[[], QuakeColumns | None]): Runs the query.
+            params (dict, optional): The query's parameters. Defaults to None (exact-key lookups only).
+
+        Returns:
+            QuakeColumns | None: The event set, or None if the fetch failed.
+        """
+        quakes = self._read(key)
+        if quakes is None and params is not None:
+            quakes = self.narrow(params)
+            if quakes is not None:
+                return quakes
+        if quakes is None:
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            try:
+                with key_lock:
+                    quakes = self._read(key) # Another session may have just fetched it
+                    if quakes is None:
+                        self._count(False)
+                        logging.info(f"Result cache miss for {key}: fetching.")
+                        fetched = fetch()
+                        if fetched is None:
+                            return None
+                        self.put(key, fetched, params)
+                        cached = self._read(key) # Callers share the cached buffer
+                        return cached if cached is not None else fetched
+            finally:
+                with self._lock:
+                    if self._key_locks.get(key) is key_lock and not key_lock.locked():
+                        del self._key_locks[key]
+        self._count(True)
+        return quakes
+
+    def _pop(self, key: str) -> None:
+        # Caller holds self._lock
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.buffer.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters (`narrowed`: misses answered from a cached superset) and memory usage."""
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits,
+                    "narrowed": self.narrowed, "misses": self.misses}
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_result_cache() -> QueryResultCache:
+    """Returns the process-wide query result cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = QueryResultCache()
+        return _default_cache
@@ -1,45 +1,38 @@
-from datetime import timedelta 
+from datetime import timedelta
+import math
+import numpy as np
 import requests
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from app.config import settings 
+from typing import Callable
+from app.config import settings
+from app.core.quake_columns import QuakeColumns
+from app.core.usgs_client import get_default_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def fetch_earthquake_data(
+USGS_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+def _build_query_params(
     starttime: str = None,
     endtime: str = None,
     min_magnitude: float = None,
-    limit: int = settings.DEFAULT_LIMIT,
     bounding_box: list = None,
     latitude: float = None,
     longitude: float = None,
     max_radius_km: float = None,
-    **other_params # Catch any other valid API parameters
-    ) -> dict | None:
+    **other_params
+    ) -> dict:
     """
-    Fetches earthquake data from the USGS FDSN Event Web Service.
-
-    Args:
-        starttime (str, optional): Lower time boundary (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS). Defaults to None.
-        endtime (str, optional): Upper time boundary (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS). Defaults to None.
-        min_magnitude (float, optional): Minimum magnitude. Defaults to None.
-        limit (int, optional): Maximum number of events to return. Defaults to settings.DEFAULT_LIMIT.
-        bounding_box (list, optional): [min_lon, min_lat, max_lon, max_lat]. Defaults to None.
-        latitude (float, optional): Latitude for circular search. Defaults to None.
-        longitude (float, optional): Longitude for circular search. Defaults to None.
-        max_radius_km (float, optional): Max radius in km for circular search. Defaults to None.
-        **other_params: Additional valid API parameters (e.g., maxdepth, orderby).
+    Builds the FDSN query parameters shared by the `query` and `count` endpoints.
 
     Returns:
-        dict | None: Parsed GeoJSON dictionary response from the API, or None if an error occurs.
+        dict: Query parameters (without `format` or `limit`).
     """
-    api_url = f"{settings.USGS_API_BASE_URL}query"
-    query_params = {
-        "format": "geojson",
-        "limit": limit,
-    }
+    query_params = {}
 
     # Add optional parameters if they are provided
     if starttime:
@@ -67,19 +60,72 @@ def fetch_earthquake_data(
 
     # Add any other parameters passed via kwargs
     query_params.update(other_params)
+    return query_params
+
+def fetch_earthquake_data(
+    starttime: str = None,
+    endtime: str = None,
+    min_magnitude: float = None,
+    limit: int = settings.DEFAULT_LIMIT,
+    bounding_box: list = None,
+    latitude: float = None,
+    longitude: float = None,
+    max_radius_km: float = None,
+    columnar: bool = False,
+    **other_params # Catch any other valid API parameters
+    ) -> dict | QuakeColumns | None:
+    """
+    Fetches earthquake data from the USGS FDSN Event Web Service.
+
+    Args:
+        starttime (str, optional): Lower time boundary (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS). Defaults to None.
+        endtime (str, optional): Upper time boundary (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS). Defaults to None.
+        min_magnitude (float, optional): Minimum magnitude. Defaults to None.
+        limit (int, optional): Maximum number of events to return. Defaults to settings.DEFAULT_LIMIT.
+        bounding_box (list, optional): [min_lon, min_lat, max_lon, max_lat]. Defaults to None.
+        latitude (float, optional): Latitude for circular search. Defaults to None.
+        longitude (float, optional): Longitude for circular search. Defaults to None.
+        max_radius_km (float, optional): Max radius in km for circular search. Defaults to None.
+        columnar (bool, optional): Parse the response straight into `QuakeColumns` instead of
+                                   nested dicts. Defaults to False.
+        **other_params: Additional valid API parameters (e.g., maxdepth, orderby).
+
+    Returns:
+        dict | QuakeColumns | None: Parsed GeoJSON dictionary (or columns) from the API, or None if an error occurs.
+    """
+    client = get_default_client()
+    api_url = f"{client.base_url}query"
+    query_params = {
+        "format": "geojson",
+        "limit": limit,
+    }
+    query_params.update(_build_query_params(
+        starttime=starttime, endtime=endtime, min_magnitude=min_magnitude,
+        bounding_box=bounding_box, latitude=latitude, longitude=longitude,
+        max_radius_km=max_radius_km, **other_params
+    ))
 
     logging.info(f"Querying USGS API: {api_url} with params: {query_params}")
 
     try:
-        response = requests.get(api_url, params=query_params, timeout=30) # 30-second timeout
-        response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
+        response = client.get("query", query_params) # Pooled session, retries 429/5xx
 
         logging.info(f"API request successful (Status Code: {response.status_code})")
+        if columnar:
+            columns = QuakeColumns.from_json_bytes(response.content) # Single pass into typed arrays
+            logging.info(f"Fetched {len(columns)} earthquake events.")
+            if limit and len(columns) >= limit:
+                logging.warning(f"Result reached the limit of {limit} events and may be truncated.")
+            columns.metadata.update({"count": len(columns), "available": len(columns)})
+            return columns
+
         data = response.json() # Parse the JSON response directly
 
         # Optional: Log basic info about the result
         if 'features' in data:
             logging.info(f"Fetched {len(data['features'])} earthquake events.")
+            if limit and len(data['features']) >= limit:
+                logging.warning(f"Result reached the limit of {limit} events and may be truncated.")
         else:
              logging.warning("API response structure might be unexpected (no 'features' key).")
 
@@ -91,3 +137,526 @@ def fetch_earthquake_data(
     except Exception as e:
         logging.error(f"An unexpected error occurred during API fetch: {e}")
         return None
+
+def fetch_earthquake_count(**params) -> int | None:
+    """
+    Asks the USGS `count` endpoint how many events match a query.
+
+    Args:
+        **params: Same filters accepted by `fetch_earthquake_data` (`limit` is ignored).
+
+    Returns:
+        int | None: Number of matching events, or None if the request fails.
+    """
+    params.pop("limit", None)
+    query_params = {"format": "geojson"}
+    query_params.update(_build_query_params(**params))
+
+    try:
+        response = get_default_client().get("count", query_params)
+        count = int(response.json()["count"])
+        logging.info(f"USGS count for {query_params.get('starttime')} - {query_params.get('endtime')}: {count}")
+        return count
+    except requests.exceptions.RequestException as e:
+        logging.error(f"API count request failed: {e}")
+        return None
+    except Exception as e:
+        logging.error(f"An unexpected error occurred during API count: {e}")
+        return None
+
+def _parse_time(value: str | None, default: datetime) -> datetime:
+    """Parses a USGS time string (date or ISO datetime) into a naive UTC datetime."""
+    if not value:
+        return default
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return parsed.replace(tzinfo=None)
+
+def _split_window(start: datetime, end: datetime, parts: int) -> list[tuple[datetime, datetime]]:
+    """Splits [start, end] into `parts` contiguous sub-windows of equal length."""
+    span = (end - start) / parts
+    bounds = [start + span * k for k in range(parts)] + [end]
+    return [(bounds[k], bounds[k + 1]) for k in range(parts)]
+
+def plan_time_windows(starttime: str = None, endtime: str = None, executor: ThreadPoolExecutor = None, total_count: int = None, **params) -> list[tuple[str, str, int]] | None:
+    """
+    Splits a query's time range into sub-windows that each stay under the USGS cap.
+
+    Each candidate window is sized with the `count` endpoint. Windows that are
+    still too large are split proportionally to their count and re-checked,
+    until every window fits or reaches `settings.MIN_WINDOW_SECONDS`.
+
+    Args:
+        starttime (str, optional): Lower time boundary. Defaults to 30 days ago (the USGS default).
+        endtime (str, optional): Upper time boundary. Defaults to now.
+        executor (ThreadPoolExecutor, optional): Pool used to run count requests concurrently.
+        total_count (int, optional): Already-known count for the full range, saving one request.
+        **params: Remaining filters (magnitude, bounding box, ...).
+
+    Returns:
+        list[tuple[str, str, int]] | None: (starttime, endtime, count) per non-empty window,
+                                           or None if a count request fails.
+    """
+    now = datetime.utcnow()
+    end = _parse_time(endtime, now)
+    start = _parse_time(starttime, end - timedelta(days=30))
+    window_cap = max(1, int(settings.USGS_MAX_EVENTS_PER_QUERY * settings.WINDOW_FILL_RATIO))
+    min_span = timedelta(seconds=settings.MIN_WINDOW_SECONDS)
+
+    def count_window(window):
+        return fetch_earthquake_count(
+            starttime=window[0].strftime(USGS_TIME_FORMAT),
+            endtime=window[1].strftime(USGS_TIME_FORMAT),
+            **params
+        )
+
+    pending = [(start, end)]
+    planned = []
+    while pending:
+        if total_count is not None:
+            counts, total_count = [total_count], None
+        else:
+            counts = list(executor.map(count_window, pending)) if executor else [count_window(w) for w in pending]
+        if any(count is None for count in counts):
+            return None
+
+        next_pending = []
+        for window, count in zip(pending, counts):
+            if count == 0:
+                continue
+            if count <= window_cap or (window[1] - window[0]) <= min_span:
+                if count > settings.USGS_MAX_EVENTS_PER_QUERY:
+                    logging.warning(f"Window {window[0]} - {window[1]} still holds {count} events; results will be capped.")
+                planned.append((window[0].strftime(USGS_TIME_FORMAT), window[1].strftime(USGS_TIME_FORMAT), count))
+            else:
+                parts = max(2, math.ceil(count / window_cap))
+                next_pending.extend(_split_window(window[0], window[1], parts))
+        pending = next_pending
+
+    planned.sort()
+    logging.info(f"Planned {len(planned)} time windows for {start} - {end}.")
+    return planned
+
+def merge_feature_collections(collections: list[dict], limit: int = None) -> dict:
+    """
+    Merges several GeoJSON FeatureCollections, deduplicating on the USGS event ID.
+
+    Features are returned newest first (the USGS default order). When `limit`
+    is given, only the newest `limit` events are kept and the metadata records
+    how many were available, so callers can surface the truncation.
+
+    Args:
+        collections (list[dict]): FeatureCollections to merge.
+        limit (int, optional): Maximum number of events to keep. Defaults to None (keep all).
+
+    Returns:
+        dict: A single merged FeatureCollection.
+    """
+    unique = {}
+    for collection in collections:
+        for feature in collection.get('features', []):
+            event_id = feature.get('id')
+            if event_id is None:
+                continue
+            # Keep the most recently updated revision of each event
+            existing = unique.get(event_id)
+            if existing is None or (feature.get('properties', {}).get('updated') or 0) > (existing.get('properties', {}).get('updated') or 0):
+                unique[event_id] = feature
+
+    features = sorted(unique.values(), key=lambda f: f.get('properties', {}).get('time') or 0, reverse=True)
+    available = len(features)
+    if limit and available > limit:
+        logging.warning(f"Merged result holds {available} events; keeping the newest {limit}.")
+        features = features[:limit]
+
+    return {
+        "type": "FeatureCollection",
+        "metadata": {"count": len(features), "available": available},
+        "features": features,
+    }
+
+def _set_available(data: dict | QuakeColumns, available: int) -> None:
+    """Records how many events matched the query in a result's metadata."""
+    metadata = data.metadata if isinstance(data, QuakeColumns) else data.setdefault("metadata", {})
+    metadata["available"] = available
+
+def merge_columns(parts: list[QuakeColumns], limit: int = None) -> QuakeColumns:
+    """
+    Columnar counterpart of `merge_feature_collections`: dedupes on the USGS ID,
+    orders newest first and keeps at most `limit` events.
+    """
+    merged = QuakeColumns.concat(parts)
+    available = len(merged)
+    if limit and available > limit:
+        logging.warning(f"Merged result holds {available} events; keeping the newest {limit}.")
+        merged = merged.take(slice(0, limit))
+    merged.metadata = {"count": len(merged), "available": available}
+    return merged
+
+def fetch_earthquake_data_windowed(
+    starttime: str = None,
+    endtime: str = None,
+    limit: int = None,
+    max_workers: int = settings.FETCH_MAX_WORKERS,
+    columnar: bool = False,
+    total_count: int = None,
+    **params
+    ) -> dict | QuakeColumns | None:
+    """
+    Fetches a complete result set by partitioning the time range into sub-windows.
+
+    The USGS `count` endpoint is used to size sub-windows so that none exceeds
+    the per-query cap; the windows are then fetched concurrently over a bounded
+    thread pool and merged, deduplicated on the USGS event ID.
+
+    Args:
+        starttime (str, optional): Lower time boundary. Defaults to None.
+        endtime (str, optional): Upper time boundary. Defaults to None.
+        limit (int, optional): Maximum number of events in the merged result (newest kept).
+                               Defaults to None (return every matching event).
+        max_workers (int, optional): Size of the worker pool. Defaults to settings.FETCH_MAX_WORKERS.
+        columnar (bool, optional): Return `QuakeColumns` instead of a FeatureCollection. Defaults to False.
+        total_count (int, optional): Already-known count for the full range, saving one request.
+        **params: Remaining filters accepted by `fetch_earthquake_data`.
+
+    Returns:
+        dict | QuakeColumns | None: Merged result, or None if any window fails. The metadata's
+                                    `truncated_windows` counts windows that still hit the per-query
+                                    cap at the minimum window length (their events are incomplete).
+    """
+    total = total_count if total_count is not None else fetch_earthquake_count(starttime=starttime, endtime=endtime, **params)
+    if total is None:
+        logging.warning("Could not size time windows via the count endpoint; falling back to a single request.")
+        return fetch_earthquake_data(starttime=starttime, endtime=endtime,
+                                     limit=limit or settings.USGS_MAX_EVENTS_PER_QUERY, columnar=columnar, **params)
+
+    # Only the newest `limit` events are wanted: one ordered request returns exactly those
+    if limit and total > limit and limit <= settings.USGS_MAX_EVENTS_PER_QUERY:
+        data = fetch_earthquake_data(starttime=starttime, endtime=endtime, limit=limit, columnar=columnar, **params)
+        if data is not None:
+            _set_available(data, total)
+        return data
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        windows = plan_time_windows(starttime=starttime, endtime=endtime, executor=executor, total_count=total, **params)
+        if windows is None:
+            logging.error("Failed to size time windows via the count endpoint.")
+            return None
+        if not windows:
+            return merge_columns([]) if columnar else merge_feature_collections([])
+
+        def fetch_window(window):
+            window_start, window_end, _ = window
+            return fetch_earthquake_data(starttime=window_start, endtime=window_end,
+                                         limit=settings.USGS_MAX_EVENTS_PER_QUERY, columnar=columnar, **params)
+
+        results = list(executor.map(fetch_window, windows))
+
+    if any(result is None for result in results):
+        logging.error("One or more time windows failed to fetch; discarding the partial result.")
+        return None
+
+    merged = merge_columns(results, limit=limit) if columnar else merge_feature_collections(results, limit=limit)
+    metadata = merged.metadata if columnar else merged["metadata"]
+    metadata["windows"] = len(windows)
+    metadata["truncated_windows"] = sum(count > settings.USGS_MAX_EVENTS_PER_QUERY for _, _, count in windows)
+    logging.info(f"Fetched {metadata['available']} unique events across {len(windows)} windows.")
+    return merged
+
+def clip_and_limit(quakes: QuakeColumns, clip: Callable[[QuakeColumns], QuakeColumns] | None, limit: int = None) -> QuakeColumns:
+    """
+    Applies a spatial filter to newest-first events, then keeps the newest `limit`.
+
+    Args:
+        quakes (QuakeColumns): Every event matching the query, newest first.
+        clip (Callable | None): Returns the events to keep (e.g. those inside a country border).
+        limit (int, optional): Maximum number of events kept. Defaults to None.
+
+    Returns:
+        QuakeColumns: The kept events; `available` counts every event passing `clip`
+                      and `bbox_count` every event it was applied to.
+    """
+    examined = len(quakes)
+    kept = clip(quakes) if clip is not None else quakes
+    available = len(kept)
+    if limit and available > limit:
+        kept = kept.take(slice(0, limit))
+    # A filter that drops events before its own border test (see `outside_boxes`) records its own bbox_count
+    kept.metadata.update(count=len(kept), available=available, bbox_count=kept.metadata.get("bbox_count", examined))
+    return kept
+
+def outside_boxes(boxes: list, clip: Callable[[QuakeColumns], QuakeColumns] | None = None) -> Callable[[QuakeColumns], QuakeColumns]:
+    """
+    Spatial filter dropping events inside any of `boxes`, then applying `clip`.
+
+    Used to split overlapping query boxes into disjoint parts: each box keeps
+    only the events that no earlier box covers, so no event is counted twice.
+
+    Args:
+        boxes (list): Boxes as [min_lon, min_lat, max_lon, max_lat] (edges count as inside, like the catalog query).
+        clip (Callable | None, optional): Filter applied to the remaining events. Defaults to None.
+
+    Returns:
+        Callable[[QuakeColumns], QuakeColumns]: The combined filter; its results record `bbox_count`
+                                                (events left after dropping the covered ones).
+    """
+    def keep(quakes: QuakeColumns) -> QuakeColumns:
+        mask = np.ones(len(quakes), dtype=bool)
+        for min_lon, min_lat, max_lon, max_lat in boxes:
+            mask &= ~((quakes.longitude >= min_lon) & (quakes.longitude <= max_lon)
+                      & (quakes.latitude >= min_lat) & (quakes.latitude <= max_lat))
+        remaining = quakes.take(mask)
+        kept = clip(remaining) if clip is not None else remaining
+        kept.metadata["bbox_count"] = len(remaining)
+        return kept
+    return keep
+
+def fetch_newest_clipped(
+    limit: int = None,
+    clip: Callable[[QuakeColumns], QuakeColumns] | None = None,
+    columnar: bool = False,
+    total_count: int = None,
+    **params
+    ) -> dict | QuakeColumns | None:
+    """
+    Fetches the newest `limit` events that pass `clip`, straight from USGS.
+
+    USGS can only filter by box, so the newest `limit` events of the box are
+    fetched and clipped, and the request is doubled until enough events pass
+    (or the box is exhausted). Without `clip` this is a plain windowed fetch.
+
+    Args:
+        limit (int, optional): Maximum number of events kept. Defaults to None (all).
+        clip (Callable | None, optional): Spatial filter, see `clip_and_limit`. Requires `columnar`.
+        columnar (bool, optional): Return `QuakeColumns` instead of a FeatureCollection. Defaults to False.
+        total_count (int, optional): Already-known count of the box's matching events.
+        **params: Filters accepted by `fetch_earthquake_data_windowed`.
+
+    Returns:
+        dict | QuakeColumns | None: The events, or None if a fetch fails. When the box was not
+                                    exhausted, `available` is extrapolated from the share of
+                                    fetched events that passed and `available_estimated` is set.
+    """
+    if clip is None:
+        return fetch_earthquake_data_windowed(limit=limit, columnar=columnar, total_count=total_count, **params)
+    if total_count is None:
+        total_count = fetch_earthquake_count(**params)
+        if total_count is None:
+            return None
+
+    fetch_limit = limit
+    while True:
+        data = fetch_earthquake_data_windowed(limit=fetch_limit, columnar=True, total_count=total_count, **params)
+        if data is None:
+            return None
+        exhausted = not fetch_limit or len(data) >= total_count
+        result = clip_and_limit(data, clip, limit)
+        if exhausted or len(result) >= limit:
+            break
+        fetch_limit = min(fetch_limit * 2, total_count)
+        logging.info(f"Only {len(result)} of the newest {len(data)} events passed the filter; fetching the newest {fetch_limit}.")
+
+    if not exhausted:
+        result.metadata["available"] = max(len(result), round(result.metadata["available"] * total_count / max(len(data), 1)))
+        result.metadata["bbox_count"] = total_count
+        result.metadata["available_estimated"] = True
+    return result
+
+def _to_epoch_ms(value: datetime) -> int:
+    """Converts a naive UTC datetime into epoch milliseconds."""
+    return int((value - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    """Returns the process-wide local event catalog, creating it on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            from app.core.quake_catalog import QuakeCatalog
+            _catalog = QuakeCatalog(settings.CATALOG_PATH)
+        return _catalog
+
+def fetch_earthquake_data_synced(
+    starttime: str = None,
+    endtime: str = None,
+    min_magnitude: float = None,
+    limit: int = None,
+    bounding_box: list = None,
+    columnar: bool = False,
+    clip: Callable[[QuakeColumns], QuakeColumns] | None = None,
+    **other_params
+    ) -> dict | QuakeColumns | None:
+    """
+    Serves a query from the local event catalog, syncing it with USGS as needed.
+
+    If a previously synced window contains the query, only events updated
+    since that window's last sync are requested (`updatedafter`) and upserted
+    before answering locally. Otherwise the full window is fetched once and
+    recorded, so later repeat or overlapping queries stay local; a limited
+    query matching more than `settings.CATALOG_SYNC_MAX_EVENTS` events fetches
+    only its newest events instead, and a window USGS capped is not recorded.
+
+    Args:
+        starttime (str, optional): Lower time boundary. Defaults to 30 days ago.
+        endtime (str, optional): Upper time boundary. Defaults to now.
+        min_magnitude (float, optional): Minimum magnitude. Defaults to None.
+        limit (int, optional): Maximum number of events to return (newest kept). Defaults to None.
+        bounding_box (list, optional): [min_lon, min_lat, max_lon, max_lat]. Defaults to None (global).
+        columnar (bool, optional): Return `QuakeColumns` read straight from the catalog's indexed
+                                   columns instead of a FeatureCollection. Defaults to False.
+        clip (Callable | None, optional): Spatial filter applied before `limit`, so the result holds
+                                          the newest `limit` events that pass it (see `clip_and_limit`).
+                                          Requires `columnar`. Defaults to None.
+        **other_params: Additional API parameters; queries using them bypass the catalog.
+
+    Returns:
+        dict | QuakeColumns | None: Matching events, or None if the sync fails.
+    """
+    if bounding_box is None:
+        bounding_box = (-180.0, -90.0, 180.0, 90.0)
+    bounding_box = tuple(bounding_box)
+
+    # The catalog only models bbox/time/magnitude queries on non-wrapping boxes
+    if not settings.CATALOG_ENABLED or other_params or bounding_box[0] > bounding_box[2]:
+        return fetch_newest_clipped(starttime=starttime, endtime=endtime, min_magnitude=min_magnitude,
+                                    limit=limit, clip=clip, bounding_box=bounding_box, columnar=columnar, **other_params)
+
+    from app.core.quake_catalog import NO_MAGNITUDE_FLOOR, now_ms
+
+    end = _parse_time(endtime, datetime.utcnow())
+    start = _parse_time(starttime, end - timedelta(days=30))
+    start_ms, end_ms = _to_epoch_ms(start), _to_epoch_ms(end)
+    mag_floor = NO_MAGNITUDE_FLOOR if min_magnitude is None else float(min_magnitude)
+    catalog = get_catalog()
+    truncated = 0 # Windows USGS capped while syncing: the catalog may be missing some of their events
+
+    try:
+        window = catalog.find_covering_window(bounding_box, start_ms, end_ms, mag_floor)
+        sync_started_ms = now_ms()
+
+        if window is None:
+            window_params = dict(starttime=start.strftime(USGS_TIME_FORMAT), endtime=end.strftime(USGS_TIME_FORMAT),
+                                 min_magnitude=min_magnitude, bounding_box=bounding_box)
+            total = fetch_earthquake_count(**window_params)
+            if total is None:
+                return None
+            if limit and total > max(limit, settings.CATALOG_SYNC_MAX_EVENTS):
+                # Syncing the whole window would download far more than was asked for: fetch just the newest events
+                logging.info(f"Catalog miss: {total} matching events exceed the sync cap; fetching the newest {limit} without recording the window.")
+                return fetch_newest_clipped(limit=limit, clip=clip, columnar=columnar, total_count=total, **window_params)
+            logging.info(f"Catalog miss: fetching the full window ({total} events) from USGS.")
+            data = fetch_earthquake_data_windowed(total_count=total, **window_params)
+            if data is None:
+                return None
+            catalog.upsert_features(data.get('features', []))
+            truncated = data.get("metadata", {}).get("truncated_windows", 0)
+            if truncated:
+                logging.warning("Some time windows were capped by USGS; not recording the window as synced.")
+            else:
+                catalog.record_window(bounding_box, start_ms, end_ms, mag_floor, sync_started_ms)
+
+        elif sync_started_ms - window[8] >= settings.CATALOG_REFRESH_SECONDS * 1000:
+            window_id, w_min_lon, w_min_lat, w_max_lon, w_max_lat, w_start_ms, w_end_ms, _, synced_at_ms = window
+            updated_after = datetime.utcfromtimestamp(synced_at_ms / 1000).strftime(USGS_TIME_FORMAT)
+            logging.info(f"Catalog hit: syncing window {window_id} with events updated after {updated_after}.")
+            # No magnitude floor: an event revised from above the window's floor to below it must be updated too
+            updates = fetch_earthquake_data_windowed(
+                starttime=datetime.utcfromtimestamp(w_start_ms / 1000).strftime(USGS_TIME_FORMAT),
+                endtime=datetime.utcfromtimestamp(w_end_ms / 1000).strftime(USGS_TIME_FORMAT),
+                bounding_box=(w_min_lon, w_min_lat, w_max_lon, w_max_lat),
+                updatedafter=updated_after,
+                includedeleted="true",
+            )
+            if updates is None:
+                logging.warning("Incremental sync failed; serving the last synced catalog state.")
+            else:
+                catalog.upsert_features(updates.get('features', []))
+                truncated = updates.get("metadata", {}).get("truncated_windows", 0)
+                if truncated:
+                    logging.warning("Some updated events were capped by USGS; keeping the window's previous sync time.")
+                else:
+                    catalog.mark_synced(window_id, sync_started_ms)
+        else:
+            logging.info(f"Catalog hit: window {window[0]} is fresh, answering locally.")
+
+        if clip is not None:
+            # Every event of the box is local: filter them all, then keep the newest `limit`
+            result = clip_and_limit(catalog.query_columns(bounding_box, start_ms, end_ms, mag_floor), clip, limit)
+        elif columnar:
+            result = catalog.query_columns(bounding_box, start_ms, end_ms, mag_floor, limit=limit)
+        else:
+            result = catalog.query(bounding_box, start_ms, end_ms, mag_floor, limit=limit)
+        if truncated and result is not None:
+            # Flag the answer as possibly incomplete, e.g. so the result cache never narrows from it
+            (result.metadata if columnar else result["metadata"])["truncated_windows"] = truncated
+        return result
+
+    except Exception as e:
+        logging.error(f"Local catalog failed ({e}); fetching directly from USGS.", exc_info=True)
+        return fetch_newest_clipped(starttime=starttime, endtime=endtime, min_magnitude=min_magnitude,
+                                    limit=limit, clip=clip, bounding_box=bounding_box, columnar=columnar)
+
+def fetch_earthquake_data_boxes(
+    bounding_boxes: list,
+    limit: int = None,
+    columnar: bool = False,
+    max_workers: int = settings.FETCH_MAX_WORKERS,
+    clip: Callable[[QuakeColumns], QuakeColumns] | None = None,
+    **params
+    ) -> dict | QuakeColumns | None:
+    """
+    Fetches several bounding boxes concurrently and merges them, deduplicated on the USGS ID.
+
+    Intended for the boxes produced by `geo_utils.plan_query_boxes`. Each box goes
+    through the catalog-backed fetch, so boxes shared with earlier queries stay local.
+
+    Args:
+        bounding_boxes (list): Boxes as [min_lon, min_lat, max_lon, max_lat].
+        limit (int, optional): Maximum number of events in the merged result (newest kept). Defaults to None.
+        columnar (bool, optional): Return `QuakeColumns` instead of a FeatureCollection. Defaults to False.
+        max_workers (int, optional): Boxes fetched at once. Defaults to settings.FETCH_MAX_WORKERS.
+        clip (Callable | None, optional): Spatial filter applied to each box before `limit`
+                                          (requires `columnar`). Defaults to None.
+        **params: Remaining filters (starttime, endtime, min_magnitude, ...).
+
+    Returns:
+        dict | QuakeColumns | None: Merged result, or None if any box fails.
+    """
+    if not bounding_boxes:
+        logging.error("No bounding boxes to fetch.")
+        return None
+
+    def fetch_box(position):
+        # Boxes can overlap (e.g. buffered parts of one country): columnar results keep only the events
+        # no earlier box covers, so boxes never share an event. The newest `limit` events overall are
+        # always among the newest `limit` of the box they fall in first.
+        box_clip = outside_boxes(bounding_boxes[:position], clip) if columnar and position else clip
+        return fetch_earthquake_data_synced(bounding_box=tuple(bounding_boxes[position]), limit=limit,
+                                            columnar=columnar, clip=box_clip, **params)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(fetch_box, range(len(bounding_boxes))))
+
+    if any(result is None for result in results):
+        logging.error("One or more bounding boxes failed to fetch; discarding the partial result.")
+        return None
+    if len(results) == 1:
+        return results[0]
+
+    # Columnar boxes are disjoint, so their counts add up exactly (otherwise the sum is an upper bound)
+    available = sum((r.metadata if columnar else r.get("metadata", {})).get("available", len(r if columnar else r["features"]))
+                    for r in results)
+    merged = merge_columns(results, limit=limit) if columnar else merge_feature_collections(results, limit=limit)
+    metadata = merged.metadata if columnar else merged["metadata"]
+    metadata["available"] = max(available, metadata["available"])
+    metadata["boxes"] = len(bounding_boxes)
+    truncated = sum((r.metadata if columnar else r.get("metadata", {})).get("truncated_windows", 0) for r in results)
+    if truncated:
+        metadata["truncated_windows"] = truncated
+    if columnar:
+        metadata["bbox_count"] = sum(r.metadata.get("bbox_count", r.metadata.get("available", len(r))) for r in results)
+        if any(r.metadata.get("available_estimated") for r in results):
+            metadata["available_estimated"] = True
+    logging.info(f"Fetched {metadata['count']} events across {len(bounding_boxes)} boxes.")
+    return merged
@@ -0,0 +1,197 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import settings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+@dataclass
+class RequestStats:
+    """Timing and size of a single logical request (including its retries)."""
+    endpoint: str
+    status: int | None
+    attempts: int
+    latency_s: float
+    bytes_wire: int
+    bytes_decoded: int
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread issuing requests through one client.
+
+    Allows `burst` requests at once and `rate` requests per second on average;
+    callers over the limit sleep until their slot comes up.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes one token, waiting as needed; returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1 # May go negative: later callers queue up behind this one
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+class USGSClient:
+    """
+    Reusable HTTP client for the USGS FDSN Event Web Service.
+
+    Holds a pooled keep-alive `requests.Session`, negotiates gzip responses,
+    retries throttling/server errors with bounded exponential backoff plus
+    jitter, optionally caps the request rate across all threads, and records
+    per-request latency and byte counts.
+    """
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        base_url: str = None,
+        pool_size: int = settings.HTTP_POOL_SIZE,
+        max_retries: int = settings.HTTP_MAX_RETRIES,
+        backoff_base: float = settings.HTTP_BACKOFF_BASE_SECONDS,
+        backoff_max: float = settings.HTTP_BACKOFF_MAX_SECONDS,
+        timeout: float = settings.HTTP_TIMEOUT_SECONDS,
+        rate_limit: float | None = settings.HTTP_RATE_LIMIT_PER_SECOND,
+        ):
+        self.base_url = base_url or settings.USGS_API_BASE_URL
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.set_rate_limit(rate_limit)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "User-Agent": "earthquake-viz/1.0 (+https://github.com/sandy-sp/art-of-data-analysis)",
+        })
+
+        self.stats = deque(maxlen=settings.HTTP_STATS_HISTORY)
+        self._stats_lock = threading.Lock()
+
+    def set_rate_limit(self, per_second: float | None) -> None:
+        """Caps requests (including retries) at `per_second` across all threads; None or 0 removes the cap."""
+        self.rate_limiter = RateLimiter(per_second) if per_second else None
+
+    def _backoff_delay(self, attempt: int, response: requests.Response | None) -> float:
+        """Delay before the next attempt: honours Retry-After, else capped exponential with jitter."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _record(self, stats: RequestStats) -> None:
+        with self._stats_lock:
+            self.stats.append(stats)
+        logging.info(
+            f"USGS {stats.endpoint}: status={stats.status} attempts={stats.attempts} "
+            f"latency={stats.latency_s:.3f}s wire={stats.bytes_wire}B decoded={stats.bytes_decoded}B"
+        )
+
+    def get(self, endpoint: str, params: dict) -> requests.Response:
+        """
+        Issues a GET against `base_url + endpoint`, retrying transient failures.
+
+        Args:
+            endpoint (str): FDSN endpoint name, e.g. "query" or "count".
+            params (dict): Query string parameters.
+
+        Returns:
+            requests.Response: The successful response.
+
+        Raises:
+            requests.exceptions.RequestException: If the request still fails after all retries.
+        """
+        url = f"{self.base_url}{endpoint}"
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            response = None
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    break
+                logging.warning(f"USGS {endpoint} returned {response.status_code}; retrying (attempt {attempt + 1}/{self.max_retries}).")
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    self._record(RequestStats(endpoint, None, attempt + 1, time.perf_counter() - started, 0, 0))
+                    raise
+                logging.warning(f"USGS {endpoint} request error ({e}); retrying (attempt {attempt + 1}/{self.max_retries}).")
+            except requests.exceptions.HTTPError:
+                self._record(RequestStats(endpoint, response.status_code, attempt + 1, time.perf_counter() - started, 0, len(response.content)))
+                raise
+
+            time.sleep(self._backoff_delay(attempt, response))
+            attempt += 1
+
+        decoded = len(response.content)
+        try:
+            wire = response.raw.tell() or decoded # Bytes pulled off the socket (compressed)
+        except Exception:
+            wire = int(response.headers.get("Content-Length") or decoded)
+        self._record(RequestStats(endpoint, response.status_code, attempt + 1, time.perf_counter() - started, wire, decoded))
+        return response
+
+    def get_json(self, endpoint: str, params: dict) -> dict:
+        """Convenience wrapper around `get` that parses the JSON body."""
+        return self.get(endpoint, params).json()
+
+    def summary(self) -> dict:
+        """
+        Aggregates the recorded request history.
+
+        Returns:
+            dict: Request count, retries, total/mean latency and byte totals.
+        """
+        with self._stats_lock:
+            history = list(self.stats)
+        if not history:
+            return {"requests": 0}
+        return {
+            "requests": len(history),
+            "retries": sum(s.attempts - 1 for s in history),
+            "failures": sum(1 for s in history if s.status is None or s.status >= 400),
+            "total_latency_s": sum(s.latency_s for s in history),
+            "mean_latency_s": sum(s.latency_s for s in history) / len(history),
+            "bytes_wire": sum(s.bytes_wire for s in history),
+            "bytes_decoded": sum(s.bytes_decoded for s in history),
+        }
+
+    def close(self) -> None:
+        """Closes pooled connections."""
+        self.session.close()
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_default_client() -> USGSClient:
+    """Returns the process-wide shared client, creating it on first use."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = USGSClient()
+        return _default_client
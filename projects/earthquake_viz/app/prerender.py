@@ -0,0 +1,170 @@
+"""
+Headless batch pre-render of the app's maps and chart animations.
+
+For every country (or a configured subset) and every standard time window
+ending today, runs the same pipeline as the app (plan and fetch the query,
+clip to the border, render the map HTML, prepare the data and render the
+chart animations) and leaves the results in the on-disk caches the app reads:
+the local event catalog, the map HTML cache and the chart artifact cache. A
+later app session with the default sidebar selections is then served from
+those caches instead of rendering.
+
+Usage (from the project root):
+    python -m app.prerender
+    python -m app.prerender --countries Japan Chile --windows 7 30 --rate 1
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from app.config import settings
+from app.config.boundaries import SHAPEFILE_PATH
+from app.core import country_query, data_handler, geo_utils
+from app.core.usgs_client import get_default_client
+from app.visualizations import map_builder, plotly_charts, render_scheduler
+from app.visualizations.prepared_quakes import PreparedQuakes
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def server_chart_keys() -> list[str]:
+    """Charts the app renders on the server (with CHART_BACKEND = "plotly", the advanced ones are drawn in the browser)."""
+    if settings.CHART_BACKEND == "plotly" and plotly_charts.is_available():
+        return [key for key in render_scheduler.CHART_FUNCTIONS if key not in plotly_charts.PLOTLY_CHARTS]
+    return list(render_scheduler.CHART_FUNCTIONS)
+
+def prerender_window(country_name: str, country_index, days: int, today, options: argparse.Namespace) -> dict:
+    """
+    Runs the app pipeline for one country and the `days` days up to `today`.
+
+    Args:
+        country_name (str): Country name from the country index.
+        country_index (CountryIndex): Loaded country boundaries.
+        days (int): Window length in days.
+        today (date): Window end date.
+        options (argparse.Namespace): Parsed command line options.
+
+    Returns:
+        dict: Outcome: country, days, status ("ok", "empty", "failed"), events, map, charts and seconds.
+    """
+    started = time.perf_counter()
+    result = {"country": country_name, "days": days, "status": "failed", "events": 0, "map": False, "charts": 0}
+
+    query = country_query.plan_country_query(
+        country_name, country_index,
+        starttime=(today - timedelta(days=days)).strftime('%Y-%m-%d'),
+        endtime=today.strftime('%Y-%m-%d'),
+        min_magnitude=options.min_magnitude,
+        limit=options.limit,
+        clip_to_border=True,
+        offshore_buffer_km=options.offshore_buffer_km,
+    )
+    if query is None:
+        logging.error(f"Could not find boundaries for '{country_name}'; skipping.")
+        return result
+
+    quakes = country_query.fetch_country_events(query)
+    if quakes is None:
+        logging.error(f"Fetch failed for '{country_name}' ({days} days).")
+        result["seconds"] = time.perf_counter() - started
+        return result
+    result["events"] = len(quakes)
+    result["status"] = "ok" if len(quakes) else "empty"
+
+    if not options.skip_maps:
+        # An empty result is mapped from an empty FeatureCollection, exactly as the app does
+        source = quakes if len(quakes) else {"type": "FeatureCollection", "features": []}
+        result["map"] = map_builder.render_earthquake_map_html(source, center_on_bounds=query.map_bounds) is not None
+
+    if not options.skip_charts and len(quakes):
+        df = data_handler.geojson_to_dataframe(quakes)
+        if df is not None and not df.empty:
+            prepared = PreparedQuakes.from_dataframe(df)
+            for key, path in render_scheduler.render_charts(prepared, keys=options.charts, encoder=options.encoder):
+                result["charts"] += path is not None
+
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+def prerender_country(country_name: str, country_index, options: argparse.Namespace) -> list[dict]:
+    """Pre-renders every window for one country, longest first so shorter ones can come from the catalog."""
+    today = options.end_date or datetime.now().date()
+    results = []
+    for days in sorted(options.windows, reverse=True):
+        try:
+            results.append(prerender_window(country_name, country_index, days, today, options))
+        except Exception as e:
+            logging.error(f"Pre-render failed for '{country_name}' ({days} days): {e}", exc_info=True)
+            results.append({"country": country_name, "days": days, "status": "failed", "events": 0, "map": False, "charts": 0})
+    return results
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pre-render maps and chart animations into the app's caches.")
+    parser.add_argument("--countries", nargs="+", default=settings.PRERENDER_COUNTRIES,
+                        help="Country names as shown in the app (default: PRERENDER_COUNTRIES, or every country).")
+    parser.add_argument("--windows", nargs="+", type=int, default=list(settings.PRERENDER_WINDOWS_DAYS),
+                        help="Window lengths in days, ending today.")
+    parser.add_argument("--end-date", type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(), default=None,
+                        help="Window end date, YYYY-MM-DD (default: today, as in the app's sidebar).")
+    parser.add_argument("--workers", type=int, default=settings.PRERENDER_WORKERS, help="Countries processed at once (chart renders share the render pool, or run one at a time without one).")
+    parser.add_argument("--rate", type=float, default=settings.PRERENDER_RATE_LIMIT_PER_SECOND,
+                        help="USGS requests per second across all workers (0: unlimited).")
+    parser.add_argument("--min-magnitude", type=float, default=settings.PRERENDER_MIN_MAGNITUDE)
+    parser.add_argument("--limit", type=int, default=settings.DEFAULT_LIMIT)
+    parser.add_argument("--offshore-buffer-km", type=float, default=settings.PRERENDER_OFFSHORE_BUFFER_KM)
+    parser.add_argument("--charts", nargs="+", choices=list(render_scheduler.CHART_FUNCTIONS), default=None,
+                        help="Chart keys to render (default: every chart the app renders on the server).")
+    parser.add_argument("--encoder", default=None, help="Animation encoder (default: CHART_ENCODER).")
+    parser.add_argument("--skip-maps", action="store_true")
+    parser.add_argument("--skip-charts", action="store_true")
+    options = parser.parse_args(argv)
+    options.charts = options.charts or server_chart_keys()
+    return options
+
+def main(argv: list[str] = None) -> list[dict]:
+    """
+    Runs the batch pre-render.
+
+    Args:
+        argv (list[str], optional): Command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        list[dict]: One outcome per country and window (see `prerender_window`).
+    """
+    options = parse_args(argv)
+    country_index = geo_utils.load_country_index(SHAPEFILE_PATH)
+    if country_index is None:
+        logging.error("Could not load the country index; nothing to pre-render.")
+        return []
+
+    countries = options.countries or list(country_index.names)
+    unknown = [name for name in countries if name not in country_index.names]
+    for name in unknown:
+        logging.warning(f"Unknown country '{name}'; skipping.")
+    countries = [name for name in countries if name not in unknown]
+
+    # One limit for every fetch thread in this process, however many countries run at once
+    get_default_client().set_rate_limit(options.rate)
+    if not options.skip_charts and render_scheduler.get_render_pool() is None:
+        # pyplot is not thread-safe: workers still fetch and map in parallel, but take turns rendering charts
+        logging.info("No chart render pool (CHART_RENDER_WORKERS = 0): charts are rendered in-process, one at a time.")
+    logging.info(f"Pre-rendering {len(countries)} countries x windows {sorted(options.windows)} days "
+                 f"with {options.workers} workers at {options.rate or 'unlimited'} requests/s.")
+
+    started = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(options.workers, 1)) as executor:
+        futures = {executor.submit(prerender_country, name, country_index, options): name for name in countries}
+        for future in as_completed(futures):
+            for result in future.result():
+                results.append(result)
+                logging.info(f"{result['country']} ({result['days']} days): {result['status']}, "
+                             f"{result['events']} events, map={result['map']}, charts={result['charts']}")
+
+    counts = {status: sum(r["status"] == status for r in results) for status in ("ok", "empty", "failed")}
+    logging.info(f"Pre-render finished in {time.perf_counter() - started:.1f}s: {counts}; "
+                 f"USGS requests: {get_default_client().summary()}")
+    return results
+
+if __name__ == "__main__":
+    main()
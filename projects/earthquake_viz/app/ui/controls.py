@@ -15,6 +15,17 @@ def display_sidebar_controls(country_list: list):  # Add country_list parameter
         placeholder="Choose a country..."  # Show placeholder text
     )
 
+    clip_to_border = st.sidebar.checkbox(
+        "Only events inside the country border",
+        value=True,
+        help="Drops events that fall inside the country's bounding box but outside its borders."
+    )
+    offshore_buffer_km = st.sidebar.slider(
+        "Offshore buffer (km):", 0, 500, 100, 10,
+        disabled=not clip_to_border,
+        help="Keeps events within this distance of the border, e.g. offshore subduction quakes."
+    )
+
     # --- Time Range Selection ---
     st.sidebar.subheader("🗓️ Time Range")
     default_end_date = datetime.now().date()
@@ -30,14 +41,21 @@ def display_sidebar_controls(country_list: list):  # Add country_list parameter
 
     # --- Limit Selection ---
     st.sidebar.subheader("🔢 Event Limit")
-    limit = st.sidebar.number_input("Maximum Number of Events:", 10, 5000, 1000, 10)
+    fetch_all = st.sidebar.checkbox(
+        "All matching events",
+        value=False,
+        help="Fetches every event matching the filters, however many there are (long ranges are split into time windows fetched in parallel)."
+    )
+    limit = st.sidebar.number_input("Maximum Number of Events:", 10, 5000, 1000, 10, disabled=fetch_all)
 
     # Return all selections
     final_selections = {
         "country_name": selected_country,  # Use selected_country from selectbox
+        "clip_to_border": clip_to_border,
+        "offshore_buffer_km": offshore_buffer_km,
         "starttime": start_date_str,
         "endtime": end_date_str,
         "min_magnitude": min_magnitude,
-        "limit": limit
+        "limit": None if fetch_all else limit  # None: no limit
     }
     return final_selections
\ No newline at end of file
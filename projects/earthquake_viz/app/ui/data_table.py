@@ -0,0 +1,85 @@
+import math
+import numpy as np
+import streamlit as st
+from app.config import settings
+from app.core.event_table import EventTable
+from app.core.instrumentation import span
+
+PAGE_KEY = "table_page"
+
+def _first_page():
+    st.session_state[PAGE_KEY] = 1
+
+def _magnitude_bounds(table: EventTable) -> tuple[float, float] | None:
+    """Slider bounds (rounded out to 0.1) of the table's magnitudes, or None if there is no range to filter."""
+    magnitude = table.df["Magnitude"].to_numpy(dtype=float)
+    magnitude = magnitude[np.isfinite(magnitude)]
+    if magnitude.size == 0:
+        return None
+    low, high = math.floor(magnitude.min() * 10) / 10, math.ceil(magnitude.max() * 10) / 10
+    return (low, high) if low < high else None
+
+@st.fragment
+def display_event_table(table: EventTable, country_name: str):
+    """
+    Paginated, sortable and filterable event table with on-demand downloads.
+
+    The frame stays on the server (in `table`); only the current page is sent
+    to the browser. Changing the sort, filters or page reruns just this
+    fragment, and the CSV/Parquet downloads are built when clicked, from the
+    rows currently selected, in the current order.
+    """
+    default_column, default_descending = settings.TABLE_DEFAULT_SORT
+    sort_col, order_col, magnitude_col, place_col = st.columns([2, 1, 2, 2])
+    sort_by = sort_col.selectbox("Sort by", table.columns, index=table.columns.index(default_column),
+                                 key="table_sort_by", on_change=_first_page)
+    descending = order_col.toggle("Descending", value=default_descending, key="table_descending", on_change=_first_page)
+    bounds = _magnitude_bounds(table)
+    magnitude_range = None
+    if bounds is not None:
+        # No key: a new result with a different range gets a fresh, fully open slider
+        selected = magnitude_col.slider("Magnitude", bounds[0], bounds[1], bounds, 0.1, on_change=_first_page)
+        magnitude_range = selected if selected != bounds else None # Fully open: keep events without a magnitude
+    place = place_col.text_input("Place contains", key="table_place", on_change=_first_page)
+
+    with span("table.view", rows=len(table), sort_by=sort_by) as view_span:
+        rows = table.rows(sort_by, descending, table.filter_mask(magnitude_range, place.strip()))
+        view_span.attrs["matched"] = len(rows)
+
+    if len(rows) == 0:
+        st.info("No events match the table filters.")
+        return
+
+    page_size = st.session_state.get("table_page_size", settings.TABLE_PAGE_SIZES[0])
+    pages = max(1, math.ceil(len(rows) / page_size))
+    if st.session_state.get(PAGE_KEY, 1) > pages:
+        st.session_state[PAGE_KEY] = pages # Filters or a new result shrank the view
+
+    table_slot = st.empty()
+    page_col, size_col, info_col = st.columns([1, 1, 3])
+    page = page_col.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=PAGE_KEY)
+    size_col.selectbox("Rows per page", settings.TABLE_PAGE_SIZES, key="table_page_size", on_change=_first_page)
+    start = (page - 1) * page_size
+    filtered = f" (filtered from {len(table):,})" if len(rows) < len(table) else ""
+    info_col.caption(f"Showing events {start + 1:,}–{min(start + page_size, len(rows)):,} of {len(rows):,}{filtered}, sorted by "
+                     f"{sort_by} {'descending' if descending else 'ascending'}.")
+    table_slot.dataframe(table.page(rows, page, page_size), width="stretch")
+
+    csv_col, parquet_col = st.columns(2)
+    help_text = f"The {len(rows):,} events selected above, in the current order. Built when clicked."
+    csv_col.download_button(
+        label="Download data as CSV",
+        data=lambda: table.export(rows, "csv"),
+        file_name=f'earthquake_data_{country_name}.csv',
+        mime='text/csv',
+        help=help_text,
+        on_click="ignore",
+    )
+    parquet_col.download_button(
+        label="Download data as Parquet",
+        data=lambda: table.export(rows, "parquet"),
+        file_name=f'earthquake_data_{country_name}.parquet',
+        mime='application/vnd.apache.parquet',
+        help=help_text,
+        on_click="ignore",
+    )
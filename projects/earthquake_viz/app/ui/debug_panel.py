@@ -0,0 +1,30 @@
+import os
+import streamlit as st
+import pandas as pd
+from app.core.instrumentation import Span
+
+def _scaled(value: int | None, scale: int) -> float | None:
+    return round(value / scale, 2) if value is not None else None
+
+def display_debug_panel(spans: list[Span], title: str = "🛠️ Stage Timings (debug)"):
+    """Displays the recorded stage spans in a collapsed expander, slowest first."""
+    if not spans:
+        return
+    rows = [{
+        "Stage": span.name,
+        "Parent": span.parent or "",
+        "Wall (s)": round(span.wall_s, 3),
+        "CPU (s)": round(span.cpu_s, 3),
+        "Peak RSS Δ (MB)": _scaled(span.peak_rss_delta_bytes, 2**20),
+        "Output (KB)": _scaled(span.output_bytes, 2**10),
+        "Process": "app" if span.pid == os.getpid() else f"worker {span.pid}",
+        "Details": ", ".join(f"{key}={value}" for key, value in span.attrs.items()),
+    } for span in spans]
+    table = pd.DataFrame(rows).sort_values("Wall (s)", ascending=False)
+
+    with st.expander(title, expanded=False):
+        top_level = [span for span in spans if span.parent is None]
+        st.caption(f"{len(spans)} spans; top-level stages took {sum(span.wall_s for span in top_level):.2f}s wall, "
+                   f"{sum(span.cpu_s for span in top_level):.2f}s CPU in this process. "
+                   "CPU time counts the calling thread only; chart workers report their own spans.")
+        st.dataframe(table, hide_index=True, width="stretch")
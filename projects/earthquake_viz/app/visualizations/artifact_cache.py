@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Callable
+from app.config import settings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Temp files older than this are leftovers from crashed renders
+STALE_TEMP_SECONDS = 3600
+
+def artifact_key(data_fingerprint: str, chart: str, **params) -> str:
+    """
+    Content address of a rendered chart: input data hash, chart type and parameters.
+
+    Args:
+        data_fingerprint (str): Hash of the chart's input data (e.g. `PreparedQuakes.fingerprint()`).
+        chart (str): Chart type.
+        **params: Anything else that changes the output; values must be JSON-serialisable.
+
+    Returns:
+        str: Hex digest used as the artifact's file name.
+    """
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.blake2b(f"{data_fingerprint}|{chart}|{payload}".encode(), digest_size=16).hexdigest()
+
+class ChartArtifactCache:
+    """
+    Directory of rendered chart files named by content address, evicted LRU by total bytes.
+
+    Each render writes to a unique temp file that is renamed into place, so
+    readers only ever see complete files and concurrent sessions never share a
+    path unless they asked for exactly the same chart. Works across processes:
+    all state lives in the file system (mtime doubles as last-use time).
+    """
+
+    def __init__(self, directory: str = settings.CHART_CACHE_DIR, max_bytes: int = settings.CHART_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path_for(self, key: str, suffix: str = ".gif") -> str:
+        return os.path.join(self.directory, f"{key}{suffix}")
+
+    def get(self, key: str, suffix: str = ".gif") -> str | None:
+        """Returns the cached artifact's path (marking it recently used), or None."""
+        path = self.path_for(key, suffix)
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.warning(f"Could not touch cached chart {path}: {e}")
+            return path if os.path.exists(path) else None
+
+    def produce(self, key: str, render: Callable[[str], str | None], suffix: str = ".gif") -> str | None:
+        """
+        Returns the artifact for `key`, rendering it first if it is not cached.
+
+        Args:
+            key (str): Artifact key from `artifact_key`.
+            render (Callable[[str], str | None]): Writes the artifact to the given temp path;
+                                                  returns None if there is nothing to render.
+            suffix (str, optional): File extension (also tells the encoder the format).
+
+        Returns:
+            str | None: Path of the cached artifact, or None if `render` produced nothing.
+        """
+        path = self.get(key, suffix)
+        if path is not None:
+            logging.info(f"Chart cache hit: {path}")
+            return path
+
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.tmp{suffix}")
+        try:
+            if render(temp_path) is None or not os.path.exists(temp_path):
+                return None
+            final_path = self.path_for(key, suffix)
+            os.replace(temp_path, final_path) # Atomic: readers see the old file or the new one
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.evict()
+        return final_path
+
+    def evict(self) -> None:
+        """Deletes least recently used artifacts until the directory fits in `max_bytes`."""
+        artifacts = []
+        now = time.time()
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.startswith("."):
+                if ".tmp" in entry.name and now - stat.st_mtime > STALE_TEMP_SECONDS:
+                    self._remove(entry.path)
+                continue
+            artifacts.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in artifacts)
+        for _, size, path in sorted(artifacts):
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                total -= size
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logging.warning(f"Could not evict cached chart {path}: {e}")
+            return False
@@ -1,16 +1,26 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from datetime import datetime
+import matplotlib.dates as mdates
 import os
 import numpy as np
-import matplotlib.cm as cm
 import matplotlib.colors as mcolors
+from matplotlib.collections import EllipseCollection
+import logging
+from app.core.instrumentation import file_size, traced
+from app.visualizations.animation_engine import cumulative_histograms, save_animation
+from app.visualizations.prepared_quakes import DEPTH_CATEGORIES, PreparedQuakes, as_prepared
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # --- Output Directory ---
 OUTPUT_DIR = "data/output_charts"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# --- Shockwave Ripples ---
+SHOCKWAVE_LIFETIME = 20 # Frames a ripple stays visible
+SHOCKWAVE_GROWTH = 0.2 # Radius gained per frame, in degrees per unit of magnitude
+SHOCKWAVE_FADE = 0.05 # Alpha lost per frame
+
 # --- Core Animation Helper ---
 def get_dynamic_frames(data_len, max_frames=60):
     step = max(1, data_len // max_frames)
@@ -18,276 +28,268 @@ def get_dynamic_frames(data_len, max_frames=60):
     interval = max(50, 10000 // len(frames))  # ms/frame, ~10 sec total
     return frames, interval
 
-# --- Magnitude Histogram ---
-def create_magnitude_histogram_animation(df: pd.DataFrame, output_path=f"{OUTPUT_DIR}/magnitude.gif"):
-    df = df.dropna(subset=["Magnitude"])
-    mags = df["Magnitude"].sort_values().values
-    frames, interval = get_dynamic_frames(len(mags))
+def _histogram_animation(values, bins, output_path, title, xlabel, xlim, color, encoder=None):
+    """Growing histogram of `values` (already in reveal order) with one persistent bar per bin."""
+    frames, interval = get_dynamic_frames(len(values))
+    heights = cumulative_histograms(values, bins, frames)
 
     fig, ax = plt.subplots()
-    bins = range(0, 11)
+    bars = ax.bar(bins[:-1], np.zeros(len(bins) - 1), width=np.diff(bins), align='edge',
+                  color=color, edgecolor='black')
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Count")
+    ax.set_xlim(*xlim)
+    ax.set_ylim(0, max(1, heights[-1].max()) * 1.05)
+
+    def update(k, start, stop):
+        for bar, height in zip(bars.patches, heights[k]):
+            bar.set_height(height)
+        return bars.patches
+
+    return save_animation(fig, frames, update, output_path, interval, artists=bars.patches, encoder=encoder)
+
+def _growing_scatter(ax, x, y, sizes=None, colors=None, **style):
+    """
+    Persistent scatter artist plus a frame callback revealing points [start, stop).
 
-    def update(i):
-        ax.clear()
-        ax.hist(mags[:i+1], bins=bins, color='skyblue', edgecolor='black')
-        ax.set_title("Earthquake Magnitude Histogram")
-        ax.set_xlabel("Magnitude")
-        ax.set_ylabel("Count")
-        ax.set_xlim(0, 10)
+    Returns:
+        tuple: (artist, update) for `save_animation(..., accumulate=True)`.
+    """
+    points = ax.scatter([], [], **style)
+    xy = np.column_stack([x, y])
+
+    def update(k, start, stop):
+        points.set_offsets(xy[start:stop])
+        if sizes is not None:
+            points.set_sizes(sizes[start:stop])
+        if colors is not None:
+            points.set_facecolor(colors[start:stop])
+        return [points]
+
+    return points, update
+
+def _has_events(count: int, chart: str) -> bool:
+    """Guards chart builders against empty inputs (no frames to animate)."""
+    if count == 0:
+        logging.warning(f"No usable events for the {chart} chart; skipping.")
+        return False
+    return True
 
-    ani = animation.FuncAnimation(fig, update, frames=frames, interval=interval, repeat=False)
-    ani.save(output_path, writer='pillow')
-    plt.close()
-    return output_path
+# --- Magnitude Histogram ---
+@traced(output_bytes=file_size)
+def create_magnitude_histogram_animation(df: pd.DataFrame | PreparedQuakes, output_path=f"{OUTPUT_DIR}/magnitude.gif", encoder=None):
+    quakes = as_prepared(df)
+    mags = quakes.magnitude[quakes.by_magnitude]
+    if not _has_events(len(mags), "magnitude histogram"):
+        return None
+    return _histogram_animation(mags, np.arange(0, 11), output_path, "Earthquake Magnitude Histogram",
+                                "Magnitude", (0, 10), 'skyblue', encoder=encoder)
 
 # --- Depth Histogram ---
-def create_depth_histogram_animation(df: pd.DataFrame, output_path=f"{OUTPUT_DIR}/depth.gif"):
-    df = df.dropna(subset=["Depth (km)"])
-    depths = df["Depth (km)"].sort_values().values
-    frames, interval = get_dynamic_frames(len(depths))
-
-    fig, ax = plt.subplots()
-    bins = range(0, 700, 50)
-
-    def update(i):
-        ax.clear()
-        ax.hist(depths[:i+1], bins=bins, color='salmon', edgecolor='black')
-        ax.set_title("Earthquake Depth Histogram")
-        ax.set_xlabel("Depth (km)")
-        ax.set_ylabel("Count")
-        ax.set_xlim(0, 700)
-
-    ani = animation.FuncAnimation(fig, update, frames=frames, interval=interval, repeat=False)
-    ani.save(output_path, writer='pillow')
-    plt.close()
-    return output_path
-
-# --- Time Series ---
-def create_time_series_animation(df: pd.DataFrame, output_path=f"{OUTPUT_DIR}/timeseries.gif"):
-    if "Time" not in df.columns:
+@traced(output_bytes=file_size)
+def create_depth_histogram_animation(df: pd.DataFrame | PreparedQuakes, output_path=f"{OUTPUT_DIR}/depth.gif", encoder=None):
+    quakes = as_prepared(df)
+    depths = quakes.depth[quakes.by_depth]
+    if not _has_events(len(depths), "depth histogram"):
         return None
+    return _histogram_animation(depths, np.arange(0, 700, 50), output_path, "Earthquake Depth Histogram",
+                                "Depth (km)", (0, 700), 'salmon', encoder=encoder)
 
-    df["Parsed_Time"] = pd.to_datetime(df["Time"], errors='coerce')
-    df = df.dropna(subset=["Parsed_Time"])
-    df["Date"] = df["Parsed_Time"].dt.date
-    daily_counts = df.groupby("Date").size().sort_index()
-
-    if daily_counts.empty:
+# --- Time Series ---
+@traced(output_bytes=file_size)
+def create_time_series_animation(df: pd.DataFrame | PreparedQuakes, output_path=f"{OUTPUT_DIR}/timeseries.gif", encoder=None):
+    quakes = as_prepared(df)
+    if not _has_events(len(quakes.daily_dates), "time series"):
         return None
 
-    dates = daily_counts.index
-    values = daily_counts.values
+    dates = quakes.daily_dates
+    values = quakes.daily_counts
     frames, interval = get_dynamic_frames(len(dates))
 
     fig, ax = plt.subplots()
+    # All bars exist up front; each frame draws only the newly revealed days
+    bars = ax.bar(dates, values, color='mediumseagreen')
+    ax.set_title("Earthquakes Per Day")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Count")
+    ax.tick_params(axis='x', rotation=45)
+    ax.set_xlim(dates[0], dates[-1])
+    ax.set_ylim(0, max(values) + 5)
+
+    def update(k, start, stop):
+        return bars.patches[start:stop]
 
-    def update(i):
-        ax.clear()
-        ax.bar(dates[:i+1], values[:i+1], color='mediumseagreen')
-        ax.set_title("Earthquakes Per Day")
-        ax.set_xlabel("Date")
-        ax.set_ylabel("Count")
-        ax.tick_params(axis='x', rotation=45)
-        ax.set_xlim(dates[0], dates[-1])
-        ax.set_ylim(0, max(values) + 5)
-
-    ani = animation.FuncAnimation(fig, update, frames=frames, interval=interval, repeat=False)
-    ani.save(output_path, writer='pillow')
-    plt.close()
-    return output_path
+    return save_animation(fig, frames, update, output_path, interval, artists=bars.patches, accumulate=True, encoder=encoder)
 
 # --- Location Scatter Plot ---
-def create_location_animation(df: pd.DataFrame, output_path=f"{OUTPUT_DIR}/locations.gif"):
-    if "Latitude" not in df.columns or "Longitude" not in df.columns:
+@traced(output_bytes=file_size)
+def create_location_animation(df: pd.DataFrame | PreparedQuakes, output_path=f"{OUTPUT_DIR}/locations.gif", encoder=None):
+    quakes = as_prepared(df)
+    rows = quakes.rows("input", require=("latitude", "longitude"))
+    if not _has_events(len(rows), "location"):
         return None
-
-    df = df.dropna(subset=["Latitude", "Longitude"])
-    frames, interval = get_dynamic_frames(len(df))
+    lat = quakes.latitude[rows]
+    lon = quakes.longitude[rows]
+    frames, interval = get_dynamic_frames(len(rows))
 
     fig, ax = plt.subplots()
-    lat_range = (df["Latitude"].min() - 5, df["Latitude"].max() + 5)
-    lon_range = (df["Longitude"].min() - 5, df["Longitude"].max() + 5)
-
-    def update(i):
-        ax.clear()
-        ax.set_title("Earthquake Locations")
-        ax.set_xlabel("Longitude")
-        ax.set_ylabel("Latitude")
-        ax.set_xlim(*lon_range)
-        ax.set_ylim(*lat_range)
-        ax.scatter(df["Longitude"][:i+1], df["Latitude"][:i+1], color='orange', alpha=0.6)
-
-    ani = animation.FuncAnimation(fig, update, frames=frames, interval=interval, repeat=False)
-    ani.save(output_path, writer='pillow')
-    plt.close()
-    return output_path
-
-def create_cumulative_time_series(df: pd.DataFrame, output_path=f"{OUTPUT_DIR}/cumulative_timeseries.gif", max_frames=60):
-    """Creates an animated cumulative time series chart of earthquakes per day."""
-    if "Time" not in df.columns:
-        return None
+    ax.set_title("Earthquake Locations")
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    ax.set_xlim(lon.min() - 5, lon.max() + 5)
+    ax.set_ylim(lat.min() - 5, lat.max() + 5)
+    points, update = _growing_scatter(ax, lon, lat, color='orange', alpha=0.6)
 
-    df["Parsed_Time"] = pd.to_datetime(df["Time"], errors='coerce')
-    df = df.dropna(subset=["Parsed_Time"])
-    df["Date"] = df["Parsed_Time"].dt.date
-    daily_counts = df.groupby("Date").size().sort_index().cumsum()
+    return save_animation(fig, frames, update, output_path, interval, artists=[points], accumulate=True, encoder=encoder)
 
-    dates = daily_counts.index
-    values = daily_counts.values
+@traced(output_bytes=file_size)
+def create_cumulative_time_series(df: pd.DataFrame | PreparedQuakes, output_path=f"{OUTPUT_DIR}/cumulative_timeseries.gif", max_frames=60, encoder=None):
+    """Creates an animated cumulative time series chart of earthquakes per day."""
+    quakes = as_prepared(df)
+    if not _has_events(len(quakes.daily_dates), "cumulative time series"):
+        return None
 
-    total = len(dates)
-    step = max(1, total // max_frames)
-    frames = list(range(0, total, step))
-    interval = max(50, 10000 // len(frames))  # Total ~10 sec
+    x = mdates.date2num(quakes.daily_dates)
+    values = quakes.cumulative_counts
+    frames, interval = get_dynamic_frames(len(x), max_frames)
 
     fig, ax = plt.subplots(figsize=(10, 4))
-
-    def update(i):
-        ax.clear()
-        ax.plot(dates[:i+1], values[:i+1], color='dodgerblue', marker='o')
-        ax.set_title("Cumulative Earthquakes Over Time")
-        ax.set_xlabel("Date")
-        ax.set_ylabel("Total Earthquakes")
-        ax.set_ylim(0, max(values) + 5)
-        ax.set_xlim(dates[0], dates[-1])
-        ax.tick_params(axis='x', rotation=45)
-
-    ani = animation.FuncAnimation(fig, update, frames=frames, interval=interval, repeat=False)
-    ani.save(output_path, writer='pillow')
-    plt.close()
-    return output_path
-
-def create_magnitude_depth_scatter(df: pd.DataFrame, output_path=f"{OUTPUT_DIR}/magnitude_vs_depth.gif", max_frames=60):
+    ax.xaxis_date()
+    line, = ax.plot([], [], color='dodgerblue', marker='o')
+    ax.set_title("Cumulative Earthquakes Over Time")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Total Earthquakes")
+    ax.set_ylim(0, max(values) + 5)
+    ax.set_xlim(x[0], x[-1])
+    ax.tick_params(axis='x', rotation=45)
+
+    def update(k, start, stop):
+        # Start one point back so the new segment joins the line drawn so far
+        begin = max(start - 1, 0)
+        line.set_data(x[begin:stop], values[begin:stop])
+        return [line]
+
+    return save_animation(fig, frames, update, output_path, interval, artists=[line], accumulate=True, encoder=encoder)
+
+@traced(output_bytes=file_size)
+def create_magnitude_depth_scatter(df: pd.DataFrame | PreparedQuakes, output_path=f"{OUTPUT_DIR}/magnitude_vs_depth.gif", max_frames=60, encoder=None):
     """Creates an animated scatter plot of Magnitude vs. Depth."""
-    df = df.dropna(subset=["Magnitude", "Depth (km)"])
-    df = df.sort_values("Magnitude")  # Optional: order by magnitude
-
-    x = df["Magnitude"].values
-    y = df["Depth (km)"].values
+    quakes = as_prepared(df)
+    rows = quakes.rows("magnitude", require=("depth",))  # Ordered by magnitude
+    if not _has_events(len(rows), "magnitude vs depth"):
+        return None
 
-    total = len(x)
-    step = max(1, total // max_frames)
-    frames = list(range(0, total, step))
-    interval = max(50, 10000 // len(frames))  # ms per frame
+    x = quakes.magnitude[rows]
+    y = quakes.depth[rows]
+    frames, interval = get_dynamic_frames(len(x), max_frames)
 
     fig, ax = plt.subplots(figsize=(8, 5))
+    ax.set_title("Magnitude vs. Depth")
+    ax.set_xlabel("Magnitude")
+    ax.set_ylabel("Depth (km)")
+    ax.set_xlim(0, 10)
+    ax.set_ylim(max(y) + 10, 0)  # Invert Y to show shallow at top
+    ax.grid(True)
+    points, update = _growing_scatter(ax, x, y, color='crimson', alpha=0.6, edgecolors='black')
 
-    def update(i):
-        ax.clear()
-        ax.scatter(x[:i+1], y[:i+1], color='crimson', alpha=0.6, edgecolors='black')
-        ax.set_title("Magnitude vs. Depth")
-        ax.set_xlabel("Magnitude")
-        ax.set_ylabel("Depth (km)")
-        ax.set_xlim(0, 10)
-        ax.set_ylim(max(y) + 10, 0)  # Invert Y to show shallow at top
-        ax.grid(True)
-
-    ani = animation.FuncAnimation(fig, update, frames=frames, interval=interval, repeat=False)
-    ani.save(output_path, writer='pillow')
-    plt.close()
-    return output_path
-
-def create_location_scatter_animation(df: pd.DataFrame, output_path=f"{OUTPUT_DIR}/quake_locations.gif", max_frames=60):
-    """Creates an animated location scatter map using Latitude and Longitude."""
-    df = df.dropna(subset=["Latitude", "Longitude", "Magnitude"])
-    df = df.sort_values("Time")  # Ensure chronological order if needed
+    return save_animation(fig, frames, update, output_path, interval, artists=[points], accumulate=True, encoder=encoder)
 
-    lat = df["Latitude"].values
-    lon = df["Longitude"].values
-    mag = df["Magnitude"].values
+@traced(output_bytes=file_size)
+def create_location_scatter_animation(df: pd.DataFrame | PreparedQuakes, output_path=f"{OUTPUT_DIR}/quake_locations.gif", max_frames=60, encoder=None):
+    """Creates an animated location scatter map using Latitude and Longitude."""
+    quakes = as_prepared(df)
+    rows = quakes.rows("time", require=("latitude", "longitude", "magnitude"))  # Chronological order
+    if not _has_events(len(rows), "location scatter"):
+        return None
 
-    total = len(df)
-    step = max(1, total // max_frames)
-    frames = list(range(0, total, step))
-    interval = max(50, 10000 // len(frames))
+    lat = quakes.latitude[rows]
+    lon = quakes.longitude[rows]
+    mag = quakes.magnitude[rows]
+    frames, interval = get_dynamic_frames(len(rows), max_frames)
 
     fig, ax = plt.subplots(figsize=(8, 6))
 
     lat_pad = 2
     lon_pad = 2
-    lat_min, lat_max = lat.min() - lat_pad, lat.max() + lat_pad
-    lon_min, lon_max = lon.min() - lon_pad, lon.max() + lon_pad
-
-    def update(i):
-        ax.clear()
-        ax.set_title("Earthquake Locations Over Time")
-        ax.set_xlabel("Longitude")
-        ax.set_ylabel("Latitude")
-        ax.set_xlim(lon_min, lon_max)
-        ax.set_ylim(lat_min, lat_max)
-        ax.grid(True)
-
-        ax.scatter(lon[:i+1], lat[:i+1], 
-                   s=mag[:i+1]**2,  # Magnitude as size
-                   c='orange', alpha=0.6, edgecolors='black')
-
-    ani = animation.FuncAnimation(fig, update, frames=frames, interval=interval, repeat=False)
-    ani.save(output_path, writer='pillow')
-    plt.close()
-    return output_path
-
-def create_spiral_timeline(df: pd.DataFrame, output_path=f"{OUTPUT_DIR}/spiral_timeline.gif", max_frames=60):
+    ax.set_title("Earthquake Locations Over Time")
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    ax.set_xlim(lon.min() - lon_pad, lon.max() + lon_pad)
+    ax.set_ylim(lat.min() - lat_pad, lat.max() + lat_pad)
+    ax.grid(True)
+    points, update = _growing_scatter(ax, lon, lat, sizes=mag**2,  # Magnitude as size
+                                      c='orange', alpha=0.6, edgecolors='black')
+
+    return save_animation(fig, frames, update, output_path, interval, artists=[points], accumulate=True, encoder=encoder)
+
+@traced(output_bytes=file_size)
+def create_spiral_timeline(df: pd.DataFrame | PreparedQuakes, output_path=f"{OUTPUT_DIR}/spiral_timeline.gif", max_frames=60, encoder=None):
     """Creates a spiral animation where angle = time, radius = magnitude, color = depth."""
-    df = df.dropna(subset=["Time", "Magnitude", "Depth (km)"])
-    df["Parsed_Time"] = pd.to_datetime(df["Time"], errors='coerce')
-    df = df.dropna(subset=["Parsed_Time"])
+    quakes = as_prepared(df)
+    rows = quakes.rows("time", require=("magnitude", "depth"))
+    if not _has_events(len(rows), "spiral timeline"):
+        return None
 
-    df = df.sort_values("Parsed_Time")
-    mag = df["Magnitude"].values
-    depth = df["Depth (km)"].values
+    mag = quakes.magnitude[rows]
+    depth = quakes.depth[rows]
 
     # Normalize for spiral
-    total = len(df)
-    step = max(1, total // max_frames)
-    frames = list(range(0, total, step))
-    interval = max(50, 10000 // len(frames))
+    total = len(rows)
+    frames, interval = get_dynamic_frames(total, max_frames)
 
     angles = np.linspace(0, 4 * np.pi, total)  # 2 full spiral turns
     radii = mag * 5  # Stretch radius
-    colors = cm.get_cmap("YlOrRd")(mcolors.Normalize(vmin=min(depth), vmax=max(depth))(depth))
+    colors = plt.get_cmap("YlOrRd")(mcolors.Normalize(vmin=depth.min(), vmax=depth.max())(depth))
 
     fig = plt.figure(figsize=(6, 6))
     ax = fig.add_subplot(111, polar=True)
-
-    def update(i):
-        ax.clear()
-        ax.set_title("Spiral Earthquake Timeline", va='bottom')
-        ax.set_rticks([])
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.grid(False)
-        ax.set_facecolor("black")
-
-        ax.scatter(angles[:i+1], radii[:i+1], 
-                   c=colors[:i+1], 
-                   s=mag[:i+1]**2, 
-                   alpha=0.8, edgecolors='white', linewidth=0.5)
-
-    ani = animation.FuncAnimation(fig, update, frames=frames, interval=interval, repeat=False)
-    ani.save(output_path, writer='pillow')
-    plt.close()
-    return output_path
-
-def create_shockwave_map_animation(df: pd.DataFrame, output_path=f"{OUTPUT_DIR}/shockwave.gif", max_frames=60):
+    ax.set_title("Spiral Earthquake Timeline", va='bottom')
+    ax.set_rticks([])
+    ax.set_xticks([])
+    ax.set_yticks([])
+    ax.grid(False)
+    ax.set_facecolor("black")
+    ax.set_ylim(0, max(radii.max(), 1) * 1.05)  # Fixed radial extent (no per-frame autoscaling)
+    points, update = _growing_scatter(ax, angles, radii, sizes=mag**2, colors=colors,
+                                      alpha=0.8, edgecolors='white', linewidth=0.5)
+
+    return save_animation(fig, frames, update, output_path, interval, artists=[points], accumulate=True, encoder=encoder)
+
+@traced(output_bytes=file_size)
+def create_shockwave_map_animation(df: pd.DataFrame | PreparedQuakes, output_path=f"{OUTPUT_DIR}/shockwave.gif", max_frames=60,
+                                   encoder=None, every_event=False):
     """
     Creates an animated shockwave map where each earthquake emits an expanding ripple.
     Circle size is based on magnitude, and it fades out after a few frames.
-    """
-    import numpy as np
 
-    df = df.dropna(subset=["Latitude", "Longitude", "Magnitude", "Time"])
-    df["Parsed_Time"] = pd.to_datetime(df["Time"], errors='coerce')
-    df = df.dropna(subset=["Parsed_Time"]).sort_values("Parsed_Time")
+    Ripple state lives in arrays (center, magnitude, birth frame); each frame
+    derives radius and alpha from the ripple's age and updates a single
+    EllipseCollection in place.
 
-    lat = df["Latitude"].values
-    lon = df["Longitude"].values
-    mag = df["Magnitude"].values
-    total = len(df)
+    Args:
+        every_event (bool, optional): Emit a ripple for every quake (each one at the frame
+                                      that reaches it) instead of one sampled quake per frame.
+    """
+    quakes = as_prepared(df)
+    rows = quakes.rows("time", require=("latitude", "longitude", "magnitude"))
+    if not _has_events(len(rows), "shockwave"):
+        return None
 
-    # Limit number of earthquakes shown if needed
-    step = max(1, total // max_frames)
-    indices = list(range(0, total, step))
-    interval = max(50, 10000 // len(indices))
+    lat = quakes.latitude[rows]
+    lon = quakes.longitude[rows]
+    mag = quakes.magnitude[rows]
+    total = len(rows)
+
+    indices, interval = get_dynamic_frames(total, max_frames)
+    if every_event:
+        sources = np.arange(total)
+        births = np.searchsorted(indices, sources)  # First frame reaching each quake
+    else:
+        sources = np.asarray(indices)
+        births = np.arange(len(indices))
+    centers = np.column_stack([lon[sources], lat[sources]])
+    growth = mag[sources] * SHOCKWAVE_GROWTH
 
     fig, ax = plt.subplots(figsize=(8, 6))
     ax.set_title("Shockwave Earthquake Animation")
@@ -299,101 +301,59 @@ def create_shockwave_map_animation(df: pd.DataFrame, output_path=f"{OUTPUT_DIR}/
     ax.set_ylim(lat.min() - lat_margin, lat.max() + lat_margin)
     ax.grid(True)
 
-    shockwaves = []
-
-    def update(i):
-        ax.clear()
-        ax.set_title("Shockwave Earthquake Animation")
-        ax.set_xlabel("Longitude")
-        ax.set_ylabel("Latitude")
-        ax.set_xlim(lon.min() - lon_margin, lon.max() + lon_margin)
-        ax.set_ylim(lat.min() - lat_margin, lat.max() + lat_margin)
-        ax.grid(True)
-
-        # Add the current quake as a new ripple
-        shockwaves.append({
-            "x": lon[indices[i]],
-            "y": lat[indices[i]],
-            "mag": mag[indices[i]],
-            "radius": 0,
-            "alpha": 1.0
-        })
-
-        # Animate all active shockwaves
-        next_waves = []
-        for wave in shockwaves:
-            radius = wave["radius"]
-            alpha = wave["alpha"]
-            if alpha > 0:
-                circle = plt.Circle((wave["x"], wave["y"]),
-                                    radius=radius,
-                                    edgecolor='orange',
-                                    facecolor='none',
-                                    lw=2,
-                                    alpha=alpha)
-                ax.add_patch(circle)
-                wave["radius"] += wave["mag"] * 0.2  # expand based on magnitude
-                wave["alpha"] -= 0.05  # fade out
-                next_waves.append(wave)
-        shockwaves[:] = next_waves
-
-    ani = animation.FuncAnimation(fig, update, frames=len(indices), interval=interval, repeat=False)
-    ani.save(output_path, writer='pillow')
-    plt.close()
-    return output_path
-
-def create_depth_strip_chart_animation(df: pd.DataFrame, output_path=f"{OUTPUT_DIR}/depth_strip.gif", max_frames=60):
+    rings = EllipseCollection([], [], [], units='xy', offsets=np.empty((0, 2)), offset_transform=ax.transData,
+                              facecolors='none', linewidths=2)
+    ax.add_collection(rings)
+    edge = np.array(mcolors.to_rgba('orange'))
+
+    def update(k, start, stop):
+        # Births are sorted, so the live ripples are one contiguous slice
+        live = slice(np.searchsorted(births, k - SHOCKWAVE_LIFETIME, side='right'), np.searchsorted(births, k, side='right'))
+        ages = k - births[live]
+        diameters = 2 * ages * growth[live]
+        colors = np.tile(edge, (len(ages), 1))
+        colors[:, 3] = 1.0 - SHOCKWAVE_FADE * ages
+        rings.set_offsets(centers[live])
+        rings.set_widths(diameters)
+        rings.set_heights(diameters)
+        rings.set_angles(np.zeros(len(ages)))
+        rings.set_edgecolor(colors)
+        return [rings]
+
+    return save_animation(fig, indices, update, output_path, interval, artists=[rings], encoder=encoder)
+
+@traced(output_bytes=file_size)
+def create_depth_strip_chart_animation(df: pd.DataFrame | PreparedQuakes, output_path=f"{OUTPUT_DIR}/depth_strip.gif", max_frames=60, encoder=None):
     """
     Creates an animated horizontal strip chart of earthquakes across depth layers over time.
     Y-axis: Depth category (shallow, intermediate, deep)
     X-axis: Time
     """
-    df = df.dropna(subset=["Time", "Depth (km)", "Magnitude"])
-    df["Parsed_Time"] = pd.to_datetime(df["Time"], errors='coerce')
-    df = df.dropna(subset=["Parsed_Time"]).sort_values("Parsed_Time")
-
-    # Categorize depth
-    def categorize_depth(depth):
-        if depth < 70:
-            return "Shallow (<70km)"
-        elif depth < 300:
-            return "Intermediate (70–300km)"
-        else:
-            return "Deep (>300km)"
-
-    df["Depth_Category"] = df["Depth (km)"].apply(categorize_depth)
-
-    categories = ["Shallow (<70km)", "Intermediate (70–300km)", "Deep (>300km)"]
+    quakes = as_prepared(df)
+    rows = quakes.rows("time", require=("depth", "magnitude"))
+    if not _has_events(len(rows), "depth strip"):
+        return None
+
+    # Depth category codes were computed once with np.digitize
+    categories = list(DEPTH_CATEGORIES)
     y_positions = {cat: i for i, cat in enumerate(categories)}
 
-    total = len(df)
-    step = max(1, total // max_frames)
-    frames = list(range(0, total, step))
-    interval = max(50, 10000 // len(frames))
+    frames, interval = get_dynamic_frames(len(rows), max_frames)
 
-    times = df["Parsed_Time"].values
-    magnitudes = df["Magnitude"].values
-    categories_seq = df["Depth_Category"].values
-    y_vals = [y_positions[c] for c in categories_seq]
+    times = mdates.date2num(quakes.time[rows])
+    magnitudes = quakes.magnitude[rows]
+    y_vals = quakes.depth_codes[rows]
 
     fig, ax = plt.subplots(figsize=(10, 4))
-
-    def update(i):
-        ax.clear()
-        ax.set_title("Earthquake Depth Strip Over Time")
-        ax.set_xlabel("Time")
-        ax.set_yticks(list(y_positions.values()))
-        ax.set_yticklabels(list(y_positions.keys()))
-        ax.set_xlim(times[0], times[-1])
-        ax.set_ylim(-0.5, len(categories) - 0.5)
-        ax.grid(True, axis='x', linestyle='--', alpha=0.3)
-
-        ax.scatter(times[:i+1], [y_positions[c] for c in categories_seq[:i+1]],
-                   s=magnitudes[:i+1]**2,
-                   color='purple', alpha=0.6, edgecolors='black')
-
-    ani = animation.FuncAnimation(fig, update, frames=frames, interval=interval, repeat=False)
-    ani.save(output_path, writer='pillow')
-    plt.close()
-    return output_path
-
+    ax.xaxis_date()
+    ax.set_title("Earthquake Depth Strip Over Time")
+    ax.set_xlabel("Time")
+    ax.set_yticks(list(y_positions.values()))
+    ax.set_yticklabels(list(y_positions.keys()))
+    ax.set_xlim(times[0], times[-1])
+    ax.set_ylim(-0.5, len(categories) - 0.5)
+    ax.grid(True, axis='x', linestyle='--', alpha=0.3)
+    points, update = _growing_scatter(ax, times, y_vals, sizes=magnitudes**2,
+                                      color='purple', alpha=0.6, edgecolors='black')
+
+    return save_animation(fig, frames, update, output_path, interval, artists=[points], accumulate=True, encoder=encoder)
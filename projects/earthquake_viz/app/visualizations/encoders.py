@@ -0,0 +1,134 @@
+import logging
+import shutil
+import subprocess
+from dataclasses import dataclass
+from typing import Callable
+import numpy as np
+from PIL import Image, features
+from app.config import settings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# encode(frames, output_path, interval_ms): writes RGB frames as one animation file
+EncodeFunction = Callable[[list[Image.Image], str, int], None]
+
+@dataclass(frozen=True)
+class AnimationEncoder:
+    """A named output format for chart animations."""
+    name: str
+    suffix: str
+    encode: EncodeFunction
+    available: Callable[[], bool] = lambda: True
+    fallback: str | None = None # Encoder used instead when this one is unavailable
+
+# --- GIF ---
+def _encode_gif(frames: list[Image.Image], output_path: str, interval: int) -> None:
+    """Plain Pillow GIF: every frame is quantized to its own palette."""
+    frames[0].save(output_path, format="GIF", save_all=True, append_images=frames[1:], duration=interval, loop=0)
+
+# Palette index reserved for "unchanged since the previous frame" in optimized GIFs
+_TRANSPARENT_INDEX = 255
+
+def _shared_palette(frames: list[Image.Image], colors: int = 255, samples: int = 8) -> Image.Image:
+    """One palette for the whole animation, built from a strip of sampled frames."""
+    picks = sorted({round(i) for i in np.linspace(0, len(frames) - 1, min(samples, len(frames)))})
+    width, height = frames[0].size
+    strip = Image.new("RGB", (width, height * len(picks)))
+    for row, index in enumerate(picks):
+        strip.paste(frames[index], (0, row * height))
+    return strip.quantize(colors=colors, method=Image.Quantize.MEDIANCUT)
+
+def _encode_gif_optimized(frames: list[Image.Image], output_path: str, interval: int) -> None:
+    """
+    GIF with one global palette and frame deltas.
+
+    Frames are mapped to a shared palette (no per-frame quantization), and
+    every pixel that is unchanged since the previous frame is replaced by a
+    reserved transparent index drawn over the kept previous frame, so a frame
+    that adds a few points costs a few pixels instead of a full image.
+    """
+    palette = _shared_palette(frames)
+    colors = palette.getpalette()[:3 * _TRANSPARENT_INDEX] + [0, 0, 0]
+    deltas = []
+    previous = None
+    for frame in frames:
+        indexed = np.asarray(frame.quantize(palette=palette, dither=Image.Dither.NONE))
+        delta = indexed.copy()
+        if previous is not None:
+            delta[indexed == previous] = _TRANSPARENT_INDEX
+        previous = indexed
+        image = Image.fromarray(delta, "P")
+        image.putpalette(colors)
+        deltas.append(image)
+    deltas[0].save(output_path, format="GIF", save_all=True, append_images=deltas[1:], duration=interval, loop=0,
+                   transparency=_TRANSPARENT_INDEX, disposal=1, optimize=False)
+
+# --- WebP / APNG ---
+def _encode_webp(frames: list[Image.Image], output_path: str, interval: int) -> None:
+    frames[0].save(output_path, format="WEBP", save_all=True, append_images=frames[1:], duration=interval, loop=0,
+                   quality=settings.CHART_WEBP_QUALITY, method=4)
+
+def _encode_apng(frames: list[Image.Image], output_path: str, interval: int) -> None:
+    frames[0].save(output_path, format="PNG", save_all=True, append_images=frames[1:], duration=interval, loop=0)
+
+# --- MP4 (ffmpeg) ---
+def ffmpeg_binary() -> str | None:
+    """Path of the ffmpeg executable, or None if it is not installed."""
+    return settings.FFMPEG_BINARY or shutil.which("ffmpeg")
+
+def _encode_mp4(frames: list[Image.Image], output_path: str, interval: int) -> None:
+    """H.264 MP4 (yuv420p, faststart) by piping raw RGB frames into ffmpeg."""
+    width, height = frames[0].size
+    command = [
+        ffmpeg_binary(), "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-framerate", f"{1000 / interval:.6f}",
+        "-i", "-",
+        "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", # yuv420p needs even dimensions
+        "-c:v", "libx264", "-preset", "medium", "-crf", str(settings.CHART_MP4_CRF),
+        "-pix_fmt", "yuv420p", "-movflags", "+faststart", "-f", "mp4", output_path,
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        for frame in frames:
+            process.stdin.write(frame.tobytes())
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+    stderr = process.stderr.read().decode(errors='replace')
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed: {stderr.strip()}")
+
+ENCODERS = {
+    "gif": AnimationEncoder("gif", ".gif", _encode_gif),
+    "gif_optimized": AnimationEncoder("gif_optimized", ".gif", _encode_gif_optimized),
+    "webp": AnimationEncoder("webp", ".webp", _encode_webp, lambda: features.check("webp"), fallback="gif_optimized"),
+    "apng": AnimationEncoder("apng", ".png", _encode_apng),
+    "mp4": AnimationEncoder("mp4", ".mp4", _encode_mp4, lambda: ffmpeg_binary() is not None, fallback="webp"),
+}
+
+def register_encoder(encoder: AnimationEncoder) -> None:
+    """Adds (or replaces) an encoder in the registry."""
+    ENCODERS[encoder.name] = encoder
+
+def resolve_encoder(name: str = None) -> AnimationEncoder:
+    """
+    Returns the encoder to actually use for `name`, following fallbacks for unavailable ones.
+
+    Args:
+        name (str, optional): Encoder name. Defaults to settings.CHART_ENCODER.
+
+    Returns:
+        AnimationEncoder: An available encoder (plain "gif" as the last resort).
+    """
+    name = name or settings.CHART_ENCODER
+    seen = set()
+    while name in ENCODERS and name not in seen:
+        seen.add(name)
+        encoder = ENCODERS[name]
+        if encoder.available():
+            return encoder
+        logging.info(f"Animation encoder '{name}' is unavailable; falling back to '{encoder.fallback}'.")
+        name = encoder.fallback
+    if name not in ENCODERS and name is not None:
+        logging.warning(f"Unknown animation encoder '{name}'; using 'gif'.")
+    return ENCODERS["gif"]
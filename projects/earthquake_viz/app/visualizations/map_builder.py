@@ -1,13 +1,24 @@
 import folium
+import json
 import logging
 import math
-from datetime import datetime
+import numpy as np
+from folium.template import Template
+from app.config import settings
+from app.core.instrumentation import span, traced
+from app.core.quake_columns import QuakeColumns, as_columns
+from app.core.quake_pyramid import PyramidLevel, QuakePyramid
+from app.visualizations.map_cache import MapHtmlCache, get_map_cache, map_cache_key
 # Optional: Use branca for colormaps if desired, requires installation
 # import branca.colormap as cm
+from folium.map import Layer
 from folium.plugins import MarkerCluster  # Import MarkerCluster plugin
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Part of the map HTML cache key: bump whenever the generated HTML changes
+MAP_HTML_VERSION = 2
+
 # --- Helper Functions for Styling ---
 
 def get_color_by_depth(depth):
@@ -32,27 +43,296 @@ def get_radius_by_magnitude(magnitude):
     # return 2 + magnitude * 2 # Linear scaling (adjust multiplier as needed)
     return math.pow(1.8, magnitude) if magnitude > 0 else 1 # Exponential scaling (adjust base)
 
+# Vectorized equivalents of the helpers above, for whole columns at once
+DEPTH_COLORS = ('yellow', 'orange', 'red')
+DEPTH_COLOR_EDGES = np.array([70.0, 300.0])
+
+def depth_color_codes(depths: np.ndarray) -> np.ndarray:
+    """Index into `DEPTH_COLORS` for each depth (same bands as `get_color_by_depth`)."""
+    return np.digitize(np.nan_to_num(depths, nan=0.0), DEPTH_COLOR_EDGES).astype(np.int8)
+
+def magnitude_radii(magnitudes: np.ndarray) -> np.ndarray:
+    """Marker radius for each magnitude (same scale as `get_radius_by_magnitude`)."""
+    mags = np.nan_to_num(magnitudes, nan=0.0)
+    return np.where(mags > 0, np.power(1.8, np.clip(mags, 0, None)), 1.0)
+
+def _js(values) -> str:
+    """JSON-encodes a value for inline <script> use."""
+    return json.dumps(values, separators=(',', ':'), allow_nan=False).replace('</', '<\\/')
+
+def _nullable(values: np.ndarray, decimals: int) -> list:
+    """Rounds a float column to a list, with NaN as None (JSON null)."""
+    rounded = np.round(values, decimals).astype(object)
+    rounded[np.isnan(values)] = None
+    return rounded.tolist()
+
+def _point_blob(quakes: QuakeColumns, decimals: int) -> str:
+    """Columnar JSON object with everything needed to draw and describe each event."""
+    return _js({
+        "lat": np.round(quakes.latitude, decimals).tolist(),
+        "lon": np.round(quakes.longitude, decimals).tolist(),
+        "radius": np.round(magnitude_radii(quakes.mag), 2).tolist(),
+        "color": depth_color_codes(quakes.depth).tolist(),
+        "mag": _nullable(quakes.mag, 2),
+        "depth": _nullable(quakes.depth, 2),
+        "place": quakes.place.tolist(),
+        "time": quakes.time_strings().tolist(),
+    })
+
+def _cell_blob(level: PyramidLevel, decimals: int) -> str:
+    """Columnar JSON object with the cells of one pyramid level."""
+    return _js({
+        "zoom": level.zoom,
+        "lat": np.round(level.latitude, decimals).tolist(),
+        "lon": np.round(level.longitude, decimals).tolist(),
+        "radius": np.round(np.minimum(4.0 + 2.5 * np.log2(level.count), 30.0), 1).tolist(),
+        "color": depth_color_codes(level.mean_depth).tolist(),
+        "count": level.count.tolist(),
+        "mag": _nullable(level.max_mag, 1),
+        "depth": _nullable(level.mean_depth, 1),
+    })
+
+# Shared client-side helpers: escaping plus lazy popup/tooltip builders for a point blob
+_POINT_JS = """
+                var colors = {{ this.colors }};
+                function esc(text) {
+                    return String(text).replace(/[&<>"']/g, function (c) {
+                        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                    });
+                }
+                function fmtNum(value, digits) { return value === null ? 'N/A' : value.toFixed(digits); }
+                function pointMarker(pts, i, options) {
+                    var marker = L.circleMarker([pts.lat[i], pts.lon[i]], L.extend({
+                        radius: pts.radius[i], color: colors[pts.color[i]], fill: true,
+                        fillColor: colors[pts.color[i]], fillOpacity: 0.7
+                    }, options));
+                    marker.bindPopup(function () {
+                        return '<b>Location:</b> ' + esc(pts.place[i]) + '<br>' +
+                               '<b>Time:</b> ' + esc(pts.time[i]) + '<br>' +
+                               '<b>Magnitude:</b> ' + (pts.mag[i] === null ? 'N/A' : pts.mag[i]) + '<br>' +
+                               '<b>Depth:</b> ' + (pts.depth[i] || 0).toFixed(2) + ' km';
+                    }, {maxWidth: 300});
+                    marker.bindTooltip(function () {
+                        return 'Mag: ' + (pts.mag[i] === null ? 'N/A' : pts.mag[i]) +
+                               ', Depth: ' + (pts.depth[i] || 0).toFixed(1) + 'km';
+                    });
+                    return marker;
+                }
+"""
+
+class QuakeClusterLayer(MarkerCluster):
+    """
+    Clustered circle markers drawn in the browser from one columnar data blob.
+
+    Instead of one CircleMarker + Popup element per event, all events are
+    shipped as parallel JSON arrays (coordinates, precomputed radius and depth
+    color, magnitude, depth, place, time) and a single script creates the
+    markers; popup and tooltip HTML is only built when opened.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){""" + _POINT_JS + """
+                var pts = {{ this.points }};
+                var cluster = L.markerClusterGroup({{ this.options|tojavascript }});
+                var markers = new Array(pts.lat.length);
+                for (var i = 0; i < pts.lat.length; i++) {
+                    markers[i] = pointMarker(pts, i, {});
+                }
+                cluster.addLayers(markers);
+                cluster.addTo({{ this._parent.get_name() }});
+                return cluster;
+            })();
+        {% endmacro %}""")
+
+    def __init__(self, quakes: QuakeColumns, name: str = None, decimals: int = settings.MAP_COORD_DECIMALS, **kwargs):
+        # Cluster groups with thousands of markers are built in chunks so the page stays responsive
+        kwargs.setdefault('chunked_loading', True)
+        super().__init__(name=name, **kwargs)
+        self._name = "QuakeClusterLayer"
+        self.colors = _js(list(DEPTH_COLORS))
+        self.points = _point_blob(quakes, decimals)
+
+class QuakePyramidLayer(Layer):
+    """
+    Zoom-dependent earthquake layer backed by a `QuakePyramid`.
+
+    Below `raw_zoom` the map shows the aggregated cells of the matching
+    pyramid level (count, max magnitude, mean depth); from `raw_zoom` on it
+    shows individual events, capped at the `point_budget` largest ones. Cells
+    and points are drawn on a canvas renderer and only the layer for the
+    current zoom exists in the browser, so cost is bounded by the grid and
+    the budget rather than by the number of events.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){""" + _POINT_JS + """
+                var map = {{ this._parent.get_name() }};
+                var levels = [{{ this.levels|join(',') }}];
+                var pts = {{ this.points }};
+                var rawZoom = {{ this.raw_zoom }};
+                var renderer = L.canvas();
+                var group = L.layerGroup();
+                var cache = {};
+                function cellLayer(level) {
+                    var layer = L.layerGroup();
+                    for (var i = 0; i < level.lat.length; i++) {
+                        L.circleMarker([level.lat[i], level.lon[i]], {
+                            renderer: renderer, radius: level.radius[i], color: colors[level.color[i]],
+                            weight: 1, fill: true, fillColor: colors[level.color[i]], fillOpacity: 0.5
+                        }).bindPopup(
+                            '<b>Events:</b> ' + level.count[i] + '<br>' +
+                            '<b>Max magnitude:</b> ' + fmtNum(level.mag[i], 1) + '<br>' +
+                            '<b>Mean depth:</b> ' + fmtNum(level.depth[i], 1) + ' km', {maxWidth: 300}
+                        ).bindTooltip(level.count[i] + (level.count[i] === 1 ? ' event' : ' events')).addTo(layer);
+                    }
+                    return layer;
+                }
+                function pointLayer() {
+                    var layer = L.layerGroup();
+                    for (var i = 0; i < pts.lat.length; i++) {
+                        pointMarker(pts, i, {renderer: renderer}).addTo(layer);
+                    }
+                    return layer;
+                }
+                function layerFor(zoom) {
+                    var key = 'raw';
+                    if (zoom < rawZoom && levels.length) {
+                        var k = 0;
+                        while (k + 1 < levels.length && levels[k + 1].zoom <= zoom) { k++; }
+                        key = k;
+                    }
+                    if (!(key in cache)) { cache[key] = key === 'raw' ? pointLayer() : cellLayer(levels[key]); }
+                    return cache[key];
+                }
+                function update() {
+                    var layer = layerFor(map.getZoom());
+                    if (!group.hasLayer(layer)) { group.clearLayers(); group.addLayer(layer); }
+                }
+                map.on('zoomend', update);
+                update();
+                {%- if this.note %}
+                var note = L.control({position: 'bottomright'});
+                note.onAdd = function () {
+                    var div = L.DomUtil.create('div');
+                    div.style.cssText = 'background: rgba(255,255,255,0.8); padding: 2px 6px; font-size: 12px;';
+                    div.innerHTML = {{ this.note }};
+                    return div;
+                };
+                note.addTo(map);
+                {%- endif %}
+                group.addTo(map);
+                return group;
+            })();
+        {% endmacro %}""")
+
+    def __init__(
+        self,
+        quakes: QuakeColumns,
+        pyramid: QuakePyramid = None,
+        name: str = None,
+        raw_zoom: int = settings.MAP_RAW_POINT_ZOOM,
+        point_budget: int = settings.MAP_POINT_BUDGET,
+        decimals: int = settings.MAP_COORD_DECIMALS,
+        **kwargs,
+        ):
+        super().__init__(name=name, **kwargs)
+        self._name = "QuakePyramidLayer"
+        pyramid = pyramid or QuakePyramid.build(quakes)
+        self.colors = _js(list(DEPTH_COLORS))
+        self.levels = [_cell_blob(level, decimals) for level in pyramid.levels]
+        self.raw_zoom = int(raw_zoom)
+
+        shown = quakes
+        self.note = None
+        if len(quakes) > point_budget:
+            # Keep the largest events for the zoomed-in point view
+            largest = np.argsort(np.nan_to_num(quakes.mag, nan=-np.inf), kind='stable')[::-1][:point_budget]
+            shown = quakes.take(np.sort(largest))
+            self.note = _js(f"Zoom {self.raw_zoom}+: showing the {point_budget:,} largest of {len(quakes):,} events")
+        self.points = _point_blob(shown, decimals)
+
+
+def _add_circle_markers(fmap: folium.Map, quakes: QuakeColumns) -> None:
+    """Adds one Folium CircleMarker (with popup and tooltip) per event to a MarkerCluster."""
+    marker_cluster = MarkerCluster(name="Earthquake Clusters").add_to(fmap)  # Create MarkerCluster layer
+
+    # Popup/tooltip fields are formatted for all events at once from the column buffers
+    times = quakes.time_strings()
+    mags = np.nan_to_num(quakes.mag, nan=0.0) # Default to 0 if missing
+    depths = np.nan_to_num(quakes.depth, nan=0.0)
+
+    for lon, lat, depth, mag, raw_mag, place, time_str, event_id in zip(
+            quakes.longitude.tolist(), quakes.latitude.tolist(), depths.tolist(), mags.tolist(),
+            quakes.mag.tolist(), quakes.place, times, quakes.ids):
+        try:
+            # Create Popup Content
+            popup_html = f"""
+            <b>Location:</b> {place}<br>
+            <b>Time:</b> {time_str}<br>
+            <b>Magnitude:</b> {'N/A' if math.isnan(raw_mag) else raw_mag}<br>
+            <b>Depth:</b> {depth:.2f} km
+            """
+            popup = folium.Popup(popup_html, max_width=300)
+
+            # Create CircleMarker
+            marker = folium.CircleMarker(
+                location=[lat, lon], # Folium uses [lat, lon]
+                radius=get_radius_by_magnitude(mag),
+                popup=popup,
+                tooltip=f"Mag: {'N/A' if math.isnan(raw_mag) else raw_mag}, Depth: {depth:.1f}km", # Tooltip on hover
+                color=get_color_by_depth(depth), # Outline color
+                fill=True,
+                fill_color=get_color_by_depth(depth), # Fill color
+                fill_opacity=0.7
+            )
+            marker.add_to(marker_cluster)  # Add marker to MarkerCluster
+
+        except Exception as e:
+            logging.error(f"Error processing feature {event_id}: {e}", exc_info=True) # Log traceback
+
+
+def _wrap_longitudes(quakes: QuakeColumns, west: float) -> QuakeColumns:
+    """Copy of `quakes` with longitudes west of `west` moved east by 360°, into a view starting at `west`."""
+    longitude = np.where(quakes.longitude < west, quakes.longitude + 360.0, quakes.longitude)
+    return QuakeColumns(**{name: getattr(quakes, name) for name in QuakeColumns.COLUMNS if name != "longitude"},
+                        longitude=longitude, metadata=dict(quakes.metadata))
+
 
 # --- Main Map Creation Function ---
 
-def create_earthquake_map(geojson_data: dict, center_on_bounds: list = None):
+@traced()
+def create_earthquake_map(geojson_data: dict | QuakeColumns, center_on_bounds: list = None,
+                          marker_mode: str = settings.MAP_MARKER_MODE, pyramid: QuakePyramid = None):
     """
     Creates a Folium map visualizing earthquake data from GeoJSON.
 
     Args:
-        geojson_data (dict): The parsed GeoJSON data from the API.
+        geojson_data (dict | QuakeColumns): The parsed GeoJSON data from the API, or the
+                                            columns already parsed from it.
         center_on_bounds (list, optional): Bounding box [min_lon, min_lat, max_lon, max_lat]
-                                           to center and fit the map. Defaults to None.
+                                           to center and fit the map; max_lon may exceed 180
+                                           for views across the antimeridian. Defaults to None.
+        marker_mode (str, optional): "fast" draws all events from one columnar data blob
+                                     (`QuakeClusterLayer`); "pyramid" draws pre-aggregated grid
+                                     cells that give way to points when zoomed in
+                                     (`QuakePyramidLayer`); "auto" picks "pyramid" above
+                                     settings.MAP_POINT_BUDGET events and "fast" otherwise;
+                                     "markers" creates one Folium CircleMarker per event.
+                                     Defaults to settings.MAP_MARKER_MODE.
+        pyramid (QuakePyramid, optional): Prebuilt aggregation pyramid for "pyramid" mode;
+                                          built from the events if omitted.
 
     Returns:
         folium.Map | None: The generated Folium map object, or None if data is invalid.
     """
-    if not geojson_data or 'features' not in geojson_data:
+    quakes = as_columns(geojson_data)
+    if quakes is None:
         logging.error("Invalid or empty GeoJSON data received.")
         return None
 
-    features = geojson_data['features']
-    logging.info(f"Generating map for {len(features)} earthquake features.")
+    logging.info(f"Generating map for {len(quakes)} earthquake features.")
 
     # --- Initialize Map ---
     map_center = [0, 0]
@@ -66,6 +346,11 @@ def create_earthquake_map(geojson_data: dict, center_on_bounds: list = None):
             if min_lon < max_lon and min_lat < max_lat:
                 map_center = [(min_lat + max_lat) / 2, (min_lon + max_lon) / 2]
                 # Zoom level estimation is tricky; fitting bounds is better
+                if max_lon > 180:
+                    # The view crosses the antimeridian (see geo_utils.view_bounds): Leaflet doesn't
+                    # repeat markers on the next world copy, so move events west of the view onto it
+                    quakes = _wrap_longitudes(quakes, min_lon)
+                    pyramid = None
             else:
                  logging.warning(f"Invalid bounds provided {center_on_bounds}, using default center.")
         except Exception as e:
@@ -88,66 +373,15 @@ def create_earthquake_map(geojson_data: dict, center_on_bounds: list = None):
 
 
     # --- Add Earthquake Markers using MarkerCluster ---
-    marker_cluster = MarkerCluster(name="Earthquake Clusters").add_to(fmap)  # Create MarkerCluster layer
-
-    for feature in features:
-        try:
-            properties = feature.get('properties', {})
-            geometry = feature.get('geometry', {})
-
-            if not properties or not geometry or geometry.get('type') != 'Point':
-                logging.warning(f"Skipping feature with missing properties/geometry or non-Point type: {feature.get('id')}")
-                continue
-
-            coords = geometry.get('coordinates', [])
-            if len(coords) < 2: # Need at least lon, lat
-                logging.warning(f"Skipping feature with invalid coordinates: {feature.get('id')}")
-                continue
-
-            # GeoJSON coordinates are [longitude, latitude, depth]
-            lon, lat = coords[0], coords[1]
-            # Depth might be the third element or sometimes missing
-            depth = coords[2] if len(coords) > 2 else 0
-
-            mag = properties.get('mag', 0) # Default to 0 if missing
-            place = properties.get('place', 'N/A')
-            time_epoch = properties.get('time') # Time is usually epoch milliseconds
-
-            # Format time for popup
-            time_str = "N/A"
-            if time_epoch:
-                try:
-                    # Convert milliseconds to seconds for datetime
-                    time_dt = datetime.utcfromtimestamp(time_epoch / 1000)
-                    time_str = time_dt.strftime('%Y-%m-%d %H:%M:%S UTC')
-                except Exception as e:
-                    logging.warning(f"Error formatting time {time_epoch}: {e}")
-                    time_str = f"Invalid Time ({time_epoch})"
-
-            # Create Popup Content
-            popup_html = f"""
-            <b>Location:</b> {place}<br>
-            <b>Time:</b> {time_str}<br>
-            <b>Magnitude:</b> {mag or 'N/A'}<br>
-            <b>Depth:</b> {depth:.2f} km
-            """
-            popup = folium.Popup(popup_html, max_width=300)
-
-            # Create CircleMarker
-            marker = folium.CircleMarker(
-                location=[lat, lon], # Folium uses [lat, lon]
-                radius=get_radius_by_magnitude(mag),
-                popup=popup,
-                tooltip=f"Mag: {mag}, Depth: {depth:.1f}km", # Tooltip on hover
-                color=get_color_by_depth(depth), # Outline color
-                fill=True,
-                fill_color=get_color_by_depth(depth), # Fill color
-                fill_opacity=0.7
-            )
-            marker.add_to(marker_cluster)  # Add marker to MarkerCluster
+    if marker_mode == "auto":
+        marker_mode = "pyramid" if len(quakes) > settings.MAP_POINT_BUDGET else "fast"
+    if marker_mode == "pyramid":
+        QuakePyramidLayer(quakes, pyramid=pyramid, name="Earthquake Density").add_to(fmap)
+    elif marker_mode == "fast":
+        QuakeClusterLayer(quakes, name="Earthquake Clusters").add_to(fmap)
+    else:
+        _add_circle_markers(fmap, quakes)
 
-        except Exception as e:
-            logging.error(f"Error processing feature {feature.get('id')}: {e}", exc_info=True) # Log traceback
 
     # Fit map to bounds if provided and valid
     if center_on_bounds and 'min_lat' in locals(): # Check if bounds were validly processed
@@ -181,4 +415,54 @@ def create_earthquake_map(geojson_data: dict, center_on_bounds: list = None):
     fmap.get_root().html.add_child(folium.Element(legend_html))
 
     logging.info("Map generation complete with marker clustering.")  # Updated log message
-    return fmap
\ No newline at end of file
+    return fmap
+
+def render_earthquake_map_html(geojson_data: dict | QuakeColumns, center_on_bounds: list = None,
+                               marker_mode: str = settings.MAP_MARKER_MODE, cache: MapHtmlCache = None) -> str | None:
+    """
+    Returns the map HTML for an event set, served from the map HTML cache when possible.
+
+    The cache key covers the event set's content fingerprint, the bounds, the
+    marker mode and the map settings, so re-displaying an unchanged result skips
+    both `create_earthquake_map` and `_repr_html_()`.
+
+    Args:
+        geojson_data (dict | QuakeColumns): The parsed GeoJSON data from the API, or the
+                                            columns already parsed from it.
+        center_on_bounds (list, optional): Bounding box to center and fit the map. Defaults to None.
+        marker_mode (str, optional): See `create_earthquake_map`.
+        cache (MapHtmlCache, optional): Cache to use. Defaults to the process-wide cache.
+
+    Returns:
+        str | None: The map HTML, or None if the map could not be generated.
+    """
+    quakes = as_columns(geojson_data)
+    if quakes is None:
+        logging.error("Invalid or empty GeoJSON data received.")
+        return None
+
+    cache = cache or get_map_cache()
+    key = map_cache_key(
+        quakes,
+        version=MAP_HTML_VERSION,
+        bounds=list(center_on_bounds) if center_on_bounds else None,
+        marker_mode=marker_mode,
+        decimals=settings.MAP_COORD_DECIMALS,
+        point_budget=settings.MAP_POINT_BUDGET,
+        raw_zoom=settings.MAP_RAW_POINT_ZOOM,
+        aggregate_zooms=[settings.MAP_AGGREGATE_MIN_ZOOM, settings.MAP_AGGREGATE_MAX_ZOOM],
+        cell_budget=settings.MAP_CELL_BUDGET,
+    )
+    map_html = cache.get(key)
+    if map_html is not None:
+        logging.info(f"Map HTML cache hit ({key}).")
+        return map_html
+
+    fmap = create_earthquake_map(quakes, center_on_bounds=center_on_bounds, marker_mode=marker_mode)
+    if fmap is None:
+        return None
+    with span("map_builder.repr_html", events=len(quakes)) as current:
+        map_html = fmap._repr_html_()
+        current.output_bytes = len(map_html.encode())
+    cache.put(key, map_html)
+    return map_html
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from app.config import settings
+from app.core.quake_columns import QuakeColumns
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def map_cache_key(quakes: QuakeColumns, **params) -> str:
+    """
+    Content address of a rendered map: the event set's fingerprint plus bounds and style parameters.
+
+    Args:
+        quakes (QuakeColumns): Events drawn on the map.
+        **params: Everything else that affects the HTML (bounds, marker mode, ...).
+                  Values must be JSON-serialisable.
+
+    Returns:
+        str: Hex digest used as the cache key.
+    """
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.blake2b(f"{quakes.fingerprint()}|{payload}".encode(), digest_size=16).hexdigest()
+
+class MapHtmlCache:
+    """
+    Size-bounded LRU of rendered map HTML, with an optional on-disk tier.
+
+    The memory tier holds up to `max_bytes` of HTML and evicts least recently
+    used entries. With `disk_dir` set, entries are also written there (atomically)
+    so they survive restarts and memory evictions; the directory is trimmed
+    oldest-first to `disk_max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = settings.MAP_HTML_CACHE_MAX_BYTES, disk_dir: str | None = None,
+                 disk_max_bytes: int = settings.MAP_HTML_CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.html")
+
+    def get(self, key: str) -> str | None:
+        """Returns cached HTML for `key` (memory first, then disk), or None."""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+        html = self._read_disk(key)
+        with self._lock:
+            if html is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._put_memory(key, html)
+        return html
+
+    def put(self, key: str, html: str) -> None:
+        """Stores HTML under `key` in memory and, if enabled, on disk."""
+        self._put_memory(key, html)
+        self._write_disk(key, html)
+
+    def _put_memory(self, key: str, html: str) -> None:
+        size = len(html)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = html
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _read_disk(self, key: str) -> str | None:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                html = f.read()
+            os.utime(path) # Mark as recently used for disk trimming
+            return html
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.warning(f"Could not read cached map {path}: {e}")
+            return None
+
+    def _write_disk(self, key: str, html: str) -> None:
+        if not self.disk_dir:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(html)
+                os.replace(tmp_path, self._disk_path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._trim_disk()
+        except (OSError, UnicodeError) as e:
+            logging.warning(f"Could not write cached map for {key}: {e}")
+
+    def _trim_disk(self) -> None:
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".html"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        """Hit/miss counters and memory usage."""
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_map_cache() -> MapHtmlCache:
+    """Returns the process-wide map HTML cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            disk_dir = settings.MAP_HTML_CACHE_DIR if settings.MAP_HTML_CACHE_DISK else None
+            _default_cache = MapHtmlCache(disk_dir=disk_dir)
+        return _default_cache
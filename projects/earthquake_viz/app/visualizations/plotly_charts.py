@@ -0,0 +1,252 @@
+import logging
+import numpy as np
+import pandas as pd
+from app.visualizations.chart_builder import SHOCKWAVE_FADE, SHOCKWAVE_GROWTH, SHOCKWAVE_LIFETIME, get_dynamic_frames
+from app.visualizations.prepared_quakes import DEPTH_CATEGORIES, PreparedQuakes, as_prepared
+
+# Optional: the client-side backend is only used when plotly is installed
+try:
+    import plotly.graph_objects as go
+except ImportError:
+    go = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def is_available() -> bool:
+    """True if plotly is installed."""
+    return go is not None
+
+# --- Core Animation Helpers ---
+def _segments(frames: list[int]) -> list[tuple[int, int]]:
+    """Item ranges [start, stop) first shown by each frame (frame k shows items up to frames[k])."""
+    stops = np.asarray(frames) + 1
+    starts = np.concatenate(([0], stops[:-1]))
+    return list(zip(starts.tolist(), stops.tolist()))
+
+def _animation_controls(names: list[str], interval: int, redraw: bool, seek_frames) -> dict:
+    """Play/pause buttons and a frame slider; `seek_frames(k)` lists the frames to apply to show frame k."""
+    play = {"frame": {"duration": interval, "redraw": redraw}, "transition": {"duration": 0},
+            "fromcurrent": False, "mode": "immediate"}
+    seek = {"frame": {"duration": 0, "redraw": redraw}, "transition": {"duration": 0}, "mode": "immediate"}
+    return {
+        "updatemenus": [{
+            "type": "buttons", "showactive": False, "direction": "left",
+            "x": 0, "y": -0.15, "xanchor": "left", "yanchor": "top",
+            "buttons": [
+                {"label": "▶", "method": "animate", "args": [None, play]},
+                {"label": "⏸", "method": "animate", "args": [[None], seek]},
+            ],
+        }],
+        "sliders": [{
+            "x": 0.1, "len": 0.9, "y": -0.1, "yanchor": "top",
+            "currentvalue": {"visible": False},
+            "steps": [{"label": "", "method": "animate", "args": [seek_frames(k), seek]} for k in range(len(names))],
+        }],
+    }
+
+def _growing_figure(make_trace, frames: list[int], interval: int, layout: dict) -> "go.Figure":
+    """
+    Animation that only ever adds items, shipped as per-frame deltas.
+
+    Every item is sent once: the items first shown by frame k form trace k
+    (hidden until then), and frame k only switches that trace on. Frame 0
+    resets the visibility of all traces, so playing restarts cleanly and the
+    slider seeks to frame k by replaying frames 0..k without any transition.
+
+    Args:
+        make_trace (Callable[[int, int], go.BaseTraceType]): Builds the trace for items [start, stop).
+        frames (list[int]): Increasing item indices; frame k shows items up to frames[k].
+        interval (int): Milliseconds per frame.
+        layout (dict): Figure layout (titles, fixed axis ranges).
+
+    Returns:
+        go.Figure: Figure with one trace and one frame per animation step.
+    """
+    traces = []
+    for k, (start, stop) in enumerate(_segments(frames)):
+        trace = make_trace(start, stop)
+        trace.update(visible=(k == 0), showlegend=False, hoverinfo="skip")
+        traces.append(trace)
+
+    names = [str(k) for k in range(len(traces))]
+    plotly_frames = [go.Frame(name=names[0], data=[{"visible": k == 0} for k in range(len(traces))],
+                              traces=list(range(len(traces))))]
+    plotly_frames += [go.Frame(name=names[k], data=[{"visible": True}], traces=[k]) for k in range(1, len(traces))]
+
+    fig = go.Figure(data=traces, frames=plotly_frames)
+    fig.update_layout(**layout, **_animation_controls(names, interval, False, lambda k: names[:k + 1]))
+    return fig
+
+def _area_to_size(area: np.ndarray) -> np.ndarray:
+    """Matplotlib scatter areas (pt²) to Plotly marker diameters (px)."""
+    return (np.sqrt(area) * 4 / 3).astype(np.float32)
+
+def _epoch_ms(values: np.ndarray) -> np.ndarray:
+    """datetime64 values as epoch milliseconds (Plotly date axes read numbers as ms)."""
+    return values.astype("datetime64[ms]").astype(np.int64).astype(np.float64)
+
+def _has_events(count: int, chart: str) -> bool:
+    """Guards chart builders against empty inputs and a missing plotly install."""
+    if go is None:
+        logging.error("plotly is not installed; client-side charts are unavailable.")
+        return False
+    if count == 0:
+        logging.warning(f"No usable events for the {chart} chart; skipping.")
+        return False
+    return True
+
+# --- Cumulative Time Series ---
+def create_cumulative_time_series(df: pd.DataFrame | PreparedQuakes, max_frames=60) -> "go.Figure | None":
+    """Creates a client-side animated cumulative time series chart of earthquakes per day."""
+    quakes = as_prepared(df)
+    if not _has_events(len(quakes.daily_dates), "cumulative time series"):
+        return None
+
+    x = _epoch_ms(quakes.daily_dates)
+    values = quakes.cumulative_counts
+    frames, interval = get_dynamic_frames(len(x), max_frames)
+
+    def make_trace(start, stop):
+        # Start one point back so each segment joins the line drawn so far
+        begin = max(start - 1, 0)
+        return go.Scatter(x=x[begin:stop], y=values[begin:stop], mode="lines+markers",
+                          line={"color": "dodgerblue"}, marker={"color": "dodgerblue"})
+
+    return _growing_figure(make_trace, frames, interval, {
+        "title": "Cumulative Earthquakes Over Time",
+        "xaxis": {"title": "Date", "type": "date", "range": [x[0], x[-1]]},
+        "yaxis": {"title": "Total Earthquakes", "range": [0, values.max() + 5]},
+    })
+
+# --- Magnitude vs Depth ---
+def create_magnitude_depth_scatter(df: pd.DataFrame | PreparedQuakes, max_frames=60) -> "go.Figure | None":
+    """Creates a client-side animated scatter plot of Magnitude vs. Depth."""
+    quakes = as_prepared(df)
+    rows = quakes.rows("magnitude", require=("depth",))  # Ordered by magnitude
+    if not _has_events(len(rows), "magnitude vs depth"):
+        return None
+
+    x = quakes.magnitude[rows].astype(np.float32)
+    y = quakes.depth[rows].astype(np.float32)
+    frames, interval = get_dynamic_frames(len(x), max_frames)
+
+    def make_trace(start, stop):
+        return go.Scatter(x=x[start:stop], y=y[start:stop], mode="markers",
+                          marker={"color": "crimson", "opacity": 0.6, "size": 8, "line": {"color": "black", "width": 1}})
+
+    return _growing_figure(make_trace, frames, interval, {
+        "title": "Magnitude vs. Depth",
+        "xaxis": {"title": "Magnitude", "range": [0, 10]},
+        "yaxis": {"title": "Depth (km)", "range": [float(y.max()) + 10, 0]},  # Shallow at top
+    })
+
+# --- Spiral Timeline ---
+def create_spiral_timeline(df: pd.DataFrame | PreparedQuakes, max_frames=60) -> "go.Figure | None":
+    """Creates a client-side spiral animation where angle = time, radius = magnitude, color = depth."""
+    quakes = as_prepared(df)
+    rows = quakes.rows("time", require=("magnitude", "depth"))
+    if not _has_events(len(rows), "spiral timeline"):
+        return None
+
+    mag = quakes.magnitude[rows]
+    depth = quakes.depth[rows].astype(np.float32)
+    total = len(rows)
+    frames, interval = get_dynamic_frames(total, max_frames)
+
+    theta = np.linspace(0, 720, total, dtype=np.float32)  # 2 full spiral turns
+    radii = (mag * 5).astype(np.float32)  # Stretch radius
+    sizes = _area_to_size(mag**2)
+    color_range = {"cmin": float(depth.min()), "cmax": float(depth.max()), "colorscale": "YlOrRd"}
+
+    def make_trace(start, stop):
+        return go.Scatterpolar(theta=theta[start:stop], r=radii[start:stop], mode="markers",
+                               marker={"color": depth[start:stop], "size": sizes[start:stop], "opacity": 0.8,
+                                       "line": {"color": "white", "width": 0.5}, **color_range})
+
+    return _growing_figure(make_trace, frames, interval, {
+        "title": "Spiral Earthquake Timeline",
+        "polar": {
+            "bgcolor": "black",
+            "radialaxis": {"range": [0, max(float(radii.max()), 1) * 1.05], "visible": False},
+            "angularaxis": {"visible": False},
+        },
+    })
+
+# --- Depth Strip ---
+def create_depth_strip_chart_animation(df: pd.DataFrame | PreparedQuakes, max_frames=60) -> "go.Figure | None":
+    """Creates a client-side animated strip chart of earthquakes across depth layers over time."""
+    quakes = as_prepared(df)
+    rows = quakes.rows("time", require=("depth", "magnitude"))
+    if not _has_events(len(rows), "depth strip"):
+        return None
+
+    frames, interval = get_dynamic_frames(len(rows), max_frames)
+    times = _epoch_ms(quakes.time[rows])
+    sizes = _area_to_size(quakes.magnitude[rows]**2)
+    y_vals = quakes.depth_codes[rows]
+
+    def make_trace(start, stop):
+        return go.Scatter(x=times[start:stop], y=y_vals[start:stop], mode="markers",
+                          marker={"color": "purple", "opacity": 0.6, "size": sizes[start:stop],
+                                  "line": {"color": "black", "width": 1}})
+
+    return _growing_figure(make_trace, frames, interval, {
+        "title": "Earthquake Depth Strip Over Time",
+        "xaxis": {"title": "Time", "type": "date", "range": [times[0], times[-1]],
+                  "showgrid": True, "griddash": "dash"},
+        "yaxis": {"tickvals": list(range(len(DEPTH_CATEGORIES))), "ticktext": list(DEPTH_CATEGORIES),
+                  "range": [-0.5, len(DEPTH_CATEGORIES) - 0.5], "showgrid": False},
+    })
+
+# --- Shockwave ---
+def create_shockwave_map_animation(df: pd.DataFrame | PreparedQuakes, max_frames=60) -> "go.Figure | None":
+    """
+    Creates a client-side shockwave map where each sampled earthquake emits an expanding ripple.
+
+    Ripples are circle shapes in data coordinates; each frame carries only the
+    ripples alive in it (at most SHOCKWAVE_LIFETIME), not the whole history.
+    """
+    quakes = as_prepared(df)
+    rows = quakes.rows("time", require=("latitude", "longitude", "magnitude"))
+    if not _has_events(len(rows), "shockwave"):
+        return None
+
+    lat = quakes.latitude[rows]
+    lon = quakes.longitude[rows]
+    mag = quakes.magnitude[rows]
+    indices, interval = get_dynamic_frames(len(rows), max_frames)
+    indices = np.asarray(indices)
+
+    def ripples(k):
+        ages = np.arange(min(k + 1, SHOCKWAVE_LIFETIME))
+        source = indices[k - ages]
+        radii = ages * mag[source] * SHOCKWAVE_GROWTH
+        return [{
+            "type": "circle", "xref": "x", "yref": "y",
+            "x0": round(lon[i] - r, 3), "x1": round(lon[i] + r, 3),
+            "y0": round(lat[i] - r, 3), "y1": round(lat[i] + r, 3),
+            "line": {"color": "orange", "width": 2}, "opacity": round(1 - SHOCKWAVE_FADE * age, 2),
+        } for i, r, age in zip(source.tolist(), radii.tolist(), ages.tolist())]
+
+    names = [str(k) for k in range(len(indices))]
+    fig = go.Figure(
+        data=[go.Scatter(x=[], y=[], mode="markers", showlegend=False)],
+        frames=[go.Frame(name=name, layout={"shapes": ripples(k)}) for k, name in enumerate(names)],
+    )
+    fig.update_layout(
+        title="Shockwave Earthquake Animation",
+        xaxis={"title": "Longitude", "range": [lon.min() - 2, lon.max() + 2]},
+        yaxis={"title": "Latitude", "range": [lat.min() - 2, lat.max() + 2]},
+        shapes=ripples(0),
+        **_animation_controls(names, interval, True, lambda k: [names[k]]),
+    )
+    return fig
+
+# Chart key (as in render_scheduler.CHART_FUNCTIONS) -> client-side builder
+PLOTLY_CHARTS = {
+    "cumulative": create_cumulative_time_series,
+    "magnitude_depth": create_magnitude_depth_scatter,
+    "shockwave": create_shockwave_map_animation,
+    "spiral": create_spiral_timeline,
+    "depth_strip": create_depth_strip_chart_animation,
+}
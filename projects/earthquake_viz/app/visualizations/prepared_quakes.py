@@ -0,0 +1,148 @@
+import hashlib
+import logging
+from dataclasses import dataclass, field, fields
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Depth zones used by the depth strip chart: codes 0/1/2 from np.digitize
+DEPTH_EDGES = np.array([70.0, 300.0])
+DEPTH_CATEGORIES = ("Shallow (<70km)", "Intermediate (70–300km)", "Deep (>300km)")
+
+def _frozen(values: np.ndarray) -> np.ndarray:
+    values.setflags(write=False)
+    return values
+
+@dataclass(frozen=True)
+class PreparedQuakes:
+    """
+    Chart-ready, immutable view of an earthquake DataFrame.
+
+    Parses timestamps, sorts and aggregates once per dataset so every
+    `chart_builder` animation can slice the same arrays instead of repeating
+    dropna / to_datetime / sort_values on (and mutating) the caller's frame.
+    """
+    time: np.ndarray            # datetime64[ns] (UTC, naive), NaT when missing
+    magnitude: np.ndarray       # float64, NaN when missing
+    depth: np.ndarray           # float64, NaN when missing
+    latitude: np.ndarray        # float64
+    longitude: np.ndarray       # float64
+    by_time: np.ndarray         # row indices with a valid time, oldest first
+    by_magnitude: np.ndarray    # row indices with a valid magnitude, smallest first
+    by_depth: np.ndarray        # row indices with a valid depth, shallowest first
+    depth_codes: np.ndarray     # int8 index into DEPTH_CATEGORIES (-1 when depth is missing)
+    daily_dates: np.ndarray     # datetime64[D] days with at least one event
+    daily_counts: np.ndarray    # events per day in `daily_dates`
+    cumulative_counts: np.ndarray
+    _fingerprint: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "PreparedQuakes":
+        """
+        Builds the prepared arrays from an event table produced by `geojson_to_dataframe`.
+
+        Args:
+            df (pd.DataFrame): Event table (Time may be datetime64 or strings).
+
+        Returns:
+            PreparedQuakes: Immutable prepared arrays.
+        """
+        def column(name):
+            if name not in df.columns:
+                return np.full(len(df), np.nan)
+            return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+        if "Time" in df.columns:
+            parsed = pd.to_datetime(df["Time"], errors='coerce', utc=True)
+            time = parsed.dt.tz_localize(None).to_numpy(dtype='datetime64[ns]')
+        else:
+            time = np.full(len(df), np.datetime64('NaT'), dtype='datetime64[ns]')
+        magnitude = column("Magnitude")
+        depth = column("Depth (km)")
+
+        valid_time = np.flatnonzero(~np.isnat(time))
+        by_time = valid_time[np.argsort(time[valid_time], kind='stable')]
+        valid_mag = np.flatnonzero(np.isfinite(magnitude))
+        by_magnitude = valid_mag[np.argsort(magnitude[valid_mag], kind='stable')]
+        valid_depth = np.flatnonzero(np.isfinite(depth))
+        by_depth = valid_depth[np.argsort(depth[valid_depth], kind='stable')]
+
+        depth_codes = np.digitize(np.nan_to_num(depth, nan=0.0), DEPTH_EDGES).astype(np.int8)
+        depth_codes[np.isnan(depth)] = -1
+
+        daily_dates, daily_counts = np.unique(time[by_time].astype('datetime64[D]'), return_counts=True)
+
+        prepared = cls(
+            time=_frozen(time),
+            magnitude=_frozen(magnitude),
+            depth=_frozen(depth),
+            latitude=_frozen(column("Latitude")),
+            longitude=_frozen(column("Longitude")),
+            by_time=_frozen(by_time),
+            by_magnitude=_frozen(by_magnitude),
+            by_depth=_frozen(by_depth),
+            depth_codes=_frozen(depth_codes),
+            daily_dates=_frozen(daily_dates),
+            daily_counts=_frozen(daily_counts),
+            cumulative_counts=_frozen(np.cumsum(daily_counts)),
+        )
+        logging.info(f"Prepared {len(prepared)} events for charting ({len(by_time)} with valid times).")
+        return prepared
+
+    @classmethod
+    def array_fields(cls) -> list[str]:
+        """Names of the array fields (everything passed to the constructor)."""
+        return [f.name for f in fields(cls) if f.init]
+
+    def fingerprint(self) -> str:
+        """
+        Content hash of every prepared array, computed once per instance.
+
+        Returns:
+            str: Hex digest.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for name in self.array_fields():
+                values = getattr(self, name)
+                digest.update(f"{name}:{values.dtype.str}:{values.shape};".encode())
+                digest.update(np.ascontiguousarray(values).tobytes())
+            object.__setattr__(self, '_fingerprint', digest.hexdigest()) # Frozen dataclass: memo only
+        return self._fingerprint
+
+    def rows(self, order: str = "input", require: tuple = ()) -> np.ndarray:
+        """
+        Row indices in the requested order, keeping only rows where `require` fields are present.
+
+        Args:
+            order (str): "input" (table order), "time" (oldest first), "magnitude" (smallest first)
+                         or "depth" (shallowest first).
+            require (tuple): Field names ("magnitude", "depth", "latitude", "longitude") that must be finite.
+
+        Returns:
+            np.ndarray: Integer row indices.
+        """
+        if order == "time":
+            indices = self.by_time
+        elif order == "magnitude":
+            indices = self.by_magnitude
+        elif order == "depth":
+            indices = self.by_depth
+        else:
+            indices = np.arange(len(self))
+        if require:
+            mask = np.ones(len(indices), dtype=bool)
+            for name in require:
+                mask &= np.isfinite(getattr(self, name)[indices])
+            indices = indices[mask]
+        return indices
+
+def as_prepared(data: pd.DataFrame | PreparedQuakes) -> PreparedQuakes:
+    """Returns `data` if already prepared, otherwise prepares the DataFrame."""
+    if isinstance(data, PreparedQuakes):
+        return data
+    return PreparedQuakes.from_dataframe(data)
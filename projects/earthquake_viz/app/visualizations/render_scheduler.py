@@ -0,0 +1,306 @@
+import gc
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator
+import numpy as np
+from app.config import settings
+from app.core import instrumentation
+from app.visualizations import chart_builder
+from app.visualizations.artifact_cache import ChartArtifactCache, artifact_key
+from app.visualizations.encoders import AnimationEncoder, resolve_encoder
+from app.visualizations.prepared_quakes import PreparedQuakes
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Chart key -> chart_builder function, in display order
+CHART_FUNCTIONS = {
+    "magnitude": "create_magnitude_histogram_animation",
+    "depth": "create_depth_histogram_animation",
+    "timeseries": "create_time_series_animation",
+    "locations": "create_location_animation",
+    "cumulative": "create_cumulative_time_series",
+    "magnitude_depth": "create_magnitude_depth_scatter",
+    "spread": "create_location_scatter_animation",
+    "shockwave": "create_shockwave_map_animation",
+    "spiral": "create_spiral_timeline",
+    "depth_strip": "create_depth_strip_chart_animation",
+}
+
+# Part of every chart's cache key: bump whenever chart output changes
+CHART_RENDER_VERSION = 1
+
+_ALIGN = 64 # Byte alignment of each array inside the shared block
+
+# --- Shipping PreparedQuakes to workers ---
+def _share(prepared: PreparedQuakes) -> tuple[SharedMemory, list]:
+    """Copies every PreparedQuakes array into one shared memory block; returns it with its layout."""
+    arrays = [(name, getattr(prepared, name)) for name in PreparedQuakes.array_fields()]
+    size = sum(-(-a.nbytes // _ALIGN) * _ALIGN for _, a in arrays)
+    shm = SharedMemory(create=True, size=max(size, 1))
+    layout = []
+    offset = 0
+    for name, values in arrays:
+        np.ndarray(values.shape, values.dtype, buffer=shm.buf, offset=offset)[...] = values
+        layout.append((name, values.dtype.str, values.shape, offset))
+        offset += -(-values.nbytes // _ALIGN) * _ALIGN
+    return shm, layout
+
+class _SharedBlock:
+    """
+    Reference count on a shared block: the block is unlinked once its creator
+    and every render submitted with it are done, so renders that other callers
+    await keep their data even if the caller that shared it goes away first.
+    """
+
+    def __init__(self, shm: SharedMemory):
+        self.shm = shm
+        self._refs = 1 # The creating call
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._refs += 1
+
+    def release(self, *_) -> None:
+        with self._lock:
+            self._refs -= 1
+            if self._refs:
+                return
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+def _attach(shm_name: str, layout: list) -> tuple[SharedMemory, PreparedQuakes]:
+    """Maps a shared block back into a read-only, zero-copy PreparedQuakes."""
+    # Workers share the parent's resource tracker, so attaching doesn't transfer ownership:
+    # the parent unlinks the block once every render submitted with it is done
+    shm = SharedMemory(name=shm_name)
+    arrays = {}
+    for name, dtype, shape, offset in layout:
+        view = np.ndarray(tuple(shape), np.dtype(dtype), buffer=shm.buf, offset=offset)
+        view.setflags(write=False)
+        arrays[name] = view
+    return shm, PreparedQuakes(**arrays)
+
+def _render_chart(prepared: PreparedQuakes, key: str, artifact: str, cache: ChartArtifactCache,
+                  encoder: AnimationEncoder) -> str | None:
+    """Renders one chart into the artifact cache (or returns the cached file)."""
+    render = getattr(chart_builder, CHART_FUNCTIONS[key])
+    with instrumentation.span("chart.produce", chart=key, encoder=encoder.name) as current:
+        path = cache.produce(artifact, lambda path: render(prepared, output_path=path, encoder=encoder.name),
+                             suffix=encoder.suffix)
+        current.output_bytes = instrumentation.file_size(path)
+    return path
+
+# --- Worker side ---
+_worker_data = {}
+
+def _init_worker() -> None:
+    import matplotlib
+    matplotlib.use("Agg", force=True) # Headless, raster-only backend
+
+def _render_in_worker(key: str, artifact: str, cache: ChartArtifactCache, encoder: str,
+                      shm_name: str, layout: list, run_id: str = None) -> tuple[str | None, list[dict]]:
+    """Renders one chart in a pool worker; returns its path and the spans measured doing so."""
+    recorder = instrumentation.start_recording()
+    recorder.run_id = run_id or recorder.run_id # Log lines join the requesting run's
+    if _worker_data.get("name") != shm_name:
+        # New dataset: release the previous mapping first
+        previous = _worker_data.pop("shm", None)
+        _worker_data.clear()
+        gc.collect()
+        if previous is not None:
+            try:
+                previous.close()
+            except BufferError:
+                pass
+        shm, prepared = _attach(shm_name, layout)
+        _worker_data.update(name=shm_name, shm=shm, prepared=prepared)
+    path = _render_chart(_worker_data["prepared"], key, artifact, cache, resolve_encoder(encoder))
+    return path, [span.to_dict() for span in recorder.spans]
+
+# --- Scheduler ---
+_pool = None
+_pool_lock = threading.Lock()
+_inflight = {} # (cache directory, artifact key) -> Future of the worker render producing it
+_inflight_lock = threading.Lock()
+_in_process_lock = threading.Lock() # pyplot's figure manager is global and not thread-safe
+
+def _pool_size() -> int:
+    workers = settings.CHART_RENDER_WORKERS
+    return (os.cpu_count() or 1) if workers is None else workers
+
+def get_render_pool() -> ProcessPoolExecutor | None:
+    """Returns the shared chart rendering pool (None when rendering in-process)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None and _pool_size() > 0:
+            _pool = ProcessPoolExecutor(
+                max_workers=min(_pool_size(), len(CHART_FUNCTIONS)),
+                mp_context=multiprocessing.get_context(settings.CHART_RENDER_START_METHOD),
+                initializer=_init_worker,
+            )
+        return _pool
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _render_in_process(prepared: PreparedQuakes, keys: list[str], artifacts: dict, cache: ChartArtifactCache,
+                       encoder: AnimationEncoder) -> Iterator[tuple[str, str | None]]:
+    """Renders charts one at a time in this process; renders from other threads wait their turn."""
+    for key in keys:
+        try:
+            with _in_process_lock:
+                path = _render_chart(prepared, key, artifacts[key], cache, encoder)
+        except Exception as e:
+            logging.error(f"Chart '{key}' failed: {e}", exc_info=True)
+            path = None
+        yield key, path
+
+def _submit(pool: ProcessPoolExecutor, key: str, artifact: str, cache: ChartArtifactCache, block: _SharedBlock,
+            *args) -> Future:
+    """Submits a worker render reading `block`, or returns the in-flight future already producing this artifact."""
+    target = (os.path.abspath(cache.directory), artifact)
+    with _inflight_lock:
+        future = _inflight.get(target)
+        if future is not None:
+            return future
+        block.acquire()
+        try:
+            future = pool.submit(_render_in_worker, key, artifact, cache, *args)
+        except Exception:
+            block.release()
+            raise
+        _inflight[target] = future
+    future.add_done_callback(lambda done: _forget(target, done))
+    future.add_done_callback(block.release)
+    return future
+
+def _forget(target: tuple, future: Future) -> None:
+    with _inflight_lock:
+        if _inflight.get(target) is future:
+            del _inflight[target]
+
+def render_charts(prepared: PreparedQuakes, keys: list[str] = None, cache: ChartArtifactCache = None,
+                  encoder: str = None, max_parallel: int = None) -> Iterator[tuple[str, str | None]]:
+    """
+    Renders chart animations in parallel, yielding each one as soon as it is done.
+
+    Charts already in the artifact cache (same data fingerprint, chart, encoder
+    and render version) are returned immediately without rendering, and charts
+    another caller is already rendering are awaited instead of rendered twice.
+    The rest are submitted in order to a process pool (Agg backend); the
+    prepared arrays are copied once into a shared memory block that workers map
+    read-only, instead of pickling the data into every job. Falls back to
+    rendering in this process if the pool is disabled or breaks.
+
+    Args:
+        prepared (PreparedQuakes): Prepared chart data.
+        keys (list[str], optional): Chart keys from CHART_FUNCTIONS. Defaults to all charts.
+        cache (ChartArtifactCache, optional): Artifact cache. Defaults to settings.CHART_CACHE_DIR.
+        encoder (str, optional): Animation encoder name. Defaults to settings.CHART_ENCODER.
+        max_parallel (int, optional): Most renders of this call running at once. Defaults to no limit.
+
+    Yields:
+        tuple[str, str | None]: (chart key, animation path or None if the chart was skipped or failed),
+                                in completion order.
+    """
+    cache = cache or ChartArtifactCache()
+    resolved = resolve_encoder(encoder) # Resolved once, so fallbacks are part of the cache key
+    fingerprint = prepared.fingerprint()
+    artifacts = {key: artifact_key(fingerprint, key, version=CHART_RENDER_VERSION, encoder=resolved.name)
+                 for key in keys or CHART_FUNCTIONS}
+
+    queue = []
+    for key, artifact in artifacts.items():
+        path = cache.get(artifact, resolved.suffix)
+        if path is not None:
+            yield key, path
+        else:
+            queue.append(key)
+    if not queue:
+        return
+
+    pool = get_render_pool()
+    if pool is None:
+        yield from _render_in_process(prepared, queue, artifacts, cache, resolved)
+        return
+
+    shm, layout = _share(prepared)
+    block = _SharedBlock(shm)
+    recorder = instrumentation.current_recorder()
+    run_id = recorder.run_id if recorder is not None else None
+    limit = max_parallel or len(queue)
+    running = {}
+    try:
+        while queue or running:
+            while queue and len(running) < limit:
+                key = queue.pop(0)
+                future = _submit(pool, key, artifacts[key], cache, block, resolved.name, shm.name, layout, run_id)
+                running[future] = key
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                try:
+                    path, spans = future.result()
+                    instrumentation.ingest(spans) # Shown with this caller's spans, e.g. in the debug panel
+                except BrokenProcessPool:
+                    running[future] = key
+                    raise
+                except Exception as e:
+                    logging.error(f"Chart '{key}' failed: {e}", exc_info=True)
+                    path = None
+                yield key, path
+    except BrokenProcessPool as e:
+        logging.error(f"Chart render pool failed ({e}); rendering the remaining charts in-process.")
+        _reset_pool()
+        yield from _render_in_process(prepared, list(running.values()) + queue, artifacts, cache, resolved)
+    finally:
+        block.release() # Renders still queued or running keep the block until they finish
+
+def prerender_charts(prepared: PreparedQuakes, keys: list[str], encoder: str = None,
+                     budget: int = None) -> threading.Thread | None:
+    """
+    Renders charts into the artifact cache on a background thread, in the given (likely view) order.
+
+    At most `budget` of these renders run at once, so pre-rendering never takes
+    more than that many workers from charts a user is waiting for. A chart that
+    is requested while it is being pre-rendered is awaited, not rendered again.
+
+    Args:
+        prepared (PreparedQuakes): Prepared chart data.
+        keys (list[str]): Chart keys from CHART_FUNCTIONS, most likely to be viewed first.
+        encoder (str, optional): Animation encoder name. Defaults to settings.CHART_ENCODER.
+        budget (int, optional): Concurrent background renders. Defaults to settings.CHART_PRERENDER_BUDGET.
+
+    Returns:
+        threading.Thread | None: The started thread, or None if pre-rendering is disabled
+                                 or there is no render pool.
+    """
+    budget = settings.CHART_PRERENDER_BUDGET if budget is None else budget
+    if budget <= 0 or not keys:
+        return None
+    if get_render_pool() is None:
+        return None # In-process renders are serialized, so a background one would only delay the charts being viewed
+
+    def run():
+        try:
+            for key, path in render_charts(prepared, keys, encoder=encoder, max_parallel=budget):
+                logging.info(f"Pre-rendered chart '{key}': {path}")
+        except Exception as e:
+            logging.error(f"Background chart pre-render failed: {e}", exc_info=True)
+
+    thread = threading.Thread(target=run, name="chart-prerender", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,77 @@
+"""
+Benchmark for `data_handler.geojson_to_dataframe`.
+
+Compares the previous per-feature converter (string times, float64/object
+columns) with the columnar one at 1k/10k/100k synthetic features.
+
+Usage (from the project root):
+    python -m benchmarks.bench_dataframe
+"""
+import logging
+import time
+import tracemalloc
+from datetime import datetime
+import pandas as pd
+from app.core import data_handler
+from benchmarks.synthetic import generate_feature_collection
+
+SIZES = (1_000, 10_000, 100_000)
+
+def legacy_geojson_to_dataframe(geojson_data: dict) -> pd.DataFrame:
+    """The original one-dict-per-feature converter, kept as the baseline."""
+    records = []
+    for feature in geojson_data['features']:
+        try:
+            properties = feature.get('properties', {})
+            geometry = feature.get('geometry', {})
+            coords = geometry.get('coordinates', [])
+            if geometry.get('type') != 'Point' or len(coords) < 2:
+                continue
+            time_epoch_ms = properties.get('time')
+            time_str = "N/A"
+            if time_epoch_ms:
+                time_str = datetime.utcfromtimestamp(time_epoch_ms / 1000).strftime('%Y-%m-%d %H:%M:%S UTC')
+            records.append({
+                'Magnitude': properties.get('mag'),
+                'Place': properties.get('place', 'N/A'),
+                'Time': time_str,
+                'Depth (km)': coords[2] if len(coords) > 2 else 0.0,
+                'Latitude': coords[1],
+                'Longitude': coords[0],
+                'Details URL': properties.get('url', '#'),
+                'USGS ID': feature.get('id', 'N/A'),
+            })
+        except Exception:
+            continue
+    return pd.DataFrame(records)
+
+def measure(func, *args) -> tuple[float, int, object]:
+    """Returns (seconds, peak traced bytes, result) for one call."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+def main() -> list[dict]:
+    logging.disable(logging.WARNING)
+    rows = []
+    for size in SIZES:
+        data = generate_feature_collection(size)
+        for name, func in (("legacy", legacy_geojson_to_dataframe), ("columnar", data_handler.geojson_to_dataframe)):
+            elapsed, peak, df = measure(func, data)
+            rows.append({
+                "converter": name,
+                "features": size,
+                "seconds": round(elapsed, 4),
+                "peak_mb": round(peak / 2**20, 2),
+                "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 2),
+            })
+            print(f"{name:>9} {size:>7} features: {elapsed:8.4f}s  peak {peak / 2**20:8.2f} MB  "
+                  f"frame {rows[-1]['frame_mb']:7.2f} MB")
+    return rows
+
+if __name__ == "__main__":
+    main()
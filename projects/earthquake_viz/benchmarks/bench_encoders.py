@@ -0,0 +1,70 @@
+"""
+Benchmark for the chart animation encoders in `app.visualizations.encoders`.
+
+Renders a few charts from 2k synthetic events once, capturing their frames
+through a temporary "capture" encoder, then encodes the same frames with
+every available format (plain GIF, shared-palette GIF, animated WebP, APNG,
+and H.264 MP4 when ffmpeg is installed), reporting encode time and file size.
+
+Usage (from the project root):
+    python -m benchmarks.bench_encoders
+"""
+import logging
+import os
+import tempfile
+import time
+from app.core import data_handler
+from app.visualizations import chart_builder, encoders
+from app.visualizations.prepared_quakes import PreparedQuakes
+from benchmarks.synthetic import generate_feature_collection
+
+EVENTS = 2_000
+CHARTS = ("create_magnitude_histogram_animation", "create_location_scatter_animation",
+          "create_shockwave_map_animation", "create_cumulative_time_series")
+FORMATS = ("gif", "gif_optimized", "webp", "apng", "mp4")
+
+def capture_frames(prepared: PreparedQuakes, chart: str, directory: str) -> tuple[list, int]:
+    """Renders `chart` and returns its RGB frames and frame interval instead of encoding them."""
+    captured = {}
+    def capture(frames, output_path, interval):
+        captured.update(frames=frames, interval=interval)
+        open(output_path, 'wb').close()
+    encoders.register_encoder(encoders.AnimationEncoder("capture", ".capture", capture))
+    try:
+        getattr(chart_builder, chart)(prepared, output_path=os.path.join(directory, chart), encoder="capture")
+    finally:
+        encoders.ENCODERS.pop("capture", None)
+    return captured["frames"], captured["interval"]
+
+def main() -> list[dict]:
+    logging.disable(logging.WARNING)
+    df = data_handler.geojson_to_dataframe(generate_feature_collection(EVENTS))
+    prepared = PreparedQuakes.from_dataframe(df)
+    formats = [name for name in FORMATS if encoders.ENCODERS[name].available()]
+    skipped = sorted(set(FORMATS) - set(formats))
+    if skipped:
+        print(f"Skipping unavailable encoders: {', '.join(skipped)}")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for chart in CHARTS:
+            frames, interval = capture_frames(prepared, chart, directory)
+            for name in formats:
+                encoder = encoders.ENCODERS[name]
+                path = os.path.join(directory, f"{chart}{encoder.suffix}")
+                started = time.perf_counter()
+                encoder.encode(frames, path, interval)
+                elapsed = time.perf_counter() - started
+                rows.append({
+                    "chart": chart,
+                    "encoder": name,
+                    "frames": len(frames),
+                    "encode_seconds": round(elapsed, 4),
+                    "size_kb": round(os.path.getsize(path) / 1024, 1),
+                })
+                print(f"{chart:>38} {name:>13}: {len(frames):3d} frames  encode {elapsed:6.3f}s  "
+                      f"size {rows[-1]['size_kb']:8.1f} KB")
+    return rows
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark for `map_builder.create_earthquake_map`.
+
+Compares the per-event CircleMarker layer ("markers"), the single
+columnar data blob layer ("fast") and the aggregation pyramid layer
+("pyramid") at 1k/10k/50k synthetic events, plus the pyramid alone at
+100k/200k global events, timing map construction plus HTML rendering and
+measuring the HTML payload that `main.py` ships to the browser.
+
+Usage (from the project root):
+    python -m benchmarks.bench_map
+"""
+import logging
+import time
+from app.core.quake_columns import QuakeColumns
+from app.visualizations import map_builder
+from benchmarks.synthetic import generate_feature_collection
+
+SIZES = (1_000, 10_000, 50_000)
+MODES = ("markers", "fast", "pyramid")
+LARGE_SIZES = (100_000, 200_000) # Only the pyramid layer is practical here
+BOUNDS = [-125.0, 24.0, -66.0, 50.0]
+WORLD = [-180.0, -60.0, 180.0, 70.0]
+
+def main() -> list[dict]:
+    logging.disable(logging.WARNING)
+    rows = []
+    cases = [(size, BOUNDS, MODES) for size in SIZES] + [(size, WORLD, ("pyramid",)) for size in LARGE_SIZES]
+    for size, bounds, modes in cases:
+        quakes = QuakeColumns.from_geojson(generate_feature_collection(size, bounding_box=tuple(bounds)))
+        for mode in modes:
+            started = time.perf_counter()
+            fmap = map_builder.create_earthquake_map(quakes, center_on_bounds=bounds, marker_mode=mode)
+            built = time.perf_counter() - started
+            html = fmap._repr_html_()
+            elapsed = time.perf_counter() - started
+            rows.append({
+                "mode": mode,
+                "events": size,
+                "build_seconds": round(built, 4),
+                "total_seconds": round(elapsed, 4),
+                "payload_mb": round(len(html.encode()) / 2**20, 3),
+                "bytes_per_event": round(len(html.encode()) / size, 1),
+            })
+            print(f"{mode:>8} {size:>6} events: build {built:7.3f}s  build+render {elapsed:7.3f}s  "
+                  f"payload {rows[-1]['payload_mb']:8.3f} MB ({rows[-1]['bytes_per_event']:6.1f} B/event)")
+    return rows
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Stage-by-stage benchmark of the earthquake_viz pipeline.
+
+Times and memory-profiles every stage the app runs for a query at
+1k/10k/100k synthetic events (clustered, Gutenberg-Richter magnitudes):
+
+    fetch                 windowed count + query requests against a local FDSN stand-in
+    geojson_to_dataframe  FeatureCollection -> event table
+    create_earthquake_map map build and HTML rendering (MAP_MARKER_MODE)
+    prepare               PreparedQuakes.from_dataframe
+    table_page            first page of the data table (default sort, cold sort cache)
+    table_export:<format> CSV/Parquet download of the whole table
+    chart:<key>           each of the ten chart_builder animations (CHART_ENCODER)
+
+plus the event-count independent `load_country_index` and `get_country_bounds`
+(every country) once per run. Each stage reports the median and minimum of
+`--repeats` timed runs and the peak memory traced (tracemalloc: Python and
+NumPy allocations) during one extra run.
+
+Results are written as JSON (run metadata including the git commit, plus one
+row per stage and size) for `python -m benchmarks.compare` to diff across
+commits.
+
+Usage (from the project root):
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 --stages fetch chart --output base.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from app.config import settings
+from app.config.boundaries import SHAPEFILE_PATH
+from app.core import data_handler, geo_utils, usgs_api
+from app.core.event_table import EventTable
+from app.core.quake_columns import QuakeColumns
+from app.core.usgs_client import get_default_client
+from app.visualizations import chart_builder, map_builder
+from app.visualizations.prepared_quakes import PreparedQuakes
+from app.visualizations.render_scheduler import CHART_FUNCTIONS
+from benchmarks.fdsn_server import FDSNStandIn
+from benchmarks.synthetic import generate_feature_collection
+
+SIZES = (1_000, 10_000, 100_000)
+REPEATS = 3
+BOUNDS = (-125.0, 24.0, -66.0, 50.0)
+START = "2023-01-01"
+END = "2024-01-01" # Generator default: 365 days from 2023-01-01
+RESULTS_DIR = "benchmarks/results"
+
+def measure(run, repeats: int) -> dict:
+    """Median/min seconds over `repeats` calls of `run`, and the traced peak of one more call."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timings.sort()
+    return {
+        "median_s": round(timings[len(timings) // 2], 5),
+        "min_s": round(timings[0], 5),
+        "peak_mb": round(peak / 2**20, 2),
+    }
+
+def git_commit() -> dict:
+    """Commit and dirty flag of the working tree, if it is a git checkout."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no", "."],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+def run_metadata(options: argparse.Namespace) -> dict:
+    import matplotlib
+    import numpy
+    import pandas
+    return {
+        **git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "matplotlib": matplotlib.__version__,
+        "repeats": options.repeats,
+        "seed": options.seed,
+        "clusters": options.clusters,
+        "magnitudes": options.magnitudes,
+        "map_marker_mode": settings.MAP_MARKER_MODE,
+        "chart_encoder": settings.CHART_ENCODER,
+    }
+
+def wanted(stage: str, options: argparse.Namespace) -> bool:
+    """True if `stage` matches one of the --stages prefixes (or no filter was given)."""
+    return not options.stages or any(stage.startswith(prefix) for prefix in options.stages)
+
+def country_stages(options: argparse.Namespace) -> list[tuple[str, int, callable]]:
+    index = geo_utils.load_country_index(SHAPEFILE_PATH)
+    if index is None:
+        print("Country index unavailable; skipping country stages.", file=sys.stderr)
+        return []
+    names = list(index.names)
+    return [
+        ("load_country_index", 0, lambda: geo_utils.load_country_index(SHAPEFILE_PATH)),
+        ("get_country_bounds", len(names), lambda: [geo_utils.get_country_bounds(name, index) for name in names]),
+    ]
+
+def event_stages(size: int, options: argparse.Namespace, server: FDSNStandIn, workdir: str) -> list[tuple[str, int, callable]]:
+    """(stage, events, run) for every stage at one event count; inputs are built outside the timed calls."""
+    collection = generate_feature_collection(size, seed=options.seed, bounding_box=BOUNDS, clusters=options.clusters,
+                                             magnitudes=options.magnitudes, min_magnitude=2.5)
+    server.load(collection)
+    quakes = QuakeColumns.from_geojson(collection)
+    df = data_handler.geojson_to_dataframe(collection)
+    prepared = PreparedQuakes.from_dataframe(df)
+
+    def fetch():
+        result = usgs_api.fetch_earthquake_data_windowed(starttime=START, endtime=END, bounding_box=BOUNDS, columnar=True)
+        if result is None or len(result) != size:
+            raise RuntimeError(f"fetch returned {None if result is None else len(result)} of {size} events")
+
+    def table_page():
+        table = EventTable(df)
+        return table.page(table.rows(*settings.TABLE_DEFAULT_SORT), 1, settings.TABLE_PAGE_SIZES[0])
+
+    table = EventTable(df)
+    rows = table.rows(*settings.TABLE_DEFAULT_SORT)
+
+    def chart(key):
+        function = getattr(chart_builder, CHART_FUNCTIONS[key])
+        return lambda: function(prepared, output_path=os.path.join(workdir, f"{key}.gif"))
+
+    stages = [
+        ("fetch", size, fetch),
+        ("geojson_to_dataframe", size, lambda: data_handler.geojson_to_dataframe(collection)),
+        ("create_earthquake_map", size, lambda: map_builder.create_earthquake_map(quakes, center_on_bounds=list(BOUNDS))._repr_html_()),
+        ("prepare", size, lambda: PreparedQuakes.from_dataframe(df)),
+        ("table_page", size, table_page),
+        ("table_export:csv", size, lambda: table.export(rows, "csv")),
+        ("table_export:parquet", size, lambda: table.export(rows, "parquet")),
+    ]
+    return stages + [(f"chart:{key}", size, chart(key)) for key in CHART_FUNCTIONS]
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Time and memory-profile each pipeline stage on synthetic data.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--stages", nargs="+", default=None,
+                        help="Stage name prefixes to run, e.g. fetch chart:spiral get_country (default: all).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--clusters", type=int, default=20, help="Seismic zones events concentrate in (0: uniform).")
+    parser.add_argument("--magnitudes", default="gutenberg_richter", choices=["gumbel", "gutenberg_richter"])
+    parser.add_argument("--output", default=None,
+                        help=f"Results file (default: {RESULTS_DIR}/pipeline-<commit>.json).")
+    return parser.parse_args(argv)
+
+def main(argv: list[str] = None) -> dict:
+    options = parse_args(argv)
+    logging.disable(logging.WARNING)
+    report = {"meta": run_metadata(options), "results": []}
+
+    def record(stage, events, run):
+        if not wanted(stage, options):
+            return
+        row = {"stage": stage, "events": events, **measure(run, options.repeats)}
+        report["results"].append(row)
+        print(f"{stage:>28} {events:>7}: median {row['median_s']:9.4f}s  min {row['min_s']:9.4f}s  peak {row['peak_mb']:9.2f} MB")
+
+    for stage, events, run in country_stages(options):
+        record(stage, events, run)
+
+    client = get_default_client()
+    original_url = client.base_url
+    with FDSNStandIn() as server, tempfile.TemporaryDirectory() as workdir:
+        client.base_url = server.base_url
+        try:
+            for size in options.sizes:
+                for stage, events, run in event_stages(size, options, server, workdir):
+                    record(stage, events, run)
+        finally:
+            client.base_url = original_url
+
+    output = options.output or os.path.join(RESULTS_DIR, f"pipeline-{(report['meta']['commit'] or 'local')[:10]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} results to {output}")
+    return report
+
+if __name__ == "__main__":
+    main()
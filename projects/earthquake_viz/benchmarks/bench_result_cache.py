@@ -0,0 +1,79 @@
+"""
+Benchmark for `result_cache.QueryResultCache`.
+
+Compares a cache hit on the previous `st.cache_data` path (the fetched
+`QuakeColumns` pickled on write and unpickled into a fresh copy on every hit)
+with a hit on the Arrow IPC cache at 10k/100k synthetic events: per-hit
+latency, memory allocated per hit, and bytes held by the cache. The
+"narrowed" case answers a query for a shorter window and higher magnitude
+floor by filtering the cached broader result.
+
+Usage (from the project root):
+    python -m benchmarks.bench_result_cache
+"""
+import logging
+import pickle
+import time
+import tracemalloc
+from app.core.quake_columns import QuakeColumns
+from app.core.result_cache import QueryResultCache, query_key
+from benchmarks.synthetic import generate_feature_collection
+
+SIZES = (10_000, 100_000)
+REPEATS = 20
+BROAD = {"starttime": "2023-01-01", "endtime": "2024-01-01", "min_magnitude": None, "limit": None,
+         "bounding_box": [-125.0, 24.0, -66.0, 50.0]}
+NARROW = {**BROAD, "starttime": "2023-10-01", "min_magnitude": 3.0, "limit": 1000}
+
+def measure(hit) -> tuple[float, int]:
+    """Median seconds and peak bytes allocated by one call of `hit`."""
+    hit()
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        hit()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    result = hit()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return sorted(timings)[len(timings) // 2], peak
+
+def main() -> list[dict]:
+    logging.disable(logging.WARNING)
+    rows = []
+    for size in SIZES:
+        quakes = QuakeColumns.from_geojson(generate_feature_collection(size))
+        quakes.fingerprint()
+
+        pickled = pickle.dumps(quakes, protocol=pickle.HIGHEST_PROTOCOL)
+        cache = QueryResultCache(max_bytes=2**30, ttl_seconds=3600)
+        cache.put(query_key(**BROAD), quakes, params=BROAD)
+        narrow_key = query_key(**NARROW)
+
+        def narrowed():
+            result = cache.get_or_fetch(narrow_key, lambda: None, params=NARROW)
+            assert result is not None, "narrow query was not answered from the cache"
+            return result
+
+        cases = {
+            "pickle": (lambda: pickle.loads(pickled), len(pickled)),
+            "arrow": (lambda: cache.get(query_key(**BROAD)), cache.stats()["bytes"]),
+            "narrowed": (narrowed, 0),
+        }
+        for name, (hit, stored) in cases.items():
+            seconds, peak = measure(hit)
+            rows.append({
+                "cache": name,
+                "events": size,
+                "hit_ms": round(seconds * 1000, 3),
+                "hit_alloc_kb": round(peak / 1024, 1),
+                "stored_mb": round(stored / 2**20, 2),
+            })
+            print(f"{name:>8} {size:>7} events: hit {rows[-1]['hit_ms']:8.3f} ms  "
+                  f"allocated {rows[-1]['hit_alloc_kb']:10.1f} KB  stored {rows[-1]['stored_mb']:6.2f} MB")
+    return rows
+
+if __name__ == "__main__":
+    main()
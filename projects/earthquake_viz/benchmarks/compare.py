@@ -0,0 +1,84 @@
+"""
+Compares two `bench_pipeline` result files, e.g. from two commits.
+
+Prints the head/base ratio of the median time and traced peak memory for
+every stage and size both files contain, and exits with status 1 if any
+stage got slower (or bigger) by more than the threshold, so it can gate CI.
+
+Usage (from the project root):
+    python -m benchmarks.compare benchmarks/results/pipeline-<base>.json benchmarks/results/pipeline-<head>.json
+    python -m benchmarks.compare base.json head.json --threshold 0.2 --min-seconds 0.01
+"""
+import argparse
+import json
+import sys
+
+COMPARED_META = ("python", "platform", "cpus", "numpy", "pandas", "matplotlib", "seed", "clusters",
+                 "magnitudes", "map_marker_mode", "chart_encoder")
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(base: dict, head: dict, threshold: float = 0.1, min_seconds: float = 0.005) -> list[dict]:
+    """
+    Pairs the rows of two reports by (stage, events) and flags regressions.
+
+    Args:
+        base (dict): Baseline report.
+        head (dict): Report to check.
+        threshold (float, optional): Allowed relative increase before a row counts as a regression. Defaults to 0.1.
+        min_seconds (float, optional): Time changes of stages faster than this are ignored as noise. Defaults to 0.005.
+
+    Returns:
+        list[dict]: One row per stage and size present in both reports, with time/memory ratios and a `regressed` flag.
+    """
+    baseline = {(row["stage"], row["events"]): row for row in base["results"]}
+    rows = []
+    for row in head["results"]:
+        before = baseline.get((row["stage"], row["events"]))
+        if before is None:
+            continue
+        time_ratio = row["median_s"] / before["median_s"] if before["median_s"] else None
+        memory_ratio = row["peak_mb"] / before["peak_mb"] if before["peak_mb"] else None
+        slower = time_ratio is not None and time_ratio > 1 + threshold and row["median_s"] >= min_seconds
+        bigger = memory_ratio is not None and memory_ratio > 1 + threshold and row["peak_mb"] - before["peak_mb"] >= 1
+        rows.append({
+            "stage": row["stage"],
+            "events": row["events"],
+            "base_s": before["median_s"],
+            "head_s": row["median_s"],
+            "time_ratio": time_ratio,
+            "base_mb": before["peak_mb"],
+            "head_mb": row["peak_mb"],
+            "memory_ratio": memory_ratio,
+            "regressed": slower or bigger,
+        })
+    return rows
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Diff two bench_pipeline result files.")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed relative slowdown/growth (default 0.1 = 10%%).")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="Ignore time changes of stages faster than this.")
+    options = parser.parse_args(argv)
+
+    base, head = load(options.base), load(options.head)
+    print(f"base {str(base['meta'].get('commit'))[:10]}  head {str(head['meta'].get('commit'))[:10]}")
+    for key in COMPARED_META:
+        if base["meta"].get(key) != head["meta"].get(key):
+            print(f"warning: {key} differs ({base['meta'].get(key)} vs {head['meta'].get(key)}); results may not be comparable")
+
+    rows = compare(base, head, options.threshold, options.min_seconds)
+    for row in rows:
+        ratio = lambda value: f"{value:6.2f}x" if value is not None else "    n/a"
+        print(f"{row['stage']:>28} {row['events']:>7}: {row['base_s']:9.4f}s -> {row['head_s']:9.4f}s {ratio(row['time_ratio'])}  "
+              f"{row['base_mb']:8.2f} -> {row['head_mb']:8.2f} MB {ratio(row['memory_ratio'])}"
+              f"{'  REGRESSION' if row['regressed'] else ''}")
+    regressions = sum(row["regressed"] for row in rows)
+    print(f"{len(rows)} stages compared, {regressions} regressions (threshold {options.threshold:.0%})")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
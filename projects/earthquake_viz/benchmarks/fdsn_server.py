@@ -0,0 +1,147 @@
+"""
+Local stand-in for the USGS FDSN Event Web Service, for benchmarks.
+
+Serves the `query` and `count` endpoints over a synthetic FeatureCollection
+with the filters the app sends (time range, minimum magnitude, bounding box,
+`updatedafter`, `limit`), newest events first, gzip when asked for, and the
+same 400 response as USGS when a query matches more than the per-query cap.
+Filtering runs on NumPy columns and every feature is serialised once up
+front, so the server adds little to what the client side is measured doing.
+
+Usage:
+    with FDSNStandIn(generate_feature_collection(10_000)) as server:
+        get_default_client().base_url = server.base_url
+"""
+import gzip
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+from app.config import settings
+
+def _epoch_ms(value: str) -> float:
+    """FDSN time parameter (date or ISO datetime, UTC) as epoch milliseconds."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp() * 1000
+
+class FDSNStandIn:
+    """
+    Threaded HTTP server answering FDSN `query`/`count` requests from a fixed event set.
+
+    Args:
+        collection (dict, optional): FeatureCollection to serve (e.g. from `generate_feature_collection`).
+                                     Defaults to no events; see `load`.
+        max_allowed (int, optional): Per-query cap. Defaults to settings.USGS_MAX_EVENTS_PER_QUERY.
+        port (int, optional): Port to listen on. Defaults to 0 (any free port).
+    """
+
+    def __init__(self, collection: dict = None, max_allowed: int = settings.USGS_MAX_EVENTS_PER_QUERY, port: int = 0):
+        self.max_allowed = max_allowed
+        self.requests = {"query": 0, "count": 0}
+        self._lock = threading.Lock()
+        self.load(collection or {"features": []})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread = None
+
+    def load(self, collection: dict) -> None:
+        """Replaces the served event set (requests in flight finish on the previous one)."""
+        features = collection["features"]
+        properties = [f["properties"] for f in features]
+        time = np.array([p["time"] for p in properties], dtype=np.int64)
+        coordinates = np.array([f["geometry"]["coordinates"][:2] for f in features], dtype=np.float64).reshape(-1, 2)
+        events = {
+            "time": time,
+            "updated": np.array([p.get("updated") or p["time"] for p in properties], dtype=np.int64),
+            "magnitude": np.array([np.nan if p["mag"] is None else p["mag"] for p in properties], dtype=np.float64),
+            "longitude": coordinates[:, 0],
+            "latitude": coordinates[:, 1],
+            "newest_first": np.argsort(-time, kind="stable"),
+            "encoded": [json.dumps(f, separators=(",", ":")).encode() for f in features],
+        }
+        with self._lock:
+            self._events = events
+
+    @property
+    def base_url(self) -> str:
+        """Value for `settings.USGS_API_BASE_URL` / `USGSClient.base_url`."""
+        return f"http://127.0.0.1:{self._server.server_address[1]}/fdsnws/event/1/"
+
+    def match(self, params: dict, events: dict = None) -> np.ndarray:
+        """Indices of the events matching FDSN query parameters, newest first."""
+        events = events or self._events
+        time = events["time"]
+        mask = np.ones(len(time), dtype=bool)
+        if "starttime" in params:
+            mask &= time >= _epoch_ms(params["starttime"])
+        if "endtime" in params:
+            mask &= time <= _epoch_ms(params["endtime"])
+        if "updatedafter" in params:
+            mask &= events["updated"] > _epoch_ms(params["updatedafter"])
+        if "minmagnitude" in params:
+            mask &= events["magnitude"] >= float(params["minmagnitude"])
+        if "minlongitude" in params:
+            lon, lat = events["longitude"], events["latitude"]
+            mask &= (lon >= float(params["minlongitude"])) & (lon <= float(params["maxlongitude"]))
+            mask &= (lat >= float(params["minlatitude"])) & (lat <= float(params["maxlatitude"]))
+        order = events["newest_first"]
+        return order[mask[order]]
+
+    def respond(self, endpoint: str, params: dict) -> tuple[int, bytes]:
+        """Status code and JSON body for one request."""
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            events = self._events
+        if endpoint not in ("query", "count"):
+            return 404, b'{"error": "unknown endpoint"}'
+        matched = self.match(params, events)
+        if endpoint == "count":
+            return 200, json.dumps({"count": int(len(matched)), "maxAllowed": self.max_allowed}).encode()
+        if len(matched) > self.max_allowed:
+            return 400, f"Error 400: Bad Request\n\n{len(matched)} matching events exceeds search limit of {self.max_allowed}.".encode()
+        limit = int(params.get("limit", self.max_allowed))
+        chosen = matched[:limit]
+        encoded = events["encoded"]
+        metadata = json.dumps({"generated": 0, "count": int(len(chosen)), "title": "FDSN stand-in"})
+        body = b'{"type":"FeatureCollection","metadata":' + metadata.encode() + b',"features":['
+        return 200, body + b",".join(encoded[i] for i in chosen) + b"]}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                status, body = server.respond(url.path.rstrip("/").rsplit("/", 1)[-1], params)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json" if status == 200 else "text/plain")
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=1)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> "FDSNStandIn":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fdsn-stand-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FDSNStandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
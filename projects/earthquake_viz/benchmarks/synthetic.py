@@ -0,0 +1,83 @@
+import numpy as np
+
+MAGNITUDE_DISTRIBUTIONS = ("gumbel", "gutenberg_richter")
+
+def _clustered_points(rng: np.random.Generator, n_events: int, bounding_box: tuple, clusters: int,
+                      spread_deg: float, background: float) -> tuple[np.ndarray, np.ndarray]:
+    """Longitudes/latitudes around `clusters` random centres of uneven size, plus a uniform background share."""
+    min_lon, min_lat, max_lon, max_lat = bounding_box
+    centre_lon = rng.uniform(min_lon, max_lon, clusters)
+    centre_lat = rng.uniform(min_lat, max_lat, clusters)
+    weights = rng.dirichlet(np.full(clusters, 0.5)) # A few busy zones and many quiet ones
+    member = rng.choice(clusters, n_events, p=weights)
+    lon = centre_lon[member] + rng.normal(0.0, spread_deg, n_events)
+    lat = centre_lat[member] + rng.normal(0.0, spread_deg, n_events)
+
+    scattered = rng.random(n_events) < background
+    lon[scattered] = rng.uniform(min_lon, max_lon, scattered.sum())
+    lat[scattered] = rng.uniform(min_lat, max_lat, scattered.sum())
+    return lon.clip(min_lon, max_lon), lat.clip(min_lat, max_lat)
+
+def generate_feature_collection(n_events: int, seed: int = 0, bounding_box: tuple = (-125.0, 24.0, -66.0, 50.0),
+                                start_ms: int = 1_672_531_200_000, span_days: int = 365,
+                                clusters: int = 0, cluster_spread_deg: float = 0.5, background: float = 0.2,
+                                magnitudes: str = "gumbel", b_value: float = 1.0, min_magnitude: float = 1.0) -> dict:
+    """
+    Generates a deterministic USGS-shaped GeoJSON FeatureCollection.
+
+    Args:
+        n_events (int): Number of events to generate.
+        seed (int, optional): Random seed. Defaults to 0.
+        bounding_box (tuple, optional): (min_lon, min_lat, max_lon, max_lat) events are drawn from.
+        start_ms (int, optional): Earliest event time in epoch milliseconds. Defaults to 2023-01-01.
+        span_days (int, optional): Length of the time range in days. Defaults to 365.
+        clusters (int, optional): Number of seismic zones events concentrate in; 0 spreads them
+                                  uniformly over the box. Defaults to 0.
+        cluster_spread_deg (float, optional): Standard deviation of events around their zone centre.
+        background (float, optional): Share of events scattered uniformly when clustering. Defaults to 0.2.
+        magnitudes (str, optional): "gumbel" (skewed around M2.5) or "gutenberg_richter" (exponential
+                                    above `min_magnitude` with slope `b_value`). Defaults to "gumbel".
+        b_value (float, optional): Gutenberg-Richter b-value. Defaults to 1.0.
+        min_magnitude (float, optional): Gutenberg-Richter completeness magnitude. Defaults to 1.0.
+
+    Returns:
+        dict: FeatureCollection with `metadata` and `features` like the USGS `query` endpoint.
+    """
+    if magnitudes not in MAGNITUDE_DISTRIBUTIONS:
+        raise ValueError(f"Unknown magnitude distribution '{magnitudes}'; expected one of {MAGNITUDE_DISTRIBUTIONS}.")
+
+    rng = np.random.default_rng(seed)
+    min_lon, min_lat, max_lon, max_lat = bounding_box
+    if clusters > 0:
+        lon, lat = _clustered_points(rng, n_events, bounding_box, clusters, cluster_spread_deg, background)
+    else:
+        lon = rng.uniform(min_lon, max_lon, n_events)
+        lat = rng.uniform(min_lat, max_lat, n_events)
+    depth = rng.exponential(40.0, n_events).clip(0, 700)
+    if magnitudes == "gutenberg_richter":
+        mag = (min_magnitude + rng.exponential(1 / (b_value * np.log(10)), n_events)).clip(0, 9.5).round(1)
+    else:
+        mag = rng.gumbel(2.5, 0.6, n_events).clip(0, 9.5).round(1)
+    times = np.sort(start_ms + rng.integers(0, span_days * 86_400_000, n_events))[::-1]
+
+    features = []
+    for i in range(n_events):
+        event_id = f"sx{seed:02d}{i:08d}"
+        features.append({
+            "type": "Feature",
+            "properties": {
+                "mag": float(mag[i]),
+                "place": f"{int(lon[i] * 7) % 90 + 1} km NW of Town {i % 500}",
+                "time": int(times[i]),
+                "updated": int(times[i]) + 60_000,
+                "url": f"https://earthquake.usgs.gov/earthquakes/eventpage/{event_id}",
+                "type": "earthquake",
+            },
+            "geometry": {"type": "Point", "coordinates": [float(lon[i]), float(lat[i]), float(depth[i])]},
+            "id": event_id,
+        })
+    return {
+        "type": "FeatureCollection",
+        "metadata": {"generated": int(start_ms), "count": n_events, "title": "Synthetic USGS Earthquakes"},
+        "features": features,
+    }
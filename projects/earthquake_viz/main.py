@@ -5,188 +5,214 @@ import pandas as pd
 
 # Local application imports
 from app.ui import controls
-from app.core import usgs_api
 from app.config.boundaries import SHAPEFILE_PATH
 from app.core import geo_utils
 from app.visualizations import map_builder
 from app.core import data_handler
-from app.visualizations import chart_builder
+from app.core import country_query
+from app.core import instrumentation
+from app.core.instrumentation import span
+from app.ui import debug_panel
+from app.ui import data_table
+from app.core.event_table import EventTable
+from app.visualizations import render_scheduler
+from app.visualizations import plotly_charts
+from app.config import settings
+from app.visualizations.prepared_quakes import PreparedQuakes
 
 import streamlit.components.v1 as components
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+if settings.CHART_BACKEND == "plotly" and not plotly_charts.is_available():
+    logging.warning("CHART_BACKEND is 'plotly' but plotly is not installed; rendering on the server.")
+
 st.set_page_config(page_title="Earthquake Visualizer", page_icon="🌍", layout="wide", initial_sidebar_state="expanded")
 st.title("🌍 USGS Earthquake Data Visualizer")
 st.markdown("Enter a country name to explore earthquake data within its boundaries for a time range.")
 st.markdown("---")
 
-# Load shapefile and country list
+# Load the precompiled country index (bounds and lazily decoded geometries)
 with st.spinner("Loading world boundaries map and country list..."):
-    world_gdf, country_list = geo_utils.load_world_shapefile(SHAPEFILE_PATH)
+    country_index = geo_utils.load_country_index(SHAPEFILE_PATH)
+    country_list = country_index.names if country_index is not None else None
 
-if world_gdf is None or country_list is None:
+if country_index is None or country_list is None:
     st.error("Application cannot start because the world boundaries data failed to load. Please check the path and file integrity.")
     st.stop()
 
 # Sidebar controls
 user_inputs = controls.display_sidebar_controls(country_list)
 
-@st.cache_data(ttl=900, show_spinner=False)
-def cached_api_call(**params):
-    logging.info(f"CACHE MISS: Calling USGS API with params: {params}")
-    if 'bounding_box' in params and isinstance(params['bounding_box'], list):
-        params['bounding_box'] = tuple(params['bounding_box'])
-    data = usgs_api.fetch_earthquake_data(**params)
-    return data
+def show_chart(slot, chart_path: str | None, caption: str | None = None):
+    """Fills a placeholder with a rendered animation (video for MP4, image otherwise)."""
+    if not chart_path:
+        return
+    if chart_path.endswith(".mp4"):
+        with slot.container():
+            st.video(chart_path, loop=True, autoplay=True, muted=True)
+            if caption: st.caption(caption)
+    else:
+        slot.image(chart_path, caption=caption)
+
+def uses_plotly(key: str) -> bool:
+    """True if the chart is animated in the browser (CHART_BACKEND = "plotly") instead of rendered here."""
+    return settings.CHART_BACKEND == "plotly" and plotly_charts.is_available() and key in plotly_charts.PLOTLY_CHARTS
+
+# (tab label, chart key, heading), in tab order
+ADVANCED_TABS = [
+    ("Cumulative Timeline", "cumulative", "**Cumulative Earthquakes Over Time in {country}**"),
+    ("Magnitude vs Depth", "magnitude_depth", "**Magnitude vs. Depth for Earthquakes in {country}**"),
+    ("Map: Quake Spread", "spread", "**Earthquake Spread Across {country}**"),
+    ("Shockwave Ripples", "shockwave", "**Seismic Shockwave Ripples in {country}**"),
+    ("Spiral Timeline", "spiral", "**Spiral Timeline of Quakes in {country}**"),
+    ("Depth Strip Timeline", "depth_strip", "**Depth Layered Timeline of Earthquakes in {country}**"),
+]
+
+@st.fragment
+def advanced_visualizations(prepared: PreparedQuakes, country_name: str):
+    """
+    Advanced chart tabs, rendered lazily.
+
+    Only the open tab's chart is built; switching tabs reruns just this
+    fragment (not the fetch and map above), and charts pre-rendered in the
+    background or viewed before come straight from the artifact cache.
+    """
+    with instrumentation.recording() as recorder:
+        tabs = st.tabs([label for label, _, _ in ADVANCED_TABS], key="advanced_tab", on_change="rerun")
+        for tab, (_, key, heading) in zip(tabs, ADVANCED_TABS):
+            if not tab.open:
+                continue
+            with tab:
+                st.markdown(heading.format(country=country_name))
+                slot = st.empty()
+                if uses_plotly(key):
+                    with span("charts.advanced", chart=key, backend="plotly"):
+                        fig = plotly_charts.PLOTLY_CHARTS[key](prepared)
+                    if fig is not None: slot.plotly_chart(fig, key=f"plotly_{key}")
+                    continue
+                with st.spinner("Rendering animation..."), span("charts.advanced", chart=key, backend="server"):
+                    for _, chart_path in render_scheduler.render_charts(prepared, keys=[key]):
+                        show_chart(slot, chart_path)
+    # Tab switches rerun only this fragment: show its own timings (a full run shows them in the page panel)
+    if recorder.parent is None and settings.DEBUG_PANEL:
+        debug_panel.display_debug_panel(recorder.spans, "🛠️ Tab Timings (debug)")
 
 st.subheader("📊 Earthquake Data Visualizations")
 
 if st.sidebar.button("Fetch and Visualize Data", key="fetch_button", help="Click to load data based on current filters"):
 
-    api_params = {
-        "starttime": user_inputs["starttime"],
-        "endtime": user_inputs["endtime"],
-        "min_magnitude": user_inputs["min_magnitude"],
-        "limit": user_inputs["limit"],
-    }
+    with instrumentation.recording() as recorder: # Every stage of this run, for the debug panel (unbound even if the run stops early)
+        query = None
+        country_name = user_inputs.get("country_name")
 
-    bounding_box = None
-    execute_fetch = False
-    country_name = user_inputs.get("country_name")
-
-    if not country_name:
-        st.error("Please select a country from the dropdown list in the sidebar.")
-    else:
-        logging.info(f"Attempting to find bounds for country: {country_name}")
-        with st.spinner(f"Looking up boundaries for {country_name}..."):
-            bounding_box = geo_utils.get_country_bounds(country_name, world_gdf)
-
-        if bounding_box:
-            api_params["bounding_box"] = bounding_box
-            logging.info(f"Using bounds for {country_name}: {bounding_box}")
-            execute_fetch = True
+        if not country_name:
+            st.error("Please select a country from the dropdown list in the sidebar.")
         else:
-            st.error(f"Could not find boundaries for selected country '{country_name}'.")
-
-    if execute_fetch:
-        with st.spinner(f"📡 Checking cache or fetching data for '{country_name}'..."):
-            geojson_data = cached_api_call(**api_params)
-
-        if geojson_data and 'features' in geojson_data and len(geojson_data['features']) > 0:
-            num_events = len(geojson_data['features'])
-            st.success(f"✅ Found {num_events} earthquake events for '{country_name}'.")
-
-            with st.spinner(f"🗺️ Generating map for {num_events} events..."):
-                earthquake_map = map_builder.create_earthquake_map(geojson_data, center_on_bounds=bounding_box)
-            if earthquake_map:
-                st.info("Displaying Interactive Map:")
-                map_html = earthquake_map._repr_html_()
-                components.html(map_html, height=600, scrolling=False)
-            else:
-                st.error("❌ Failed to generate map.")
-
-            st.markdown("---")
-
-            with st.spinner("Preparing data table..."):
-                df = data_handler.geojson_to_dataframe(geojson_data)
-
-            # ---- NEW 2x2 CHART TILE LAYOUT ----
-            st.subheader("📽️ Summary Charts")
-
-            with st.spinner("Rendering animations..."):
-                mag_path = chart_builder.create_magnitude_histogram_animation(df)
-                depth_path = chart_builder.create_depth_histogram_animation(df)
-                ts_path = chart_builder.create_time_series_animation(df)
-                loa_ani = chart_builder.create_location_animation(df)
-
-            col1, col2 = st.columns(2)
-            with col1:
-                st.image(mag_path, caption="Magnitude Histogram")
-            with col2:
-                st.image(depth_path, caption="Depth Histogram")
-
-            col3, col4 = st.columns(2)
-            with col3:
-                st.image(ts_path, caption="Earthquakes Over Time")
-            with col4:
-                st.image(loa_ani, caption="Location Animation")
-
-            st.markdown("---")
-            st.subheader("🎞️ Advanced Visualizations")
-
-            tabs = st.tabs([
-                "Cumulative Timeline",
-                "Magnitude vs Depth",
-                "Map: Quake Spread",
-                "Shockwave Ripples",
-                "Spiral Timeline",
-                "Depth Strip Timeline"
-            ])
-
-            with tabs[0]:
-                st.markdown(f"**Cumulative Earthquakes Over Time in {country_name}**")
-                gif_path = chart_builder.create_cumulative_time_series(df)
-                if gif_path: st.image(gif_path)
-
-            with tabs[1]:
-                st.markdown(f"**Magnitude vs. Depth for Earthquakes in {country_name}**")
-                gif_path = chart_builder.create_magnitude_depth_scatter(df)
-                if gif_path: st.image(gif_path)
-
-            with tabs[2]:
-                st.markdown(f"**Earthquake Spread Across {country_name}**")
-                gif_path = chart_builder.create_location_scatter_animation(df)
-                if gif_path: st.image(gif_path)
-
-            with tabs[3]:
-                st.markdown(f"**Seismic Shockwave Ripples in {country_name}**")
-                gif_path = chart_builder.create_shockwave_map_animation(df)
-                if gif_path: st.image(gif_path)
-
-            with tabs[4]:
-                st.markdown(f"**Spiral Timeline of Quakes in {country_name}**")
-                gif_path = chart_builder.create_spiral_timeline(df)
-                if gif_path: st.image(gif_path)
-
-            with tabs[5]:
-                st.markdown(f"**Depth Layered Timeline of Earthquakes in {country_name}**")
-                gif_path = chart_builder.create_depth_strip_chart_animation(df)
-                if gif_path: st.image(gif_path)
-
-            # ---- FINAL: DATA TABLE + DOWNLOAD ----
-            st.markdown("---")
-            st.subheader("📄 Earthquake Data Table")
-
-            if df is not None and not df.empty:
-                st.dataframe(df, use_container_width=True)
-                csv = df.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    label="Download data as CSV",
-                    data=csv,
-                    file_name=f'earthquake_data_{country_name}.csv',
-                    mime='text/csv'
+            logging.info(f"Attempting to find bounds for country: {country_name}")
+            with st.spinner(f"Looking up boundaries for {country_name}..."), span("query.plan", country=country_name):
+                query = country_query.plan_country_query(
+                    country_name, country_index,
+                    starttime=user_inputs["starttime"],
+                    endtime=user_inputs["endtime"],
+                    min_magnitude=user_inputs["min_magnitude"],
+                    limit=user_inputs["limit"],
+                    clip_to_border=user_inputs.get("clip_to_border", False),
+                    offshore_buffer_km=user_inputs.get("offshore_buffer_km", 0),
                 )
-            elif df is not None:
-                st.info("No features for table.")
+            if query is None:
+                st.error(f"Could not find boundaries for selected country '{country_name}'.")
+
+        if query is not None:
+            bounding_box = query.map_bounds
+            with st.spinner(f"📡 Checking cache or fetching data for '{country_name}'..."), span("fetch") as fetch_span:
+                quakes = country_query.fetch_country_events(query)
+                fetch_span.attrs["events"] = len(quakes) if quakes is not None else None
+
+            if quakes is not None and len(quakes) > 0:
+                num_events = len(quakes)
+                st.success(f"✅ Found {num_events} earthquake events for '{country_name}'.")
+                available = quakes.metadata.get('available', num_events) # In-country events matching the filters
+                estimated = quakes.metadata.get('available_estimated', False)
+                if available > num_events:
+                    st.warning(f"⚠️ {'About ' if estimated else ''}{available} events match these filters; showing the newest {num_events}. Raise the event limit (or select 'All matching events') to see more.")
+                bbox_count = quakes.metadata.get('bbox_count', available)
+                if bbox_count > available and not estimated:
+                    st.caption(f"{bbox_count - available} events inside the bounding box but outside the border were excluded.")
+
+                with st.spinner(f"🗺️ Generating map for {num_events} events..."), span("map", events=num_events) as map_span:
+                    map_html = map_builder.render_earthquake_map_html(quakes, center_on_bounds=bounding_box)
+                    map_span.output_bytes = len(map_html.encode()) if map_html else None
+                if map_html:
+                    st.info("Displaying Interactive Map:")
+                    components.html(map_html, height=600, scrolling=False)
+                else:
+                    st.error("❌ Failed to generate map.")
+
+                st.markdown("---")
+
+                with st.spinner("Preparing data table..."), span("dataframe", events=num_events):
+                    df = data_handler.geojson_to_dataframe(quakes)
+
+                # ---- NEW 2x2 CHART TILE LAYOUT ----
+                st.subheader("📽️ Summary Charts")
+
+                # Parse, sort and aggregate once for all ten animations
+                with span("prepare", events=num_events):
+                    prepared = PreparedQuakes.from_dataframe(df)
+
+                # Lay out every chart slot first, then fill each one as its render finishes
+                col1, col2 = st.columns(2)
+                col3, col4 = st.columns(2)
+                slots = {
+                    "magnitude": (col1.empty(), "Magnitude Histogram"),
+                    "depth": (col2.empty(), "Depth Histogram"),
+                    "timeseries": (col3.empty(), "Earthquakes Over Time"),
+                    "locations": (col4.empty(), "Location Animation"),
+                }
+
+                with st.spinner("Rendering animations..."), span("charts.summary", charts=len(slots)):
+                    for key, chart_path in render_scheduler.render_charts(prepared, keys=list(slots)):
+                        slot, caption = slots[key]
+                        show_chart(slot, chart_path, caption)
+
+                st.markdown("---")
+                st.subheader("🎞️ Advanced Visualizations")
+
+                # Warm the chart cache for the tabs nobody has opened yet, in tab order
+                render_scheduler.prerender_charts(prepared, [key for _, key, _ in ADVANCED_TABS if not uses_plotly(key)])
+                advanced_visualizations(prepared, country_name)
+
+                # ---- FINAL: DATA TABLE + DOWNLOAD ----
+                st.markdown("---")
+                st.subheader("📄 Earthquake Data Table")
+
+                if df is not None and not df.empty:
+                    # Sorted, filtered and paged here; the browser only receives the visible page
+                    data_table.display_event_table(EventTable(df), country_name)
+                elif df is not None:
+                    st.info("No features for table.")
+                else:
+                    st.warning("Could not process data into table.")
+
+            elif quakes is not None and len(quakes) == 0:
+                st.warning(f"⚠️ No earthquake events found matching your criteria for '{country_name}'.")
+                st.info("Displaying map of the selected area:")
+                with st.spinner("Generating empty map..."):
+                    map_html = map_builder.render_earthquake_map_html({"type": "FeatureCollection", "features": []}, center_on_bounds=bounding_box)
+                if map_html:
+                    components.html(map_html, height=500, scrolling=False)
+                st.subheader("📄 Data Table")
+                empty_df = data_handler.geojson_to_dataframe({"type": "FeatureCollection", "features": []})
+                if empty_df is not None:
+                    st.dataframe(empty_df, use_container_width=True)
+
             else:
-                st.warning("Could not process data into table.")
-
-        elif geojson_data and 'features' in geojson_data and len(geojson_data['features']) == 0:
-            st.warning(f"⚠️ No earthquake events found matching your criteria for '{country_name}'.")
-            st.info("Displaying map of the selected area:")
-            with st.spinner("Generating empty map..."):
-                empty_map = map_builder.create_earthquake_map({"type": "FeatureCollection", "features": []}, center_on_bounds=bounding_box)
-            if empty_map:
-                map_html = empty_map._repr_html_()
-                components.html(map_html, height=500, scrolling=False)
-            st.subheader("📄 Data Table")
-            empty_df = data_handler.geojson_to_dataframe({"type": "FeatureCollection", "features": []})
-            if empty_df is not None:
-                st.dataframe(empty_df, use_container_width=True)
+                st.error("❌ Failed to fetch data from the USGS API.")
 
-        else:
-            st.error("❌ Failed to fetch data from the USGS API.")
+        if settings.DEBUG_PANEL:
+            st.markdown("---")
+            debug_panel.display_debug_panel(recorder.spans)
 
 else:
     st.info("Select a country in the sidebar and click 'Fetch and Visualize Data' to load earthquake information.")